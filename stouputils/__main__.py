@@ -12,7 +12,7 @@ from .decorators.handle_error import handle_error
 # Argument Parser Setup for Auto-Completion
 parser = argparse.ArgumentParser(prog="stouputils", add_help=False)
 parser.add_argument("command", nargs="?", choices=[
-	"--version", "-v", "version", "show_version", "all_doctests", "archive", "backup", "build", "changelog", "redirect"
+	"--version", "-v", "version", "show_version", "all_doctests", "archive", "backup", "benchmark", "build", "changelog", "redirect"
 ])
 parser.add_argument("args", nargs="*")
 argcomplete.autocomplete(parser)
@@ -50,6 +50,12 @@ def main(args: list[str] | None = None) -> None:
 		from .backup.cli import backup_cli
 		return backup_cli()
 
+	# Handle "benchmark" command
+	if second_arg == "benchmark":
+		sys.argv.pop(1)  # Remove "benchmark" from argv so benchmark_cli gets clean arguments
+		from .parallel.benchmark import benchmark_cli
+		return benchmark_cli()
+
 	# Handle "build" command
 	if second_arg == "build":
 		from .continuous_delivery.pypi import pypi_full_routine_using_uv
@@ -87,7 +93,8 @@ def main(args: list[str] | None = None) -> None:
   {Cfg.GREEN}--version, -v{Cfg.RESET} [pkg] [-t <depth>]   Show version information (optionally for a specific package)
   {Cfg.GREEN}all_doctests{Cfg.RESET} [dir] [pattern]        Run all doctests in the specified directory (optionally filter by pattern)
   {Cfg.GREEN}archive{Cfg.RESET} --help                     Archive utilities (make, repair)
-  {Cfg.GREEN}backup{Cfg.RESET} --help                      Backup utilities (delta, consolidate, limit)
+  {Cfg.GREEN}backup{Cfg.RESET} --help                      Backup utilities (delta, consolidate, limit, restore)
+  {Cfg.GREEN}benchmark{Cfg.RESET} --help                   Benchmark multiprocessing/multithreading against a sequential run
   {Cfg.GREEN}build{Cfg.RESET} --help                       Build and publish package to PyPI using 'uv' tool (complete routine)
   {Cfg.GREEN}changelog{Cfg.RESET} --help                   Generate changelog from local git history (see --help for details)
   {Cfg.GREEN}redirect{Cfg.RESET} <src> <dst> [--help]      Move a folder and create a link at the original path
@@ -3,6 +3,8 @@ This module provides functions for creating and managing archives.
 
 - :py:func:`~repair_zip_file.repair_zip_file` - Try to repair a corrupted zip file by ignoring some of the errors
 - :py:func:`~make_archive.make_archive` - Create a zip archive from a source directory with consistent file timestamps.
+- :py:func:`~compression.parse_compression` - Parse a compression option such as "deflate:9", "store", "lzma" or "zstd:3"
+- :py:func:`~compression.is_incompressible` - Check if a file is probably already compressed (by extension or by sampling its content)
 - :py:func:`~cli.archive_cli` - Main entry point for command line usage
 
 .. image:: https://raw.githubusercontent.com/Stoupy51/stouputils/refs/heads/main/assets/archive_module.gif
@@ -11,6 +13,7 @@ This module provides functions for creating and managing archives.
 
 # Imports
 from .cli import *
+from .compression import *
 from .make_archive import *
 from .repair_zip_file import *  # pyright: ignore[reportGeneralTypeIssues]
 
@@ -36,10 +36,11 @@ def archive_cli() -> None:
 		print(f"{Cfg.CYAN}{separator}{Cfg.RESET}")
 		print(f"\n{Cfg.CYAN}Usage:{Cfg.RESET} stouputils archive <command> [options]")
 		print(f"\n{Cfg.CYAN}Available commands:{Cfg.RESET}")
-		print(f"  {Cfg.GREEN}make{Cfg.RESET} <source> <destination> [--ignore PATTERNS] [--create-dir]")
+		print(f"  {Cfg.GREEN}make{Cfg.RESET} <source> <destination> [--ignore PATTERNS] [--create-dir] [--compression METHOD]")
 		print("      Create a zip archive from source directory")
-		print(f"      {Cfg.CYAN}--ignore{Cfg.RESET}      Glob patterns to ignore (comma-separated)")
+		print(f"      {Cfg.CYAN}--ignore{Cfg.RESET}      Gitignore-style patterns to ignore (comma-separated)")
 		print(f"      {Cfg.CYAN}--create-dir{Cfg.RESET}  Create destination directory if needed")
+		print(f"      {Cfg.CYAN}--compression{Cfg.RESET} Compression method and level (e.g. deflate:9, store, lzma, zstd:3)")
 		print(f"\n  {Cfg.GREEN}repair{Cfg.RESET} <input_file> [output_file]")
 		print("      Repair a corrupted zip file")
 		print("      If output_file is omitted, adds '_repaired' suffix")
@@ -58,8 +59,10 @@ def archive_cli() -> None:
 	archive_parser = subparsers.add_parser("make", help="Create a zip archive")
 	archive_parser.add_argument("source", help="Source directory to archive")
 	archive_parser.add_argument("destination", help="Destination zip file")
-	archive_parser.add_argument("--ignore", help="Glob patterns to ignore (comma-separated)")
+	archive_parser.add_argument("--ignore", help="Gitignore-style patterns to ignore (comma-separated)")
 	archive_parser.add_argument("--create-dir", action="store_true", help="Create destination directory if it doesn't exist")
+	archive_parser.add_argument("--compression", default="deflate:9", help="Compression method and level (e.g. deflate:9, store, lzma, zstd:3)")
+	archive_parser.add_argument("--no-store-incompressible", dest="store_incompressible", action="store_false", help="Compress already compressed files too (media, archives...)")
 
 	args = parser.parse_args()
 
@@ -87,7 +90,9 @@ def archive_cli() -> None:
 				source=args.source,
 				destinations=args.destination,
 				create_dir=args.create_dir,
-				ignore_patterns=args.ignore
+				ignore_patterns=args.ignore,
+				compression=args.compression,
+				store_incompressible=args.store_incompressible,
 			)
 			info(f"Successfully created archive: {args.destination}")
 		except Exception as e:
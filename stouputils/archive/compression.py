@@ -0,0 +1,96 @@
+
+# Imports
+import os
+import zipfile
+import zlib
+
+# Constants
+COMPRESSION_METHODS: dict[str, int] = {
+	"store": zipfile.ZIP_STORED,
+	"deflate": zipfile.ZIP_DEFLATED,
+	"bzip2": zipfile.ZIP_BZIP2,
+	"lzma": zipfile.ZIP_LZMA,
+	**({"zstd": zipfile.ZIP_ZSTANDARD} if hasattr(zipfile, "ZIP_ZSTANDARD") else {}),	# pyright: ignore[reportAttributeAccessIssue, reportUnknownMemberType]
+}
+""" Compression methods that can be given as ``compression`` (zstd needs Python 3.14 or newer) """
+INCOMPRESSIBLE_EXTENSIONS: frozenset[str] = frozenset({
+	# Images
+	".jpg", ".jpeg", ".png", ".gif", ".webp", ".avif", ".heic", ".heif", ".jxl",
+	# Audio and video
+	".mp3", ".aac", ".m4a", ".ogg", ".opus", ".flac", ".mp4", ".m4v", ".mkv", ".mov", ".avi", ".webm", ".wmv",
+	# Archives and compressed files
+	".zip", ".jar", ".apk", ".whl", ".gz", ".tgz", ".bz2", ".xz", ".lzma", ".zst", ".7z", ".rar", ".br", ".lz4",
+	# Formats that are ZIP files in disguise, and compressed fonts
+	".docx", ".xlsx", ".pptx", ".odt", ".ods", ".odp", ".epub", ".woff", ".woff2",
+})
+""" Extensions of already compressed files, which are stored instead of being compressed again """
+ENTROPY_SAMPLE_SIZE: int = 64 * 1024
+""" Number of bytes sampled at the start of a file to check whether it compresses """
+INCOMPRESSIBLE_RATIO: float = 0.95
+""" A sample whose fast compression is bigger than this ratio of its size is considered incompressible """
+
+
+# Function to parse a compression option
+def parse_compression(compression: str) -> tuple[int, int | None]:
+	""" Parses a compression option such as "deflate", "deflate:6", "store", "bzip2:9", "lzma" or "zstd:3".
+
+	Args:
+		compression (str): Compression method, optionally followed by ":" and a level
+			(0-9 for deflate, 1-9 for bzip2, ignored for lzma, -7 to 22 for zstd)
+	Returns:
+		tuple[int, int | None]: The ZIP compression type and the level (None for the default level)
+
+	Examples:
+		>>> parse_compression("deflate:6") == (zipfile.ZIP_DEFLATED, 6)
+		True
+		>>> parse_compression("store") == (zipfile.ZIP_STORED, None)
+		True
+		>>> parse_compression("gzip")	# doctest: +ELLIPSIS
+		Traceback (most recent call last):
+			...
+		ValueError: Unknown compression method 'gzip', expected one of: store, deflate, bzip2, lzma...
+	"""
+	method, _, level = compression.strip().lower().partition(":")
+	if method not in COMPRESSION_METHODS:
+		raise ValueError(f"Unknown compression method '{method}', expected one of: {', '.join(COMPRESSION_METHODS)}")
+	if not level:
+		return COMPRESSION_METHODS[method], None
+	try:
+		return COMPRESSION_METHODS[method], int(level)
+	except ValueError:
+		raise ValueError(f"Invalid compression level '{level}' in '{compression}'") from None
+
+# Function to check if a file is probably already compressed
+def is_incompressible(path: str, sample: bytes | None = None) -> bool:
+	""" Checks if a file is probably already compressed (media, archives...), so compressing it again would waste time.
+
+	The extension is checked first, then a sample of the start of the file is compressed with the fastest level:
+	if it barely shrinks, the file is considered incompressible.
+
+	Args:
+		path	(str):			Path (or name) of the file
+		sample	(bytes | None):	Start of the file if already read (read from the path if None)
+	Returns:
+		bool: True if the file should be stored instead of compressed
+
+	Examples:
+		>>> is_incompressible("photos/cat.JPG", b"")
+		True
+		>>> is_incompressible("notes.txt", b"hello world " * 1000)
+		False
+		>>> import random
+		>>> is_incompressible("random.bin", random.Random(0).randbytes(10_000))
+		True
+	"""
+	if os.path.splitext(path)[1].lower() in INCOMPRESSIBLE_EXTENSIONS:
+		return True
+	if sample is None:
+		try:
+			with open(path, "rb") as f:
+				sample = f.read(ENTROPY_SAMPLE_SIZE)
+		except OSError:
+			return False
+	sample = sample[:ENTROPY_SAMPLE_SIZE]
+	if len(sample) < 1024:	# Too small to tell, and cheap to compress anyway
+		return False
+	return len(zlib.compress(sample, 1)) > len(sample) * INCOMPRESSIBLE_RATIO
@@ -1,11 +1,12 @@
 
 # Imports
-import fnmatch
 import os
-from zipfile import ZIP_DEFLATED, ZipFile, ZipInfo
+from zipfile import ZIP_STORED, ZipFile, ZipInfo
 
 from ..decorators import LogLevels, handle_error
+from ..io.ignore import IgnoreMatcher, walk_files, widen_leading_wildcard
 from ..io.path import clean_path, super_copy
+from .compression import is_incompressible, parse_compression
 
 
 # Function that makes an archive with consistency (same zip file each time)
@@ -16,13 +17,16 @@ def make_archive(
 	override_time: tuple[int, int, int, int, int, int] | None = None,
 	create_dir: bool = False,
 	ignore_patterns: str | None = None,
+	compression: str = "deflate:9",
+	store_incompressible: bool = True,
 ) -> bool:
 	""" Create a zip archive from a source directory with consistent file timestamps.
 	(Meaning deterministic zip file each time)
 
 	Creates a zip archive from the source directory and copies it to one or more destinations.
 	The archive will have consistent file timestamps across runs if override_time is specified.
-	Uses maximum compression level (9) with ZIP_DEFLATED algorithm.
+	Uses maximum compression level (9) with ZIP_DEFLATED algorithm by default,
+	and stores the files that are already compressed (media, archives...) as compressing them again is slow and useless.
 
 	Args:
 		source				(str):						The source folder to archive
@@ -30,7 +34,10 @@ def make_archive(
 		override_time		(None | tuple[int, ...]):	The constant time to use for the archive
 			(e.g. (2024, 1, 1, 0, 0, 0) for 2024-01-01 00:00:00)
 		create_dir			(bool):						Whether to create the destination directory if it doesn't exist
-		ignore_patterns		(str | None):				Glob pattern(s) to ignore files. Can be a single pattern or comma-separated patterns (e.g. "*.pyc" or "*.pyc,__pycache__,*.log")
+		ignore_patterns		(str | None):				Gitignore-style pattern(s) to ignore files and folders, single or comma-separated (e.g. "*.pyc" or "*.pyc,__pycache__,*.log"),
+			a leading "*/" matching at any depth as before (see :py:func:`~stouputils.io.ignore.widen_leading_wildcard`)
+		compression			(str):						Compression method and level, e.g. "deflate:9", "deflate:1", "store", "bzip2", "lzma" or "zstd:3"
+		store_incompressible	(bool):					Whether to store the files that are already compressed (detected by extension or by sampling their content)
 	Returns:
 		bool: Always returns True unless any strong error
 	Examples:
@@ -43,6 +50,7 @@ def make_archive(
 		> make_archive("src", "output.zip", ignore_patterns="*.pyc")
 		> make_archive("src", "output.zip", ignore_patterns="__pycache__")
 		> make_archive("src", "output.zip", ignore_patterns="*.pyc,__pycache__,*.log")
+		> make_archive("src", "output.zip", compression="lzma")
 	"""
 	# Fix copy_destinations type if needed
 	if destinations is None:
@@ -66,42 +74,23 @@ def make_archive(
 			destinations[i] = os.path.join(dest, os.path.basename(source) + ".zip")
 
 	# Create the archive
+	compress_type, compresslevel = parse_compression(compression)
 	destination: str = clean_path(destinations[0])
 	destination = destination if ".zip" in destination else destination + ".zip"
 
-	# Parse ignore patterns (can be a single pattern or comma-separated patterns)
-	ignore_pattern_list: list[str] = []
-	if ignore_patterns:
-		ignore_pattern_list = [pattern.strip() for pattern in ignore_patterns.split(',')]
-
-	def should_ignore(path: str) -> bool:
-		"""Check if a file or directory path should be ignored based on patterns."""
-		if not ignore_pattern_list:
-			return False
-		for pattern in ignore_pattern_list:
-			if fnmatch.fnmatch(os.path.basename(path), pattern) or fnmatch.fnmatch(path, pattern):
-				return True
-		return False
-
-	with ZipFile(destination, "w", compression=ZIP_DEFLATED, compresslevel=9) as zip:
-		for root, dirs, files in os.walk(source):
-			# Filter out ignored directories in-place to prevent walking into them
-			dirs[:] = [d for d in dirs if not should_ignore(d)]
-
-			for file in files:
-				file_path: str = clean_path(os.path.join(root, file))
-				rel_path = os.path.relpath(file_path, source)
-
-				# Skip files that match any ignore pattern
-				if should_ignore(file) or should_ignore(rel_path):
-					continue
-
-				info: ZipInfo = ZipInfo(rel_path)
-				info.compress_type = ZIP_DEFLATED
-				if override_time:
-					info.date_time = override_time
-				with open(file_path, "rb") as f:
-					zip.writestr(info, f.read())
+	# Parse ignore patterns (can be a single pattern or comma-separated patterns), ignored folders are never walked
+	# (a leading "*/" keeps matching below at least one folder, as with the relative paths matched by fnmatch before)
+	matcher: IgnoreMatcher = IgnoreMatcher(widen_leading_wildcard(ignore_patterns.split(","), "*/**/") if ignore_patterns else ())
+
+	with ZipFile(destination, "w", compression=compress_type, compresslevel=compresslevel) as zip:
+		for file_path, rel_path in walk_files(source, matcher):
+			info: ZipInfo = ZipInfo(rel_path)
+			if override_time:
+				info.date_time = override_time
+			with open(file_path, "rb") as f:
+				data: bytes = f.read()
+			info.compress_type = ZIP_STORED if store_incompressible and is_incompressible(rel_path, data) else compress_type
+			zip.writestr(info, data, compresslevel=compresslevel)
 
 	# Copy the archive to the destination(s)
 	for dest_file in destinations[1:]:
@@ -4,9 +4,20 @@ This module provides utilities for backup management.
 - :py:func:`~cli.backup_cli` - Main entry point for command line usage
 - :py:func:`~create.create_delta_backup` - Creates a ZIP delta backup, saving only modified or new files while tracking deleted files
 - :py:func:`~consolidate.consolidate_backups` - Consolidates the files from the given backup and all previous ones into a new ZIP file
+- :py:func:`~restore.restore_backup` - Restores files as they were at a given backup, extracting only the needed members in parallel
+- :py:func:`~consolidate.merge_backups` - Merges a backup into the next one, rewriting only these two backups
 - :py:func:`~limiter.limit_backups` - Limits the number of delta backups by consolidating the oldest ones
-- :py:func:`~hash.get_file_hash` - Computes the SHA-256 hash of a file
+- :py:func:`~members.compress_file` - Compresses a file into a ZIP member ahead of time (e.g. in a worker thread)
+- :py:func:`~members.write_raw_member` - Appends an already compressed member to a ZipFile without recompressing it
+- :py:func:`~members.open_raw_member` - Locates the compressed data of a member of a ZipFile, to copy it to another one without decompressing it
+- :py:func:`~chunking.iter_content_chunks` - Splits a stream into content-defined chunks (gear rolling hash), used by the chunked backup mode
+- :py:func:`~chunking.chunk_file` - Splits a file into chunks compressed ahead of time, skipping the ones already stored, along with its manifest
+- :py:func:`~chunking.iter_manifest_content` - Rebuilds the content of a chunked file from its manifest
+- :py:func:`~hash.get_file_hash` - Computes the hash of a file (SHA-256 by default, or BLAKE2b, BLAKE3, xxh3 with a prefix recording the algorithm)
+- :py:func:`~hash.get_hash_algorithm` - Gets the algorithm of a stored hash from its prefix
 - :py:func:`~hash.extract_hash_from_zipinfo` - Extracts the stored hash from a ZipInfo object's comment
+- :py:func:`~hash.extract_stat_from_zipinfo` - Extracts the stored size and modification time of the source file from a ZipInfo object's extra field
+- :py:class:`~catalog.BackupCatalog` - Persistent SQLite index of the backups of a folder, giving the newest state of each file without reopening every ZIP file
 - :py:func:`~retrieve.get_all_previous_backups` - Retrieves all previous backups in a folder and maps each backup to a dictionary of file paths and their hashes
 - :py:func:`~retrieve.is_file_in_any_previous_backup` - Checks if a file with the same hash exists in any previous backup
 
@@ -15,11 +26,15 @@ This module provides utilities for backup management.
 """
 
 # Imports
+from .catalog import *
+from .chunking import *
 from .cli import *
 from .consolidate import *
 from .create import *
 from .hash import *
 from .limiter import *
+from .members import *
+from .restore import *
 from .retrieve import *
 
 if __name__ == "__main__":
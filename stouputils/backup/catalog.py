@@ -0,0 +1,455 @@
+
+# Imports
+import os
+import sqlite3
+import zipfile
+from typing import Any, NamedTuple
+
+from ..ctx.common import AbstractBothContextManager
+from ..io.path import clean_path
+from ..print.message import warning
+from .chunking import CHUNKS_FOLDER, is_chunk_manifest
+from .hash import extract_hash_from_zipinfo, extract_stat_from_zipinfo
+from .retrieve import get_backup_sort_key
+
+# Constants
+CATALOG_FILENAME: str = ".backup_catalog.db"
+""" Name of the catalog file stored next to the backups """
+CATALOG_VERSION: int = 3
+""" Version of the catalog schema, a catalog with another version is rebuilt from the ZIP files """
+CATALOG_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS backups (
+	name TEXT PRIMARY KEY,
+	sort_key TEXT NOT NULL,
+	size INTEGER NOT NULL,
+	mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS records (
+	backup TEXT NOT NULL,
+	path TEXT NOT NULL,
+	deleted INTEGER NOT NULL,
+	hash TEXT,
+	size INTEGER NOT NULL,
+	mtime_ns INTEGER,
+	chunked INTEGER NOT NULL,
+	PRIMARY KEY (backup, path, deleted)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS latest (
+	path TEXT PRIMARY KEY,
+	backup TEXT NOT NULL,
+	hash TEXT,
+	size INTEGER NOT NULL,
+	mtime_ns INTEGER,
+	chunked INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS stats (
+	path TEXT PRIMARY KEY,
+	size INTEGER NOT NULL,
+	mtime_ns INTEGER NOT NULL,
+	hash TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS chunks (
+	hash TEXT NOT NULL,
+	backup TEXT NOT NULL,
+	size INTEGER NOT NULL,
+	PRIMARY KEY (hash, backup)
+) WITHOUT ROWID;
+"""
+""" Tables of the catalog: the indexed backups (with the stat used to detect changes),
+the files and deletions recorded in each backup, the newest state of every file that still exists,
+the stats of source files found unchanged although their stat changed (e.g. touched files),
+and the chunks stored in each backup (see :py:mod:`~stouputils.backup.chunking`) """
+NEWEST_RECORDS_QUERY: str = """
+SELECT path, backup, deleted, hash, size, mtime_ns, chunked FROM (
+	SELECT r.*, ROW_NUMBER() OVER (PARTITION BY r.path ORDER BY b.sort_key DESC, b.name DESC, r.deleted ASC) AS rank
+	FROM records r JOIN backups b ON b.name = r.backup {where}
+) WHERE rank = 1
+"""
+""" Newest record of each path among the backups (files of a backup take precedence over its deletions),
+``{where}`` being either empty or a cutoff on ``(b.sort_key, b.name)`` """
+
+
+# Class representing the state of a file in the newest backup holding it
+class CatalogEntry(NamedTuple):
+	""" State of a file in the newest backup holding it """
+	backup: str
+	""" Path of the backup ZIP file holding the newest version of the file """
+	hash: str | None
+	""" Stored hash of the file (None if the ZIP member has no hash) """
+	size: int
+	""" Uncompressed size of the file in bytes """
+	mtime_ns: int | None
+	""" Modification time of the source file in nanoseconds (None for backups made before it was recorded) """
+	chunked: bool = False
+	""" Whether the ZIP member is a chunk manifest instead of the content of the file """
+
+
+# "Private" function to read the files, deletions and chunks recorded in a backup ZIP file
+def read_backup_records(zip_path: str) -> tuple[list[tuple[str, int, str | None, int, int | None, int]], list[tuple[str, int]]]:
+	""" Read the central directory (and deleted files list) of a backup.
+
+	Args:
+		zip_path (str): Path to the backup ZIP file
+	Returns:
+		tuple[list[tuple[str, int, str | None, int, int | None, int]], list[tuple[str, int]]]:
+			Records as (path, deleted, hash, size, mtime_ns, chunked), and stored chunks as (hash, size)
+	"""
+	records: list[tuple[str, int, str | None, int, int | None, int]] = []
+	chunks: list[tuple[str, int]] = []
+	with zipfile.ZipFile(zip_path, "r") as zipf:
+		for inf in zipf.infolist():
+			if inf.filename == "__deleted_files__.txt":
+				records.extend((path, 1, None, 0, None, 0) for path in zipf.read(inf).decode().splitlines())
+			elif inf.filename.startswith(CHUNKS_FOLDER):
+				chunks.append((inf.filename[len(CHUNKS_FOLDER):], inf.file_size))
+			elif inf.filename:
+				stat: tuple[int, int] | None = extract_stat_from_zipinfo(inf)
+				chunked: bool = is_chunk_manifest(inf)
+				size: int = stat[0] if chunked and stat else inf.file_size
+				records.append((inf.filename, 0, extract_hash_from_zipinfo(inf), size, stat[1] if stat else None, int(chunked)))
+	return records, chunks
+
+
+# Class to index the backups of a folder in a sidecar SQLite database
+class BackupCatalog(AbstractBothContextManager["BackupCatalog"]):
+	""" Persistent index of the backups of a folder, stored in a SQLite file next to them.
+
+	Reading the central directory of every backup ZIP file on each run gets slow with hundreds of deltas,
+	so each backup is read once and its files are recorded in the catalog.
+	On load, the catalog is checked against the ZIP files of the folder (name, size and modification time):
+	new or modified backups are indexed, removed ones are forgotten, all in a single transaction.
+	The newest state of every file is kept in a table, making lookups O(1) without reopening any ZIP file.
+
+	If the catalog cannot be written (e.g. read-only folder), an in-memory catalog is used instead.
+
+	Args:
+		backup_folder (str): Folder containing the backup ZIP files
+
+	Examples:
+		>>> import tempfile, zipfile
+		>>> with tempfile.TemporaryDirectory() as folder:
+		...     with zipfile.ZipFile(f"{folder}/2025_01_01-00_00_00.zip", "w") as zipf:
+		...         zipf.writestr(zipfile.ZipInfo("data/a.txt"), "a")
+		...         zipf.writestr(zipfile.ZipInfo("data/b.txt"), "b")
+		...     with zipfile.ZipFile(f"{folder}/2025_01_02-00_00_00.zip", "w") as zipf:
+		...         zipf.writestr(zipfile.ZipInfo("data/a.txt"), "A")
+		...         zipf.writestr("__deleted_files__.txt", "data/b.txt")
+		...     with BackupCatalog(folder) as catalog:
+		...         entry = catalog.lookup("data/a.txt")
+		...         print(os.path.basename(entry.backup), entry.size, sorted(catalog.latest()), catalog.lookup("data/b.txt"))
+		2025_01_02-00_00_00.zip 1 ['data/a.txt'] None
+	"""
+	def __init__(self, backup_folder: str) -> None:
+		self.backup_folder: str = clean_path(os.path.abspath(backup_folder))
+		""" Folder containing the backup ZIP files """
+		self.path: str = clean_path(os.path.join(self.backup_folder, CATALOG_FILENAME))
+		""" Path of the catalog file """
+		self.connection: sqlite3.Connection | None = None
+		""" Connection to the catalog (None until opened) """
+
+	def __repr__(self) -> str:
+		return f"BackupCatalog(backup_folder={self.backup_folder!r})"
+
+	def open(self) -> sqlite3.Connection:
+		""" Open the catalog (creating or upgrading it if needed) and synchronize it with the ZIP files of the folder.
+
+		Returns:
+			sqlite3.Connection: The connection to the catalog
+		"""
+		if self.connection is not None:
+			return self.connection
+		try:
+			self.connection = self.connect(self.path)
+		except sqlite3.Error as e:
+			warning(f"Cannot use the backup catalog '{self.path}' ({e}), falling back to an in-memory catalog")
+			self.connection = self.connect(":memory:")
+		self.sync()
+		return self.connection
+
+	@staticmethod
+	def connect(path: str) -> sqlite3.Connection:
+		""" Connect to a catalog database and make sure its schema is up to date """
+		connection: sqlite3.Connection = sqlite3.connect(path, timeout=60)
+		try:
+			version: int = connection.execute("PRAGMA user_version").fetchone()[0]
+			if version != CATALOG_VERSION:
+				with connection:
+					connection.executescript("DROP TABLE IF EXISTS backups; DROP TABLE IF EXISTS records; DROP TABLE IF EXISTS latest; DROP TABLE IF EXISTS stats; DROP TABLE IF EXISTS chunks;")
+			connection.executescript(CATALOG_SCHEMA)
+			connection.execute(f"PRAGMA user_version = {CATALOG_VERSION}")
+		except sqlite3.Error:
+			connection.close()
+			raise
+		return connection
+
+	def close(self) -> None:
+		""" Close the connection to the catalog """
+		if self.connection is not None:
+			self.connection.close()
+			self.connection = None
+
+	def __enter__(self) -> "BackupCatalog":
+		self.open()
+		return self
+
+	def __exit__(self, *args: Any) -> None:
+		self.close()
+
+	async def __aenter__(self) -> "BackupCatalog":
+		return self.__enter__()
+
+	async def __aexit__(self, *args: Any) -> None:
+		self.__exit__(*args)
+
+	def sync(self) -> None:
+		""" Synchronize the catalog with the backup ZIP files of the folder.
+
+		New or modified backups are indexed and removed ones are forgotten in a single transaction.
+		The newest state of the files is updated incrementally when backups are only appended, and rebuilt otherwise.
+		"""
+		connection: sqlite3.Connection = self.open()
+
+		# Compare the ZIP files of the folder with the indexed ones
+		on_disk: dict[str, tuple[int, int]] = {}
+		with os.scandir(self.backup_folder) as it:
+			for entry in it:
+				if entry.name.endswith(".zip") and entry.is_file():
+					stat: os.stat_result = entry.stat()
+					on_disk[entry.name] = (stat.st_size, stat.st_mtime_ns)
+		indexed: dict[str, tuple[str, int, int]] = {
+			name: (sort_key, size, mtime_ns) for name, sort_key, size, mtime_ns in connection.execute("SELECT * FROM backups")
+		}
+		removed: list[str] = [name for name, (_, *stat) in indexed.items() if tuple(stat) != on_disk.get(name)]
+		added: list[str] = sorted(
+			(name for name in on_disk if name not in indexed or name in removed),
+			key=lambda name: (get_backup_sort_key(name), name),
+		)
+		if not removed and not added:
+			return
+
+		# Read the new backups before locking the catalog
+		new_records: dict[str, tuple[list[tuple[str, int, str | None, int, int | None, int]], list[tuple[str, int]]]] = {}
+		for name in added:
+			try:
+				new_records[name] = read_backup_records(os.path.join(self.backup_folder, name))
+			except Exception as e:
+				warning(f"Error reading backup {clean_path(os.path.join(self.backup_folder, name))}: {e}")
+
+		# Only appending backups newer than all the others allows an incremental update of the newest states
+		kept: list[tuple[str, str]] = [(sort_key, name) for name, (sort_key, *_) in indexed.items() if name not in removed]
+		newest_kept: tuple[str, str] | None = max(kept, default=None)
+		incremental: bool = not removed and all(
+			newest_kept is None or (get_backup_sort_key(name), name) > newest_kept for name in new_records
+		)
+
+		with connection:
+			for name in removed:
+				connection.execute("DELETE FROM backups WHERE name = ?", (name,))
+				connection.execute("DELETE FROM records WHERE backup = ?", (name,))
+				connection.execute("DELETE FROM chunks WHERE backup = ?", (name,))
+			for name, (records, chunks) in new_records.items():
+				connection.execute("INSERT INTO backups VALUES (?, ?, ?, ?)", (name, get_backup_sort_key(name), *on_disk[name]))
+				connection.executemany("INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?, ?, ?)", ((name, *r) for r in records))
+				connection.executemany("INSERT OR REPLACE INTO chunks VALUES (?, ?, ?)", ((chunk_hash, name, size) for chunk_hash, size in chunks))
+				if incremental:
+					connection.execute("DELETE FROM latest WHERE path IN (SELECT path FROM records WHERE backup = ? AND deleted = 1)", (name,))
+					connection.execute(
+						"INSERT OR REPLACE INTO latest SELECT path, backup, hash, size, mtime_ns, chunked FROM records WHERE backup = ? AND deleted = 0",
+						(name,),
+					)
+			if not incremental:
+				connection.execute("DELETE FROM latest")
+				connection.execute(
+					f"INSERT INTO latest SELECT path, backup, hash, size, mtime_ns, chunked FROM ({NEWEST_RECORDS_QUERY.format(where='')}) WHERE deleted = 0"
+				)
+
+	def backups(self, all_before: str | None = None) -> list[str]:
+		""" List the indexed backups, from oldest to newest.
+
+		Args:
+			all_before (str | None): Path to the latest backup ZIP file to include
+				(If None, endswith "/latest.zip" or "/", all the backups are included)
+		Returns:
+			list[str]: Paths of the backup ZIP files
+		"""
+		rows: list[tuple[str, str]] = self.open().execute("SELECT sort_key, name FROM backups ORDER BY sort_key, name").fetchall()
+		paths: list[str] = [clean_path(os.path.join(self.backup_folder, name)) for _, name in rows]
+		cutoff: tuple[str, str] | None = self.cutoff(all_before)
+		if cutoff is not None:
+			paths = paths[:rows.index(cutoff) + 1]
+		return paths
+
+	def cutoff(self, all_before: str | None) -> tuple[str, str] | None:
+		""" Get the (sort_key, name) of the latest backup to include, None meaning all of them """
+		if all_before is None or all_before.endswith("/latest.zip") or all_before.endswith("/") or os.path.isdir(all_before):
+			return None
+		all_before = clean_path(os.path.abspath(all_before))
+		name: str = os.path.basename(all_before)
+		if clean_path(os.path.dirname(all_before)) != self.backup_folder or self.open().execute(
+			"SELECT 1 FROM backups WHERE name = ?", (name,)
+		).fetchone() is None:
+			raise ValueError(f"'{all_before}' is not a backup indexed in '{self.backup_folder}'")
+		return (get_backup_sort_key(name), name)
+
+	def lookup(self, path: str) -> CatalogEntry | None:
+		""" Get the newest state of a file across all the backups.
+
+		Args:
+			path (str): Path of the file inside the backups
+		Returns:
+			CatalogEntry | None: The newest state of the file, None if it is not backed up or was deleted
+		"""
+		row: tuple[Any, ...] | None = self.open().execute(
+			"SELECT backup, hash, size, mtime_ns, chunked FROM latest WHERE path = ?", (path,)
+		).fetchone()
+		return None if row is None else self.entry(*row)
+
+	def latest(self) -> dict[str, CatalogEntry]:
+		""" Get the newest state of every file that still exists across all the backups.
+
+		Returns:
+			dict[str, CatalogEntry]: Mapping of file paths to their newest state
+		"""
+		return {path: self.entry(*row) for path, *row in self.open().execute("SELECT * FROM latest")}
+
+	def resolve(self, all_before: str | None = None) -> tuple[dict[str, CatalogEntry], set[str]]:
+		""" Resolve the newest state of every file among the backups up to a given one.
+
+		Args:
+			all_before (str | None): Path to the latest backup ZIP file to consider
+				(If None, endswith "/latest.zip" or "/", all the backups are considered)
+		Returns:
+			tuple[dict[str, CatalogEntry], set[str]]: Files still existing with their newest state,
+				and files whose newest record is a deletion
+		"""
+		cutoff: tuple[str, str] | None = self.cutoff(all_before)
+
+		# Without cutoff, the files are already resolved, and a deleted file is one that is not in the latest files anymore
+		if cutoff is None:
+			files: dict[str, CatalogEntry] = self.latest()
+			deleted: set[str] = {path for (path,) in self.open().execute("SELECT DISTINCT path FROM records WHERE deleted = 1")}
+			return files, deleted - files.keys()
+
+		# Otherwise, resolve the newest record of each path among the backups up to the cutoff
+		query: str = NEWEST_RECORDS_QUERY.format(where="WHERE (b.sort_key, b.name) <= (?, ?)")
+		files = {}
+		deleted = set()
+		for path, backup, is_deleted, file_hash, size, mtime_ns, chunked in self.open().execute(query, cutoff):
+			if is_deleted:
+				deleted.add(path)
+			else:
+				files[path] = self.entry(backup, file_hash, size, mtime_ns, chunked)
+		return files, deleted
+
+	def records(self, backup_path: str) -> tuple[dict[str, CatalogEntry], set[str]]:
+		""" Get the files and deletions recorded in a single backup.
+
+		Args:
+			backup_path (str): Path to a backup ZIP file of the folder
+		Returns:
+			tuple[dict[str, CatalogEntry], set[str]]: Files stored in the backup, and files it records as deleted
+		"""
+		cutoff: tuple[str, str] | None = self.cutoff(backup_path)
+		if cutoff is None:
+			raise ValueError(f"'{backup_path}' is not a single backup")
+		name: str = cutoff[1]
+		files: dict[str, CatalogEntry] = {}
+		deleted: set[str] = set()
+		for path, is_deleted, file_hash, size, mtime_ns, chunked in self.open().execute(
+			"SELECT path, deleted, hash, size, mtime_ns, chunked FROM records WHERE backup = ?", (name,)
+		):
+			if is_deleted:
+				deleted.add(path)
+			else:
+				files[path] = self.entry(name, file_hash, size, mtime_ns, chunked)
+		return files, deleted
+
+	def stat_cache(self) -> dict[str, tuple[int, int, str]]:
+		""" Get the known stat of the source files, to skip re-hashing the ones whose stat did not change.
+
+		It combines the stats stored in the newest backup of each file with the ones recorded by :py:meth:`update_stat_cache`.
+
+		Returns:
+			dict[str, tuple[int, int, str]]: Mapping of file paths to their (size, mtime_ns, hash)
+		"""
+		connection: sqlite3.Connection = self.open()
+		cache: dict[str, tuple[int, int, str]] = {
+			path: (size, mtime_ns, file_hash) for path, size, mtime_ns, file_hash in connection.execute(
+				"SELECT path, size, mtime_ns, hash FROM latest WHERE mtime_ns IS NOT NULL AND hash IS NOT NULL"
+			)
+		}
+		cache.update(
+			(path, (size, mtime_ns, file_hash)) for path, size, mtime_ns, file_hash in connection.execute("SELECT * FROM stats")
+		)
+		return cache
+
+	def update_stat_cache(self, stats: list[tuple[str, int, int, str]]) -> None:
+		""" Record the stat of source files whose content is already backed up (e.g. touched but unchanged files),
+		and forget the stats of files that are not backed up anymore or whose newest backed up content differs.
+
+		Args:
+			stats (list[tuple[str, int, int, str]]): List of (path, size, mtime_ns, hash)
+		"""
+		connection: sqlite3.Connection = self.open()
+		with connection:
+			connection.executemany("INSERT OR REPLACE INTO stats VALUES (?, ?, ?, ?)", stats)
+			connection.execute("DELETE FROM stats WHERE NOT EXISTS (SELECT 1 FROM latest WHERE latest.path = stats.path AND latest.hash = stats.hash)")
+
+	def chunk_hashes(self) -> set[str]:
+		""" Get the hashes of all the chunks stored in the backups, that new chunked files can refer to.
+
+		Returns:
+			set[str]: Hashes of the stored chunks
+		"""
+		return {chunk_hash for (chunk_hash,) in self.open().execute("SELECT DISTINCT hash FROM chunks")}
+
+	def chunk_locations(self, all_before: str | None = None) -> dict[str, str]:
+		""" Locate the chunks stored in the backups up to a given one (the newest backup holding a chunk is used).
+
+		Args:
+			all_before (str | None): Path to the latest backup ZIP file to consider
+				(If None, endswith "/latest.zip" or "/", all the backups are considered)
+		Returns:
+			dict[str, str]: Mapping of chunk hashes to the path of a backup ZIP file holding them
+		"""
+		cutoff: tuple[str, str] | None = self.cutoff(all_before)
+		query: str = "SELECT c.hash, c.backup FROM chunks c JOIN backups b ON b.name = c.backup {where} ORDER BY b.sort_key, b.name"
+		rows: list[tuple[str, str]] = self.open().execute(
+			query.format(where="WHERE (b.sort_key, b.name) <= (?, ?)" if cutoff else ""), cutoff or ()
+		).fetchall()
+		return {chunk_hash: clean_path(os.path.join(self.backup_folder, backup)) for chunk_hash, backup in rows}
+
+	def backup_chunks(self, backup_path: str) -> set[str]:
+		""" Get the hashes of the chunks stored in a single backup.
+
+		Args:
+			backup_path (str): Path to a backup ZIP file of the folder
+		Returns:
+			set[str]: Hashes of the chunks stored in the backup
+		"""
+		name: str = os.path.basename(backup_path)
+		return {chunk_hash for (chunk_hash,) in self.open().execute("SELECT hash FROM chunks WHERE backup = ?", (name,))}
+
+	def manifests_after(self, all_before: str | None) -> list[tuple[str, str]]:
+		""" List the chunk manifests recorded in the backups newer than a given one, whose chunks must be kept.
+
+		Args:
+			all_before (str | None): Path to the backup ZIP file after which to look
+				(If None, endswith "/latest.zip" or "/", there is no newer backup)
+		Returns:
+			list[tuple[str, str]]: List of (backup ZIP file path, manifest path inside it)
+		"""
+		cutoff: tuple[str, str] | None = self.cutoff(all_before)
+		if cutoff is None:
+			return []
+		rows: list[tuple[str, str]] = self.open().execute(
+			"SELECT r.backup, r.path FROM records r JOIN backups b ON b.name = r.backup "
+			"WHERE r.chunked = 1 AND (b.sort_key, b.name) > (?, ?) ORDER BY b.sort_key, b.name, r.path",
+			cutoff,
+		).fetchall()
+		return [(clean_path(os.path.join(self.backup_folder, backup)), path) for backup, path in rows]
+
+	def entry(self, backup: str, file_hash: str | None, size: int, mtime_ns: int | None, chunked: int = 0) -> CatalogEntry:
+		""" Build a CatalogEntry from a row of the catalog """
+		return CatalogEntry(clean_path(os.path.join(self.backup_folder, backup)), file_hash, size, mtime_ns, bool(chunked))
+
@@ -0,0 +1,259 @@
+
+# Imports
+import functools
+import hashlib
+import struct
+import tempfile
+import zipfile
+from collections.abc import Callable, Container, Iterator
+from typing import IO, Any
+
+from .hash import DEFAULT_HASH_ALGORITHM, new_file_hasher
+from .members import SPOOL_SIZE, CompressedMember, compress_bytes
+
+# Constants
+CHUNKS_FOLDER: str = "__chunks__/"
+""" Folder of the backup ZIP files holding the chunk store, each chunk being a member named after its hash """
+MANIFEST_EXTRA_ID: int = 0x4843
+""" Header ID of the (empty) ZIP extra field marking a member as a chunk manifest (b"CH") """
+MANIFEST_EXTRA: bytes = struct.pack("<HH", MANIFEST_EXTRA_ID, 0)
+""" ZIP extra field marking a member as a chunk manifest """
+DEFAULT_CHUNK_SIZE: int = 1024 * 1024
+""" Default average size of the chunks in bytes (chunks are between a quarter and four times this size) """
+GEAR_WINDOW: int = 32
+""" Number of bytes the rolling hash depends on """
+CDC_READ_SIZE: int = 4 * 1024 * 1024
+""" Number of bytes read and hashed at once when looking for chunk boundaries """
+
+
+# "Private" function to get the table of the gear rolling hash
+@functools.cache
+def get_gear_table() -> Any:
+	""" Get the 256 pseudo-random 32-bit values of the gear rolling hash, derived from SHA-256 so they never change """
+	import numpy as np
+	return np.array([int.from_bytes(hashlib.sha256(bytes([i])).digest()[:4], "little") for i in range(256)], dtype=np.uint32)
+
+
+# "Private" function to compute the rolling hash at every position of a buffer
+def gear_hashes(data: bytes) -> Any:
+	""" Compute the gear hash ``h[i] = (h[i-1] << 1) + G[data[i]]`` at every position, vectorized with numpy.
+
+	Since the hash only depends on the last :py:data:`GEAR_WINDOW` bytes, it is also
+	``sum(G[data[i-j]] << j for j < GEAR_WINDOW)``, which is computed with log2(GEAR_WINDOW) shifted additions.
+	"""
+	import numpy as np
+	hashes: Any = get_gear_table()[np.frombuffer(data, dtype=np.uint8)]
+	width: int = 1
+	while width < GEAR_WINDOW:
+		hashes[width:] += hashes[:-width] << np.uint32(width)
+		width *= 2
+	return hashes
+
+
+# Function to split a stream into content-defined chunks
+def iter_content_chunks(f: IO[bytes], chunk_size: int = DEFAULT_CHUNK_SIZE, read_size: int = CDC_READ_SIZE) -> Iterator[bytes]:
+	""" Splits a stream into chunks whose boundaries depend on the content (gear rolling hash),
+	so inserting or removing bytes only changes the chunks around the modification.
+
+	Args:
+		f			(IO[bytes]):	Binary stream to split
+		chunk_size	(int):			Average size of the chunks (chunks are between a quarter and four times this size)
+		read_size	(int):			Number of bytes read at once (does not change the boundaries)
+	Returns:
+		Iterator[bytes]: The chunks, in order
+
+	Examples:
+		>>> import io, random
+		>>> data = random.Random(0).randbytes(200_000)
+		>>> before = list(iter_content_chunks(io.BytesIO(data), chunk_size=8192))
+		>>> after = list(iter_content_chunks(io.BytesIO(data[:100_000] + b"inserted" + data[100_000:]), chunk_size=8192))
+		>>> b"".join(before) == data, all(2048 <= len(chunk) <= 32768 for chunk in before[:-1])
+		(True, True)
+		>>> len(set(after) - set(before)) <= 2
+		True
+	"""
+	import numpy as np
+	min_size: int = max(1, chunk_size // 4)
+	max_size: int = max(min_size, chunk_size * 4)
+	mask_bits: int = min(32, max(1, (chunk_size - min_size).bit_length() - 1))
+	mask: Any = np.uint32(((1 << mask_bits) - 1) << (32 - mask_bits))	# Top bits depend on the whole window
+
+	buffer: bytearray = bytearray()
+	history: bytes = b""
+	while True:
+		block: bytes = f.read(read_size)
+		if not block:
+			break
+
+		# Find the candidate boundaries of the block (positions right after a matching hash)
+		hashes: Any = gear_hashes(history + block)[len(history):]
+		candidates: Any = np.flatnonzero((hashes & mask) == 0) + 1
+		base: int = len(buffer)
+		buffer += block
+		history = bytes(buffer[-(GEAR_WINDOW - 1):])
+
+		# Cut the chunks, enforcing the minimum and maximum sizes
+		start: int = 0
+		for candidate in candidates.tolist():
+			position: int = base + candidate
+			while position - start > max_size:
+				yield bytes(buffer[start:start + max_size])
+				start += max_size
+			if position - start >= min_size:
+				yield bytes(buffer[start:position])
+				start = position
+		while len(buffer) - start >= max_size:
+			yield bytes(buffer[start:start + max_size])
+			start += max_size
+		del buffer[:start]
+	if buffer:
+		yield bytes(buffer)
+
+
+# Function to build the manifest of a chunked file
+def build_manifest(chunks: list[tuple[str, int]]) -> bytes:
+	""" Builds the manifest of a chunked file, listing the hash and size of its chunks in order.
+
+	Args:
+		chunks (list[tuple[str, int]]): List of (chunk_hash, size)
+	Returns:
+		bytes: The manifest, one "hash size" line per chunk
+
+	Examples:
+		>>> build_manifest([("aa", 3), ("bb", 5)])
+		b'aa 3\\nbb 5\\n'
+		>>> parse_manifest(build_manifest([("aa", 3), ("bb", 5)]))
+		[('aa', 3), ('bb', 5)]
+	"""
+	return "".join(f"{chunk_hash} {size}\n" for chunk_hash, size in chunks).encode()
+
+# Function to parse the manifest of a chunked file
+def parse_manifest(manifest: bytes) -> list[tuple[str, int]]:
+	""" Parses the manifest of a chunked file (see :py:func:`build_manifest`).
+
+	Args:
+		manifest (bytes): The manifest
+	Returns:
+		list[tuple[str, int]]: List of (chunk_hash, size)
+	"""
+	chunks: list[tuple[str, int]] = []
+	for line in manifest.decode().splitlines():
+		chunk_hash, size = line.split(" ")
+		chunks.append((chunk_hash, int(size)))
+	return chunks
+
+# Function to check if a ZIP member is a chunk manifest
+def is_chunk_manifest(zip_info: zipfile.ZipInfo) -> bool:
+	""" Checks if a ZIP member is the manifest of a chunked file (its extra field holds the manifest marker).
+
+	Args:
+		zip_info (zipfile.ZipInfo): The ZipInfo object representing a file in the ZIP
+	Returns:
+		bool: True if the member is a chunk manifest
+
+	Examples:
+		>>> zip_info = zipfile.ZipInfo("file.bin")
+		>>> is_chunk_manifest(zip_info)
+		False
+		>>> zip_info.extra = MANIFEST_EXTRA
+		>>> is_chunk_manifest(zip_info)
+		True
+	"""
+	extra: bytes = zip_info.extra
+	while len(extra) >= 4:
+		header_id, data_size = struct.unpack("<HH", extra[:4])
+		if header_id == MANIFEST_EXTRA_ID:
+			return True
+		extra = extra[4 + data_size:]
+	return False
+
+
+# Function to split a file into chunks compressed ahead of time, along with its manifest
+def chunk_file(
+	source_path: str,
+	zip_info: zipfile.ZipInfo,
+	known_chunks: Container[str] = (),
+	chunk_size: int = DEFAULT_CHUNK_SIZE,
+	compresslevel: int | None = 9,
+	hasher: Any = None,
+	hash_algorithm: str = DEFAULT_HASH_ALGORITHM,
+) -> list[CompressedMember]:
+	""" Splits a file into content-defined chunks and compresses the ones that are not already stored.
+
+	The file is read once, and the compressed chunks and manifest share a single spooled temporary file.
+
+	Args:
+		source_path		(str):				Path to the file to split
+		zip_info		(zipfile.ZipInfo):	ZipInfo of the manifest member (the manifest marker is appended to its extra field),
+			whose compression type is also used for the chunks
+		known_chunks	(Container[str]):	Hashes of the chunks already stored, that are not compressed again
+		chunk_size		(int):				Average size of the chunks
+		compresslevel	(int | None):		Compression level (None for the default level of the compression type)
+		hasher			(Any):				Optional hashlib-like object updated with the file content (avoids reading it twice)
+		hash_algorithm	(str):				Hash algorithm naming the chunks (see :py:func:`~hash.new_file_hasher`)
+	Returns:
+		list[CompressedMember]: The new chunk members (named ``__chunks__/<hash>``) followed by the manifest member
+
+	Examples:
+		>>> import tempfile, random
+		>>> from stouputils.backup.members import write_raw_member
+		>>> with tempfile.TemporaryDirectory() as folder:
+		...     data = random.Random(0).randbytes(100_000)
+		...     with open(f"{folder}/file.bin", "wb") as f:
+		...         _ = f.write(data + data)
+		...     members = chunk_file(f"{folder}/file.bin", zipfile.ZipInfo("file.bin"), chunk_size=8192)
+		...     with zipfile.ZipFile(f"{folder}/archive.zip", "w") as zipf:
+		...         for member in members:
+		...             write_raw_member(zipf, member)
+		...     members[0].data.close()
+		...     with zipfile.ZipFile(f"{folder}/archive.zip") as zipf:
+		...         manifest = zipf.read("file.bin")
+		...         content = b"".join(iter_manifest_content(manifest, lambda h: zipf.read(CHUNKS_FOLDER + h)))
+		...     print(content == data + data, len(parse_manifest(manifest)) > len(members) - 1)
+		True True
+	"""
+	data: IO[bytes] = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+	members: list[CompressedMember] = []
+	manifest: list[tuple[str, int]] = []
+	new_chunks: set[str] = set()
+	try:
+		with open(source_path, "rb") as f:
+			for chunk in iter_content_chunks(f, chunk_size):
+				if hasher is not None:
+					hasher.update(chunk)
+				chunk_hasher: Any = new_file_hasher(hash_algorithm)
+				chunk_hasher.update(chunk)
+				chunk_hash: str = chunk_hasher.hexdigest()
+				manifest.append((chunk_hash, len(chunk)))
+
+				# Compress the chunk only once, and only if it is not in the chunk store yet
+				if chunk_hash in known_chunks or chunk_hash in new_chunks:
+					continue
+				new_chunks.add(chunk_hash)
+				chunk_info: zipfile.ZipInfo = zipfile.ZipInfo(CHUNKS_FOLDER + chunk_hash, zip_info.date_time)
+				chunk_info.compress_type = zip_info.compress_type
+				members.append(compress_bytes(chunk, chunk_info, compresslevel, data))
+
+		# The manifest replaces the content of the file
+		zip_info.extra += MANIFEST_EXTRA
+		members.append(compress_bytes(build_manifest(manifest), zip_info, compresslevel, data))
+	except BaseException:
+		data.close()
+		raise
+	return members
+
+# Function to rebuild the content of a chunked file
+def iter_manifest_content(manifest: bytes, read_chunk: Callable[[str], bytes]) -> Iterator[bytes]:
+	""" Rebuilds the content of a chunked file from its manifest, chunk by chunk.
+
+	Args:
+		manifest	(bytes):					The manifest of the file
+		read_chunk	(Callable[[str], bytes]):	Function returning the content of a chunk from its hash
+	Returns:
+		Iterator[bytes]: The chunks of the file, in order
+	"""
+	for chunk_hash, size in parse_manifest(manifest):
+		chunk: bytes = read_chunk(chunk_hash)
+		if len(chunk) != size:
+			raise ValueError(f"Chunk '{chunk_hash}' has {len(chunk)} bytes instead of {size}")
+		yield chunk
@@ -1,9 +1,12 @@
 
 # Imports
 from ..config import StouputilsConfig as Cfg
+from .chunking import DEFAULT_CHUNK_SIZE
 from .consolidate import consolidate_backups
 from .create import create_delta_backup
+from .hash import DEFAULT_HASH_ALGORITHM, HASH_PREFIXES
 from .limiter import limit_backups
+from .restore import restore_backup
 
 
 # Main entry point for command line usage
@@ -17,11 +20,17 @@ def backup_cli() -> None:
 		# Create a delta backup, excluding libraries and cache folders
 		python -m stouputils.backup delta /path/to/source /path/to/backups -x "libraries/*" "cache/*"
 
+		# Create a delta backup of big files that change slightly, storing each unique chunk once
+		python -m stouputils.backup delta /path/to/dumps /path/to/backups --chunked
+
 		# Consolidate backups into a single file
 		python -m stouputils.backup consolidate /path/to/backups/latest.zip /path/to/consolidated.zip
 
 		# Limit the number of delta backups to 5
 		python -m stouputils.backup limit 5 /path/to/backups
+
+		# Restore a folder as it was at a given backup
+		python -m stouputils.backup restore /path/to/backups/2025_02_18-10_00_00.zip /path/to/restored source/data
 	"""
 	import argparse
 	import sys
@@ -37,6 +46,7 @@ def backup_cli() -> None:
 		print(f"  {Cfg.GREEN}delta{Cfg.RESET}         Create a new delta backup")
 		print(f"  {Cfg.GREEN}consolidate{Cfg.RESET}   Consolidate existing backups into one")
 		print(f"  {Cfg.GREEN}limit{Cfg.RESET}         Limit the number of delta backups")
+		print(f"  {Cfg.GREEN}restore{Cfg.RESET}       Restore files as they were at a given backup")
 		print(f"\n{Cfg.CYAN}For detailed help on a specific command:{Cfg.RESET}")
 		print("  stouputils backup <command> --help")
 		print(f"{Cfg.CYAN}{separator}{Cfg.RESET}")
@@ -49,7 +59,8 @@ def backup_cli() -> None:
 		epilog=f"""{Cfg.CYAN}Examples:{Cfg.RESET}
   stouputils backup delta /path/to/source /path/to/backups -x "*.pyc"
   stouputils backup consolidate /path/to/backups/latest.zip /path/to/output.zip
-  stouputils backup limit 5 /path/to/backups"""
+  stouputils backup limit 5 /path/to/backups
+  stouputils backup restore /path/to/backups/latest.zip /path/to/restored source/file.txt"""
 	)
 	subparsers = parser.add_subparsers(dest="command", required=False)
 
@@ -57,27 +68,54 @@ def backup_cli() -> None:
 	delta_psr = subparsers.add_parser("delta", help="Create a new delta backup")
 	delta_psr.add_argument("source", type=str, help="Path to the source directory or file")
 	delta_psr.add_argument("destination", type=str, help="Path to the destination folder for backups")
-	delta_psr.add_argument("-x", "--exclude", type=str, nargs="+", help="Glob patterns to exclude from backup", default=[])
+	delta_psr.add_argument("-x", "--exclude", type=str, nargs="+", default=[], help=(
+		"Gitignore-style patterns to exclude, relative to the source (e.g. '*.log' 'node_modules' 'temp/*'), "
+		"a leading '<source>/' is stripped and a leading '*/' matches at any depth as before (use '/*/cache/*' for depth 1 only)"
+	))
+	delta_psr.add_argument("--paranoid", action="store_true", help="Hash every file, even if its size and modification time did not change")
+	delta_psr.add_argument("-w", "--workers", type=int, default=Cfg.CPU_COUNT, help="Number of threads hashing and compressing files")
+	delta_psr.add_argument("--chunked", action="store_true", help="Deduplicate big files by storing their content-defined chunks once")
+	delta_psr.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Average size of the chunks in bytes (default: 1 MiB)")
+	delta_psr.add_argument("-c", "--compression", type=str, default="deflate:9", help="Compression method and level (e.g. deflate:9, store, lzma, zstd:3)")
+	delta_psr.add_argument("--no-store-incompressible", dest="store_incompressible", action="store_false", help="Compress already compressed files too (media, archives...)")
+	delta_psr.add_argument("--hash", dest="hash_algorithm", choices=list(HASH_PREFIXES), default=DEFAULT_HASH_ALGORITHM, help="Algorithm hashing new contents (blake3, xxh3 need extra packages)")
 
 	# Create consolidate command and its arguments
 	consolidate_psr = subparsers.add_parser("consolidate", help="Consolidate existing backups into one")
 	consolidate_psr.add_argument("backup_zip", type=str, help="Path to the latest backup ZIP file")
 	consolidate_psr.add_argument("destination_zip", type=str, help="Path to the destination consolidated ZIP file")
+	consolidate_psr.add_argument("-c", "--compression", type=str, default=None, help="Recompress the files (e.g. deflate:9, store, lzma, zstd:3), default: keep their compression")
+	consolidate_psr.add_argument("--no-store-incompressible", dest="store_incompressible", action="store_false", help="When recompressing, compress already compressed files too")
 
 	# Create limit command and its arguments
 	limit_psr = subparsers.add_parser("limit", help="Limit the number of delta backups by consolidating the oldest ones")
 	limit_psr.add_argument("max_backups", type=int, help="Maximum number of delta backups to keep")
 	limit_psr.add_argument("backup_folder", type=str, help="Path to the folder containing backups")
 	limit_psr.add_argument("--no-keep-oldest", dest="keep_oldest", action="store_false", default=True, help="Allow deletion of the oldest backup (default: keep it)")
+	limit_psr.add_argument("--strategy", choices=["consolidate", "merge"], default="consolidate", help="Consolidate the oldest backups, or merge the oldest delta into the next one")
+
+	# Create restore command and its arguments
+	restore_psr = subparsers.add_parser("restore", help="Restore files as they were at a given backup")
+	restore_psr.add_argument("backup_zip", type=str, help="Path to the backup ZIP file to restore (or latest.zip)")
+	restore_psr.add_argument("destination", type=str, help="Folder where the files are restored")
+	restore_psr.add_argument("paths", type=str, nargs="*", help="Files or folders to restore, as paths inside the backups (default: everything)")
+	restore_psr.add_argument("-w", "--workers", type=int, default=Cfg.CPU_COUNT, help="Number of threads extracting files")
+	restore_psr.add_argument("--no-verify", dest="verify", action="store_false", help="Do not check the restored files against their stored hash")
 
 	# Parse arguments and execute appropriate command
 	args: argparse.Namespace = parser.parse_args()
 
 
 	if args.command == "delta":
-		create_delta_backup(args.source, args.destination, args.exclude)
+		create_delta_backup(
+			args.source, args.destination, args.exclude, paranoid=args.paranoid, max_workers=args.workers,
+			chunked=args.chunked, chunk_size=args.chunk_size, compression=args.compression, store_incompressible=args.store_incompressible,
+			hash_algorithm=args.hash_algorithm,
+		)
 	elif args.command == "consolidate":
-		consolidate_backups(args.backup_zip, args.destination_zip)
+		consolidate_backups(args.backup_zip, args.destination_zip, compression=args.compression, store_incompressible=args.store_incompressible)
 	elif args.command == "limit":
-		limit_backups(args.max_backups, args.backup_folder, keep_oldest=args.keep_oldest)
+		limit_backups(args.max_backups, args.backup_folder, keep_oldest=args.keep_oldest, strategy=args.strategy)
+	elif args.command == "restore":
+		restore_backup(args.backup_zip, args.destination, args.paths or None, max_workers=args.workers, verify=args.verify)
 
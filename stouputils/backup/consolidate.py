@@ -1,26 +1,142 @@
 
 # Imports
+import copy
 import os
 import shutil
 import zipfile
 
+from ..archive.compression import ENTROPY_SAMPLE_SIZE, is_incompressible, parse_compression
 from ..config import StouputilsConfig as Cfg
 from ..decorators import measure_time
 from ..io.path import clean_path
 from ..print.message import info, warning
 from ..print.progress_tqdm import progress_bar
-from .retrieve import get_all_previous_backups
+from .catalog import BackupCatalog, CatalogEntry
+from .chunking import CHUNKS_FOLDER, parse_manifest
+from .members import open_raw_member, write_raw_member
+
+
+# "Private" function to get the ZipInfo of a member recompressed with other options
+def recompressed_info(
+	inf: zipfile.ZipInfo, compress_options: tuple[int, int | None] | None, store_incompressible: bool, sample: bytes
+) -> zipfile.ZipInfo:
+	""" Get the ZipInfo to write a copied member with (the same one if compress_options is None) """
+	if compress_options is None:
+		return inf
+	compress_type, compresslevel = compress_options
+	out_info: zipfile.ZipInfo = copy.copy(inf)
+	out_info.compress_type = zipfile.ZIP_STORED if store_incompressible and is_incompressible(inf.filename, sample) else compress_type
+	out_info._compresslevel = compresslevel	# pyright: ignore[reportPrivateUsage, reportAttributeAccessIssue]
+	return out_info
+
+# "Private" function to copy a member from a backup to another
+def copy_member(
+	zipf_in: zipfile.ZipFile,
+	inf: zipfile.ZipInfo,
+	zipf_out: zipfile.ZipFile,
+	compress_options: tuple[int, int | None] | None,
+	store_incompressible: bool,
+) -> None:
+	""" Copy a member as is (compressed bytes, CRC and headers, so the copy is I/O-bound),
+	or decompress and recompress it if compress_options is given """
+	if compress_options is None and not inf.flag_bits & 0x01:
+		write_raw_member(zipf_out, open_raw_member(zipf_in, inf))
+		return
+	with zipf_in.open(inf, "r") as source:
+		sample: bytes = source.read(ENTROPY_SAMPLE_SIZE)
+		with zipf_out.open(recompressed_info(inf, compress_options, store_incompressible, sample), "w", force_zip64=True) as target:
+			target.write(sample)
+			# Use shutil.copyfileobj with larger chunks for files >50MB
+			shutil.copyfileobj(source, target, length=Cfg.LARGE_CHUNK_SIZE if inf.file_size > 52428800 else Cfg.CHUNK_SIZE)
+
+
+# "Private" function to write a backup from members of other backups
+def write_backup(
+	destination_zip: str,
+	files: dict[str, CatalogEntry],
+	deleted_files: set[str],
+	chunk_locations: dict[str, str],
+	newer_manifests: list[tuple[str, str]],
+	compress_options: tuple[int, int | None] | None,
+	store_incompressible: bool,
+	desc: str,
+) -> None:
+	""" Write a backup holding the given files (copied from the backups holding them) and deletions,
+	along with the chunks referred to by its manifests or by the given newer manifests that are found in chunk_locations """
+	needed_chunks: set[str] = set()
+
+	# Copy files efficiently, backup by backup, keeping ZIP files open longer
+	ordered_files: list[tuple[str, CatalogEntry]] = sorted(files.items(), key=lambda item: (item[1].backup, item[0]))
+	open_zips: dict[str, zipfile.ZipFile] = {}
+
+	try:
+		with zipfile.ZipFile(destination_zip, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=9) as zipf_out:
+			for filename, entry in progress_bar(ordered_files, desc=desc):
+				backup_path: str = entry.backup
+				try:
+					# Open ZIP file if not already open
+					if backup_path not in open_zips:
+						open_zips[backup_path] = zipfile.ZipFile(backup_path, "r")
+
+					zipf_in = open_zips[backup_path]
+					inf: zipfile.ZipInfo = zipf_in.getinfo(filename)
+
+					# Chunk manifests are small, and the chunks they refer to are needed
+					if entry.chunked:
+						needed_chunks.update(chunk_hash for chunk_hash, _ in parse_manifest(zipf_in.read(inf)))
+					copy_member(zipf_in, inf, zipf_out, compress_options, store_incompressible and not entry.chunked)
+				except Exception as e:
+					warning(f"Error copying file {filename} from {backup_path}: {e}")
+					continue
+
+			# Keep the chunks referred to by the copied manifests and by the manifests of newer backups
+			for backup_path, filename in newer_manifests:
+				try:
+					with zipfile.ZipFile(backup_path, "r") as zipf_newer:
+						needed_chunks.update(chunk_hash for chunk_hash, _ in parse_manifest(zipf_newer.read(filename)))
+				except Exception as e:
+					warning(f"Error reading chunk manifest {filename} from {backup_path}: {e}")
+			ordered_chunks: list[tuple[str, str]] = sorted(
+				(chunk_locations[chunk_hash], chunk_hash) for chunk_hash in needed_chunks if chunk_hash in chunk_locations
+			)
+			for backup_path, chunk_hash in progress_bar(ordered_chunks, desc="Copying chunks") if ordered_chunks else ():
+				try:
+					if backup_path not in open_zips:
+						open_zips[backup_path] = zipfile.ZipFile(backup_path, "r")
+					inf = open_zips[backup_path].getinfo(CHUNKS_FOLDER + chunk_hash)
+					copy_member(open_zips[backup_path], inf, zipf_out, compress_options, store_incompressible)
+				except Exception as e:
+					warning(f"Error copying chunk {chunk_hash} from {backup_path}: {e}")
+
+			if deleted_files:
+				zipf_out.writestr("__deleted_files__.txt", "\n".join(sorted(deleted_files)), compress_type=zipfile.ZIP_DEFLATED)
+	finally:
+		# Clean up open ZIP files
+		for zipf in open_zips.values():
+			try:
+				zipf.close()
+			except Exception:
+				pass
 
 
 # Function to consolidate multiple backups into one comprehensive backup
 @measure_time(message="Consolidating backups")
-def consolidate_backups(zip_path: str, destination_zip: str) -> None:
+def consolidate_backups(
+	zip_path: str, destination_zip: str, compression: str | None = None, store_incompressible: bool = True
+) -> None:
 	""" Consolidates the files from the given backup and all previous ones into a new ZIP file,
 	ensuring that the most recent version of each file is kept and deleted files are not restored.
 
+	The files are copied without being decompressed (unless a compression is given), so consolidating is I/O-bound.
+	Chunked files keep their manifest, and the chunks they refer to are copied as well,
+	along with the chunks still referred to by the newer backups (so the consolidated backups can be deleted).
+
 	Args:
 		zip_path (str): Path to the latest backup ZIP file (If endswith "/latest.zip" or "/", the latest backup will be used)
 		destination_zip (str): Path to the destination ZIP file where the consolidated backup will be saved
+		compression (str | None): Compression method and level to recompress the files with (e.g. "deflate:9", "store", "lzma" or "zstd:3"),
+			None to keep the compression of each file
+		store_incompressible (bool): If True and recompressing, store the files that are already compressed (media, archives...)
 	Examples:
 
 	.. code-block:: python
@@ -29,80 +145,71 @@ def consolidate_backups(zip_path: str, destination_zip: str) -> None:
 		[INFO HH:MM:SS] Consolidating backups
 		[INFO HH:MM:SS] Consolidated backup created: '/path/to/consolidated.zip'
 	"""
+	compress_options: tuple[int, int | None] | None = parse_compression(compression) if compression is not None else None
 	zip_path = clean_path(os.path.abspath(zip_path))
 	destination_zip = clean_path(os.path.abspath(destination_zip))
 	zip_folder: str = clean_path(os.path.dirname(zip_path))
 
-	# Get all previous backups up to the specified one
-	previous_backups: dict[str, dict[str, str]] = get_all_previous_backups(zip_folder, all_before=zip_path)
-	backup_paths: list[str] = list(previous_backups.keys())
-
-	# First pass: collect all deleted files and build file registry
-	deleted_files: set[str] = set()
-	file_registry: dict[str, tuple[str, zipfile.ZipInfo]] = {}  # filename -> (backup_path, zipinfo)
-
-	# Process backups from newest to oldest to prioritize latest versions
-	for backup_path in backup_paths:
-		try:
-			with zipfile.ZipFile(backup_path, "r") as zipf_in:
-
-				# Get namelist once for efficiency
-				namelist: list[str] = zipf_in.namelist()
-
-				# Process files - only add if not already in registry (newer versions take precedence)
-				for inf in zipf_in.infolist():
-					filename: str = inf.filename
-					if (filename
-						and filename != "__deleted_files__.txt"
-						and filename not in deleted_files
-						and filename not in file_registry):
-						file_registry[filename] = (backup_path, inf)
-
-				# Process deleted files after present files so files from this backup keep precedence
-				if "__deleted_files__.txt" in namelist:
-					backup_deleted_files: list[str] = zipf_in.read("__deleted_files__.txt").decode().splitlines()
-					deleted_files.update(backup_deleted_files)
-		except Exception as e:
-			warning(f"Error processing backup {backup_path}: {e}")
-			continue
-
-	# Second pass: copy files efficiently, keeping ZIP files open longer
-	open_zips: dict[str, zipfile.ZipFile] = {}
+	# Resolve the newest version of each file up to the specified backup, and the files deleted since
+	with BackupCatalog(zip_folder) as catalog:
+		file_registry, deleted_files = catalog.resolve(zip_path)	# filename -> newest state, and deleted filenames
+		chunk_locations: dict[str, str] = catalog.chunk_locations(zip_path)	# chunk hash -> backup holding it
+		newer_manifests: list[tuple[str, str]] = catalog.manifests_after(zip_path)
+
+	# Add only unresolved deleted files to the consolidated backup
+	write_backup(
+		destination_zip, file_registry, deleted_files - set(file_registry), chunk_locations, newer_manifests,
+		compress_options, store_incompressible, desc="Making consolidated backup",
+	)
+	info(f"Consolidated backup created: {destination_zip}")
 
-	try:
-		with zipfile.ZipFile(destination_zip, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=9) as zipf_out:
-			for filename, (backup_path, inf) in progress_bar(file_registry.items(), desc="Making consolidated backup"):
-				try:
-					# Open ZIP file if not already open
-					if backup_path not in open_zips:
-						open_zips[backup_path] = zipfile.ZipFile(backup_path, "r")
 
-					zipf_in = open_zips[backup_path]
+# Function to merge a backup into the next one
+@measure_time(message="Merging backups")
+def merge_backups(older_zip: str, newer_zip: str, destination_zip: str | None = None) -> None:
+	""" Merges a backup into the next one, so the older backup can be deleted while restoring the same files.
 
-					# Copy file with optimized strategy based on file size
-					with zipf_in.open(inf, "r") as source:
-						with zipf_out.open(inf, "w", force_zip64=True) as target:
-							# Use shutil.copyfileobj with larger chunks for files >50MB
-							if inf.file_size > 52428800:  # 50MB threshold
-								shutil.copyfileobj(source, target, length=Cfg.LARGE_CHUNK_SIZE)
-							else:
-								# Use shutil.copyfileobj with standard chunks for smaller files
-								shutil.copyfileobj(source, target, length=Cfg.CHUNK_SIZE)
-				except Exception as e:
-					warning(f"Error copying file {filename} from {backup_path}: {e}")
-					continue
+	Unlike :py:func:`consolidate_backups`, only the files of the two backups are read and written (not the whole chain):
+	the merged backup holds the files of the newer backup, the files of the older one that the newer one
+	neither replaced nor deleted, and the deletions of both (so the files of previous backups stay deleted).
+	The chunks stored in the two backups are kept if any merged or newer manifest refers to them.
 
-			# Add only unresolved deleted files to the consolidated backup
-			active_deleted_files: set[str] = deleted_files - set(file_registry)
-			if active_deleted_files:
-				zipf_out.writestr("__deleted_files__.txt", "\n".join(sorted(active_deleted_files)), compress_type=zipfile.ZIP_DEFLATED)
-	finally:
-		# Clean up open ZIP files
-		for zipf in open_zips.values():
-			try:
-				zipf.close()
-			except Exception:
-				pass
+	Args:
+		older_zip (str): Path to the older backup ZIP file
+		newer_zip (str): Path to the backup ZIP file right after it
+		destination_zip (str | None): Path to the merged backup, None to replace the newer backup and delete the older one
+	Examples:
 
-	info(f"Consolidated backup created: {destination_zip}")
+	.. code-block:: python
 
+		> merge_backups("/path/to/backups/2025_02_17-10_00_00.zip", "/path/to/backups/2025_02_18-10_00_00.zip")
+		[INFO HH:MM:SS] Merged '2025_02_17-10_00_00.zip' into '/path/to/backups/2025_02_18-10_00_00.zip'
+		[PROGRESS HH:MM:SS] Merging backups: 0.12345s
+	"""
+	older_zip = clean_path(os.path.abspath(older_zip))
+	newer_zip = clean_path(os.path.abspath(newer_zip))
+	zip_folder: str = clean_path(os.path.dirname(newer_zip))
+	with BackupCatalog(zip_folder) as catalog:
+		backups: list[str] = catalog.backups()
+		if older_zip not in backups or backups.index(older_zip) + 1 != backups.index(newer_zip):
+			raise ValueError(f"'{older_zip}' must be the backup right before '{newer_zip}'")
+		older_files, older_deleted = catalog.records(older_zip)
+		newer_files, newer_deleted = catalog.records(newer_zip)
+		chunk_locations: dict[str, str] = dict.fromkeys(catalog.backup_chunks(older_zip), older_zip)
+		chunk_locations.update(dict.fromkeys(catalog.backup_chunks(newer_zip), newer_zip))
+		newer_manifests: list[tuple[str, str]] = catalog.manifests_after(newer_zip)
+
+	# The newer backup wins, and its deletions hide the older files
+	files: dict[str, CatalogEntry] = {
+		path: entry for path, entry in older_files.items() if path not in newer_files and path not in newer_deleted
+	}
+	files.update(newer_files)
+	deleted: set[str] = newer_deleted | (older_deleted - newer_files.keys())
+
+	# Write the merged backup next to the newer one, then swap them (the chain stays valid at every step)
+	target: str = clean_path(os.path.abspath(destination_zip)) if destination_zip else newer_zip + ".merging"
+	write_backup(target, files, deleted, chunk_locations, newer_manifests, None, False, desc="Merging backups")
+	if destination_zip is None:
+		os.replace(target, newer_zip)
+		os.remove(older_zip)
+	info(f"Merged '{os.path.basename(older_zip)}' into '{destination_zip or newer_zip}'")
@@ -1,50 +1,206 @@
 
 # Imports
 import datetime
-import fnmatch
 import os
 import zipfile
+from collections.abc import Container, Iterator
+from typing import Any, NamedTuple
 
+from ..archive.compression import is_incompressible, parse_compression
 from ..config import StouputilsConfig as Cfg
 from ..decorators import handle_error, measure_time
+from ..io.ignore import walk_files, widen_leading_wildcard
 from ..io.path import clean_path
+from ..parallel.multi import imultithreading
 from ..print.message import info, warning
-from .hash import get_file_hash
-from .retrieve import get_all_previous_backups, is_file_in_any_previous_backup
+from .catalog import BackupCatalog, CatalogEntry
+from .chunking import CHUNKS_FOLDER, DEFAULT_CHUNK_SIZE, chunk_file
+from .hash import DEFAULT_HASH_ALGORITHM, build_stat_extra, get_file_hash, get_hash_algorithm, new_file_hasher
+from .members import CompressedMember, compress_file, write_raw_member
 
 
-# Helper to write a file into a ZipFile in chunks, storing its hash in the ZipInfo comment
-def add_file_to_zip(zipf: zipfile.ZipFile, source_path: str, arcname: str, file_hash: str) -> None:
-	zip_info: zipfile.ZipInfo = zipfile.ZipInfo(arcname)
+# "Private" result of the preparation of a source file by a worker thread
+class PreparedFile(NamedTuple):
+	""" Result of :py:func:`prepare_file` """
+	arcname: str
+	""" Path of the file inside the backup """
+	file_hash: str | None
+	""" Hash of the file content (None if the file could not be read) """
+	stat: os.stat_result | None
+	""" Stat of the file taken before reading it (None if the file could not be read) """
+	stat_unchanged: bool
+	""" Whether the size and modification time match the known ones """
+	members: list[CompressedMember]
+	""" Pre-compressed members if the file has to be backed up (new chunks then manifest for a chunked file), empty if it is unchanged """
+
+
+# "Private" function to convert the exclusion patterns of older versions (matched against "<source>/...") to relative ones
+def normalize_exclude_patterns(source_path: str, exclude_patterns: list[str] | None) -> list[str]:
+	""" Strips a leading source folder (its name or its full path) from the exclusion patterns, warning about it,
+	as the patterns are now relative to the source folder. A leading "*/" is rewritten into "**/" to keep matching at any depth
+	(see :py:func:`~stouputils.io.ignore.widen_leading_wildcard`).
+
+	>>> normalize_exclude_patterns("/data/src", ["*.log", "cache/"])
+	['*.log', 'cache/']
+	"""
+	base_name: str = clean_path(os.path.basename(source_path))
+	normalized: list[str] = []
+	for pattern in exclude_patterns or ():
+		negation: str = "!" if pattern.startswith("!") else ""
+		body: str = pattern[len(negation):].replace("\\", "/")
+		for prefix in (f"{source_path}/", f"{base_name}/"):
+			if body.startswith(prefix):
+				warning(f"Exclusion pattern '{pattern}' starts with the source folder, patterns are now relative to it: using '{negation}{body[len(prefix):]}'")
+				body = body[len(prefix):]
+				break
+		normalized.append(negation + body)
+	return widen_leading_wildcard(normalized)
+
+
+# "Private" function to walk the source files to back up
+def scan_source_files(source_path: str, exclude_patterns: list[str] | None) -> Iterator[tuple[str, str]]:
+	""" Yields (full_path, arcname) for each file to back up, in a deterministic order, without entering the excluded folders """
+	if not os.path.isdir(source_path):
+		yield source_path, clean_path(os.path.basename(source_path))
+		return
+	base_name: str = clean_path(os.path.basename(source_path))
+	for full_path, relative_path in walk_files(source_path, normalize_exclude_patterns(source_path, exclude_patterns)):
+		yield full_path, f"{base_name}/{relative_path}"
+
+
+# "Private" function run by the worker threads to hash and compress a source file
+def prepare_file(
+	full_path: str,
+	arcname: str,
+	previous_hash: str | None,
+	known: tuple[int, int, str] | None,
+	paranoid: bool,
+	chunk_size: int | None = None,
+	known_chunks: Container[str] = (),
+	compression: tuple[int, int | None] = (zipfile.ZIP_DEFLATED, 9),
+	store_incompressible: bool = False,
+	hash_algorithm: str = DEFAULT_HASH_ALGORITHM,
+) -> PreparedFile:
+	""" Hashes a file and compresses it if its content differs from the previous backup.
+
+	A file whose size and modification time did not change keeps its known hash (unless paranoid).
+	A file that is new or whose stat changed is hashed while being compressed (read once),
+	while a paranoid check of an unchanged stat hashes first and only compresses if the content differs.
+	The stat is taken before reading, so a file modified meanwhile is read again on the next backup.
+	If chunk_size is given, files bigger than it are split into chunks, and only the chunks not in known_chunks are compressed.
+	The file is compressed with the given (compress_type, compresslevel), or stored if store_incompressible and it is already compressed.
+	New contents are hashed with hash_algorithm, while a file whose previous hash uses another algorithm
+	is first hashed with that one, so switching algorithms does not back up unchanged files again.
+	"""
+	try:
+		stat: os.stat_result = os.stat(full_path)
+	except OSError as e:
+		warning(f"Error reading stat of file {full_path}: {e}")
+		return PreparedFile(arcname, None, None, False, [])
+	stat_unchanged: bool = known is not None and known[0] == stat.st_size and known[1] == stat.st_mtime_ns
+
+	# Get the hash without compressing when the file is probably unchanged
+	file_hash: str | None = None
+	if known is not None and stat_unchanged:
+		file_hash = known[2] if not paranoid else get_file_hash(full_path, get_hash_algorithm(known[2]))
+		if file_hash is None or file_hash == previous_hash:
+			return PreparedFile(arcname, file_hash, stat, stat_unchanged, [])
+		if get_hash_algorithm(file_hash) != hash_algorithm:
+			file_hash = None	# Changed content hashed with another algorithm, hash it again with the requested one
+	elif previous_hash is not None and get_hash_algorithm(previous_hash) != hash_algorithm:
+		# Touched file whose previous hash uses another algorithm, compare with it to keep the previous version if unchanged
+		if get_file_hash(full_path, get_hash_algorithm(previous_hash)) == previous_hash:
+			return PreparedFile(arcname, previous_hash, stat, stat_unchanged, [])
+
+	# Compress the file (hashing it at the same time if needed)
+	zip_info: zipfile.ZipInfo = zipfile.ZipInfo.from_file(full_path, arcname, strict_timestamps=False)
+	compress_type, compresslevel = compression
+	zip_info.compress_type = zipfile.ZIP_STORED if store_incompressible and is_incompressible(full_path) else compress_type
+	zip_info.extra = build_stat_extra(stat.st_size, stat.st_mtime_ns)
+	hasher: Any = new_file_hasher(hash_algorithm) if file_hash is None else None
+	try:
+		if chunk_size is not None and stat.st_size > chunk_size:
+			members: list[CompressedMember] = chunk_file(full_path, zip_info, known_chunks, chunk_size, compresslevel, hasher, hash_algorithm)
+		else:
+			members = [compress_file(full_path, zip_info, compresslevel, hasher=hasher)]
+	except Exception as e:
+		warning(f"Error reading file {full_path} for backup: {e}")
+		return PreparedFile(arcname, None, None, False, [])
+	if hasher is not None:
+		file_hash = str(hasher.hexdigest())
+		if file_hash == previous_hash:	# Touched but unchanged file
+			members[0].data.close()
+			return PreparedFile(arcname, file_hash, stat, stat_unchanged, [])
+	zip_info.comment = str(file_hash).encode()
+	return PreparedFile(arcname, file_hash, stat, stat_unchanged, members)
+
+
+# Helper to write a file into a ZipFile (compressed with compress_file then appended by write_raw_member), storing its hash in the ZipInfo comment (and its stat in the extra field)
+def add_file_to_zip(zipf: zipfile.ZipFile, source_path: str, arcname: str, file_hash: str, stat: os.stat_result | None = None) -> None:
+	zip_info: zipfile.ZipInfo = zipfile.ZipInfo.from_file(source_path, arcname, strict_timestamps=False)
 	zip_info.compress_type = zipfile.ZIP_DEFLATED
 	zip_info.comment = file_hash.encode()
-	with open(source_path, "rb") as f:
-		with zipf.open(zip_info, "w", force_zip64=True) as zf:
-			while True:
-				chunk = f.read(Cfg.CHUNK_SIZE)
-				if not chunk:
-					break
-				zf.write(chunk)
+	if stat is None:
+		stat = os.stat(source_path)
+	zip_info.extra = build_stat_extra(stat.st_size, stat.st_mtime_ns)
+	member: CompressedMember = compress_file(source_path, zip_info)
+	try:
+		write_raw_member(zipf, member)
+	finally:
+		member.data.close()
 
 
 # Main backup function that creates a delta backup (only changed files)
 @measure_time(message="Creating ZIP backup")
 @handle_error
-def create_delta_backup(source_path: str, destination_folder: str, exclude_patterns: list[str] | None = None) -> None:
+def create_delta_backup(
+	source_path: str,
+	destination_folder: str,
+	exclude_patterns: list[str] | None = None,
+	paranoid: bool = False,
+	max_workers: int = Cfg.CPU_COUNT,
+	chunked: bool = False,
+	chunk_size: int = DEFAULT_CHUNK_SIZE,
+	compression: str = "deflate:9",
+	store_incompressible: bool = True,
+	hash_algorithm: str = DEFAULT_HASH_ALGORITHM,
+) -> None:
 	""" Creates a ZIP delta backup, saving only modified or new files while tracking deleted files.
 
+	Files whose size and modification time did not change since the last backup are not hashed again,
+	unless paranoid is True (e.g. to catch changes made while preserving the modification time).
+	Files are hashed and compressed by several threads, and written to the backup in a deterministic order.
+
+	In chunked mode, files bigger than chunk_size are split into content-defined chunks (see :py:func:`~chunking.chunk_file`):
+	each unique chunk is stored once across all the backups, and the file is stored as the list of its chunks,
+	so a big file that changed slightly (e.g. a database dump or a VM image) only costs its modified chunks.
+
 	Args:
 		source_path (str): Path to the source file or directory to back up
 		destination_folder (str): Path to the folder where the backup will be saved
-		exclude_patterns (list[str] | None): List of glob patterns to exclude from backup
+		exclude_patterns (list[str] | None): Gitignore-style patterns of the files and folders to exclude, relative to the source folder
+			(e.g. "*.log", "node_modules", "temp/*", see :py:class:`~stouputils.io.ignore.IgnoreMatcher`).
+			A leading source folder ("<source>/temp/*") is stripped and a leading "*/" is read as "**/" (any depth, as before) with a warning
+		paranoid (bool): If True, hash every file even if its size and modification time did not change
+		max_workers (int): Number of threads hashing and compressing files (1 to process them one by one)
+		chunked (bool): If True, deduplicate big files by storing their content-defined chunks once
+		chunk_size (int): Average size of the chunks in bytes, smaller files are stored whole (only used if chunked)
+		compression (str): Compression method and level, e.g. "deflate:9", "deflate:1", "store", "bzip2", "lzma" or "zstd:3"
+			(see :py:func:`~stouputils.archive.compression.parse_compression`)
+		store_incompressible (bool): If True, store the files that are already compressed (media, archives...) instead of compressing them
+		hash_algorithm (str): Algorithm hashing the new contents, "sha256", "blake2b", "blake3" or "xxh3" (the last two are much faster,
+			but need the ``blake3`` or ``xxhash`` package). It is recorded with each hash, so backups using different algorithms can be mixed
+			(unchanged files are kept, but in chunked mode the chunks of a modified big file are all stored again, as their names are their hashes)
 	Examples:
 
 	.. code-block:: python
 
-		> create_delta_backup("/path/to/source", "/path/to/backups", exclude_patterns=["libraries/*", "cache/*"])
+		> create_delta_backup("/path/to/source", "/path/to/backups", exclude_patterns=["libraries/*", "cache/", "*.pyc"])
 		[INFO HH:MM:SS] Creating ZIP backup
 		[INFO HH:MM:SS] Backup created: '/path/to/backups/backup_2025_02_18-10_00_00.zip'
 	"""
+	compress_options: tuple[int, int | None] = parse_compression(compression)
+	new_file_hasher(hash_algorithm)	# Fail early if the algorithm is unknown or unavailable
 	source_path = clean_path(os.path.abspath(source_path))
 	destination_folder = clean_path(os.path.abspath(destination_folder))
 
@@ -53,9 +209,13 @@ def create_delta_backup(source_path: str, destination_folder: str, exclude_patte
 	backup_folder: str = clean_path(os.path.join(destination_folder, base_name))
 	os.makedirs(backup_folder, exist_ok=True)
 
-	# Get previous backups and track all files
-	previous_backups: dict[str, dict[str, str]] = get_all_previous_backups(backup_folder)
-	previous_files: set[str] = {file for backup in previous_backups.values() for file in backup}  # Collect all tracked files
+	# Get the newest state of all tracked files from the backup catalog
+	catalog: BackupCatalog = BackupCatalog(backup_folder)
+	with catalog:
+		previous_files: dict[str, CatalogEntry] = catalog.latest()
+		stat_cache: dict[str, tuple[int, int, str]] = catalog.stat_cache()
+		known_chunks: set[str] = catalog.chunk_hashes() if chunked else set()	# Also updated with the chunks written by this backup
+	new_stats: list[tuple[str, int, int, str]] = []	# Stats of touched but unchanged files, to avoid hashing them next time
 
 	# Create new backup filename with timestamp
 	timestamp: str = datetime.datetime.now().strftime("%Y_%m_%d-%H_%M_%S")
@@ -67,54 +227,53 @@ def create_delta_backup(source_path: str, destination_folder: str, exclude_patte
 		deleted_files: set[str] = set()
 		has_changes: bool = False
 
-		# Process files one by one to avoid memory issues
-		if os.path.isdir(source_path):
-			for root, _, files in os.walk(source_path):
-				for file in files:
-					full_path: str = clean_path(os.path.join(root, file))
-					arcname: str = clean_path(os.path.relpath(full_path, start=os.path.dirname(source_path)))
-
-					# Skip file if it matches any exclude pattern
-					if exclude_patterns and any(fnmatch.fnmatch(arcname, pattern) for pattern in exclude_patterns):
-						continue
-
-					file_hash: str | None = get_file_hash(full_path)
-					if file_hash is None:
-						continue
-
-					# Check if file needs to be backed up
-					if not is_file_in_any_previous_backup(arcname, file_hash, previous_backups):
-						try:
-							# Read and write file in chunks with larger buffer
-							add_file_to_zip(zipf, full_path, arcname, file_hash)
-							has_changes = True
-						except Exception as e:
-							warning(f"Error writing file {full_path} to backup: {e}")
-
-					# Track current files for deletion detection
-					if arcname in previous_files:
-						previous_files.remove(arcname)
-		else:
-			arcname: str = clean_path(os.path.basename(source_path))
-			file_hash: str | None = get_file_hash(source_path)
+		# Pipeline: the files are scanned lazily, hashed and compressed by worker threads (hashlib and zlib release the GIL),
+		# and the members are appended here in the scan order, so the backup is deterministic and the memory bounded
+		tasks: Iterator[tuple[str, str, str | None, tuple[int, int, str] | None, bool, int | None, set[str], tuple[int, int | None], bool, str]] = (
+			(
+				full_path, arcname, previous.hash if (previous := previous_files.get(arcname)) else None, stat_cache.get(arcname),
+				paranoid, chunk_size if chunked else None, known_chunks, compress_options, store_incompressible, hash_algorithm,
+			)
+			for full_path, arcname in scan_source_files(source_path, exclude_patterns)
+		)
+		for prepared in imultithreading(
+			prepare_file, tasks, use_starmap=True, max_workers=max_workers, desc="Backing up files", smooth_tqdm=False
+		):
+			if prepared.file_hash is None or prepared.stat is None:
+				continue
 
-			if file_hash is not None and not is_file_in_any_previous_backup(arcname, file_hash, previous_backups):
+			# Track current files for deletion detection
+			previous_files.pop(prepared.arcname, None)
+			if prepared.members:
 				try:
-					add_file_to_zip(zipf, source_path, arcname, file_hash)
+					for member in prepared.members:
+						# A chunk may have been compressed by several threads at once
+						if member.zip_info.filename.startswith(CHUNKS_FOLDER):
+							if member.zip_info.filename in zipf.NameToInfo:
+								continue
+							known_chunks.add(member.zip_info.filename[len(CHUNKS_FOLDER):])
+						write_raw_member(zipf, member)
 					has_changes = True
 				except Exception as e:
-					warning(f"Error writing file {source_path} to backup: {e}")
+					warning(f"Error writing file {prepared.arcname} to backup: {e}")
+				finally:
+					prepared.members[0].data.close()
+			elif not prepared.stat_unchanged:
+				new_stats.append((prepared.arcname, prepared.stat.st_size, prepared.stat.st_mtime_ns, prepared.file_hash))
 
 		# Any remaining files in previous_files were deleted
-		deleted_files = previous_files
+		deleted_files = set(previous_files)
 		if deleted_files:
 			zipf.writestr("__deleted_files__.txt", "\n".join(deleted_files), compress_type=zipfile.ZIP_DEFLATED)
 			has_changes = True
 
-	# Remove empty backup if no changes
+	# Remove empty backup if no changes, otherwise index the new backup in the catalog right away
 	if not has_changes:
 		os.remove(destination_zip)
 		info(f"No files to backup, skipping creation of backup '{destination_zip}'")
 	else:
+		catalog.sync()
 		info(f"Backup created: '{destination_zip}'")
+	catalog.update_stat_cache(new_stats)
+	catalog.close()
 
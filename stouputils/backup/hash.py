@@ -1,31 +1,131 @@
 
 # Imports
 import hashlib
+import struct
 import zipfile
+from typing import Any
 
 from ..config import StouputilsConfig as Cfg
 from ..print.message import warning
 
+# Constants
+STAT_EXTRA_ID: int = 0x5453
+""" Header ID of the ZIP extra field storing the size and modification time of the source file (b"ST") """
+STAT_EXTRA_STRUCT: struct.Struct = struct.Struct("<HHQq")
+""" Layout of the stat extra field: header ID, data size, file size and modification time in nanoseconds """
+HASH_PREFIXES: dict[str, str] = {
+	"sha256": "",
+	"blake2b": "b2:",
+	"blake3": "b3:",
+	"xxh3": "xxh3:",
+}
+""" Prefix of the stored hashes of each algorithm (SHA-256 hashes have none, as in the backups made before the choice existed) """
+HASH_HEX_LENGTHS: dict[str, int] = {"sha256": 64, "blake2b": 64, "blake3": 64, "xxh3": 32}
+""" Number of hexadecimal characters of the hashes of each algorithm (without the prefix) """
+DEFAULT_HASH_ALGORITHM: str = "sha256"
+""" Hash algorithm used when none is given """
 
-# Function to compute the SHA-256 hash of a file
-def get_file_hash(file_path: str) -> str | None:
-	""" Computes the SHA-256 hash of a file.
+
+# Class wrapping a hash object so its hexdigest() is prefixed with the algorithm
+class PrefixedHasher:
+	""" Hash object whose hexdigest() starts with the prefix of its algorithm (see :py:data:`HASH_PREFIXES`) """
+	def __init__(self, hasher: Any, prefix: str) -> None:
+		self.hasher: Any = hasher
+		""" The underlying hash object (hashlib, blake3 or xxhash) """
+		self.prefix: str = prefix
+		""" Prefix of the hexdigest """
+
+	def update(self, data: bytes) -> None:
+		self.hasher.update(data)
+
+	def hexdigest(self) -> str:
+		return self.prefix + self.hasher.hexdigest()
+
+
+# Function to get the algorithm of a stored hash
+def get_hash_algorithm(file_hash: str) -> str:
+	""" Gets the algorithm of a stored hash from its prefix (SHA-256 if it has none).
+
+	Args:
+		file_hash (str): Stored hash, e.g. "b3:af1349b9..." or a SHA-256 hash without prefix
+	Returns:
+		str: Name of the algorithm, a key of :py:data:`HASH_PREFIXES`
+
+	Examples:
+		>>> get_hash_algorithm("b3:" + "0" * 64), get_hash_algorithm("0" * 64)
+		('blake3', 'sha256')
+	"""
+	for algorithm, prefix in HASH_PREFIXES.items():
+		if prefix and file_hash.startswith(prefix):
+			return algorithm
+	return "sha256"
+
+# Function to create the hash object used to identify file contents
+def new_file_hasher(algorithm: str = DEFAULT_HASH_ALGORITHM) -> Any:
+	""" Creates the hash object used to identify file contents,
+	to hash data while it is being read for another purpose (e.g. compression).
+
+	SHA-256 and BLAKE2b are always available, BLAKE3 needs the ``blake3`` package and xxh3 (XXH3-128, not cryptographic,
+	but much faster and enough to detect changes) needs the ``xxhash`` package.
+
+	Args:
+		algorithm (str): "sha256", "blake2b", "blake3" or "xxh3"
+	Returns:
+		Any: A new hash object, whose hexdigest() is prefixed with the algorithm (see :py:data:`HASH_PREFIXES`)
+			and comparable to :py:func:`get_file_hash`
+
+	Examples:
+		>>> hasher = new_file_hasher()
+		>>> hasher.update(b"abc")
+		>>> hasher.hexdigest()[:16]
+		'ba7816bf8f01cfea'
+		>>> hasher = new_file_hasher("blake2b")
+		>>> hasher.update(b"abc")
+		>>> hasher.hexdigest()[:19]
+		'b2:bddd813c63423972'
+		>>> new_file_hasher("md5")
+		Traceback (most recent call last):
+			...
+		ValueError: Unknown hash algorithm 'md5', expected one of: sha256, blake2b, blake3, xxh3
+	"""
+	if algorithm == "sha256":
+		return PrefixedHasher(hashlib.sha256(), "")
+	elif algorithm == "blake2b":
+		return PrefixedHasher(hashlib.blake2b(digest_size=32), HASH_PREFIXES[algorithm])
+	elif algorithm == "blake3":
+		try:
+			import blake3
+		except (ImportError, ModuleNotFoundError) as e:
+			raise ImportError("`blake3` package is not installed; Please install it to use the 'blake3' hash algorithm.") from e
+		return PrefixedHasher(blake3.blake3(max_threads=1), HASH_PREFIXES[algorithm])
+	elif algorithm == "xxh3":
+		try:
+			import xxhash
+		except (ImportError, ModuleNotFoundError) as e:
+			raise ImportError("`xxhash` package is not installed; Please install it to use the 'xxh3' hash algorithm.") from e
+		return PrefixedHasher(xxhash.xxh3_128(), HASH_PREFIXES[algorithm])
+	raise ValueError(f"Unknown hash algorithm '{algorithm}', expected one of: {', '.join(HASH_PREFIXES)}")
+
+# Function to compute the hash of a file
+def get_file_hash(file_path: str, algorithm: str = DEFAULT_HASH_ALGORITHM) -> str | None:
+	""" Computes the hash of a file (SHA-256 by default).
 
 	Args:
 		file_path (str): Path to the file
+		algorithm (str): Hash algorithm (see :py:func:`new_file_hasher`)
 	Returns:
-		str | None: SHA-256 hash as a hexadecimal string or None if an error occurs
+		str | None: Hash as a hexadecimal string (prefixed with the algorithm if not SHA-256) or None if an error occurs
 	"""
 	try:
-		sha256_hash = hashlib.sha256()
+		file_hasher = new_file_hasher(algorithm)
 		with open(file_path, "rb") as f:
 			# Use larger chunks for better I/O performance
 			while True:
 				chunk = f.read(Cfg.CHUNK_SIZE)
 				if not chunk:
 					break
-				sha256_hash.update(chunk)
-		return sha256_hash.hexdigest()
+				file_hasher.update(chunk)
+		return file_hasher.hexdigest()
 	except Exception as e:
 		warning(f"Error computing hash for file {file_path}: {e}")
 		return None
@@ -37,9 +137,67 @@ def extract_hash_from_zipinfo(zip_info: zipfile.ZipInfo) -> str | None:
 	Args:
 		zip_info (zipfile.ZipInfo): The ZipInfo object representing a file in the ZIP
 	Returns:
-		str | None: The stored hash if available, otherwise None
+		str | None: The stored hash if available (with the prefix of its algorithm), otherwise None
+
+	Examples:
+		>>> zip_info = zipfile.ZipInfo("file.txt")
+		>>> zip_info.comment = b"xxh3:" + b"0" * 32
+		>>> extract_hash_from_zipinfo(zip_info)
+		'xxh3:00000000000000000000000000000000'
+		>>> zip_info.comment = b"b3:1234"
+		>>> extract_hash_from_zipinfo(zip_info) is None
+		True
 	"""
 	comment: bytes | None = zip_info.comment
-	comment_str: str | None = comment.decode() if comment else None
-	return comment_str if comment_str and len(comment_str) == 64 else None  # Ensure it's a valid SHA-256 hash
+	comment_str: str | None = comment.decode(errors="replace") if comment else None
+	if not comment_str:
+		return None
+	algorithm: str = get_hash_algorithm(comment_str)
+	hex_digest: str = comment_str[len(HASH_PREFIXES[algorithm]):]
+	if len(hex_digest) != HASH_HEX_LENGTHS[algorithm] or not all(char in "0123456789abcdef" for char in hex_digest):
+		return None  # Not a valid hash
+	return comment_str
+
+
+# Function to build the ZIP extra field storing the stat of the source file
+def build_stat_extra(size: int, mtime_ns: int) -> bytes:
+	""" Builds the ZIP extra field storing the size and modification time of a source file,
+	used to skip re-hashing unchanged files on the next backup.
+
+	Args:
+		size (int): Size of the file in bytes
+		mtime_ns (int): Modification time of the file in nanoseconds
+	Returns:
+		bytes: The extra field, to append to a ZipInfo's extra
 
+	Examples:
+		>>> build_stat_extra(5, 1_700_000_000_123_456_789).hex()
+		'53541000050000000000000015cd853dfe9c9717'
+	"""
+	return STAT_EXTRA_STRUCT.pack(STAT_EXTRA_ID, STAT_EXTRA_STRUCT.size - 4, size, mtime_ns)
+
+# Function to extract the stat of the source file from a ZipInfo object's extra field
+def extract_stat_from_zipinfo(zip_info: zipfile.ZipInfo) -> tuple[int, int] | None:
+	""" Extracts the size and modification time of the source file from a ZipInfo object's extra field.
+
+	Args:
+		zip_info (zipfile.ZipInfo): The ZipInfo object representing a file in the ZIP
+	Returns:
+		tuple[int, int] | None: (size, mtime_ns) if stored, otherwise None (e.g. backups made before it was recorded)
+
+	Examples:
+		>>> zip_info = zipfile.ZipInfo("file.txt")
+		>>> zip_info.extra = build_stat_extra(5, 1_700_000_000_123_456_789)
+		>>> extract_stat_from_zipinfo(zip_info)
+		(5, 1700000000123456789)
+		>>> extract_stat_from_zipinfo(zipfile.ZipInfo("other.txt")) is None
+		True
+	"""
+	extra: bytes = zip_info.extra
+	while len(extra) >= 4:
+		header_id, data_size = struct.unpack("<HH", extra[:4])
+		if header_id == STAT_EXTRA_ID and data_size == STAT_EXTRA_STRUCT.size - 4:
+			_, _, size, mtime_ns = STAT_EXTRA_STRUCT.unpack(extra[:STAT_EXTRA_STRUCT.size])
+			return size, mtime_ns
+		extra = extra[4 + data_size:]
+	return None
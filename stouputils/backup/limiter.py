@@ -1,26 +1,35 @@
 
 # Imports
 import os
+from typing import Literal
 
 from ..decorators import handle_error, measure_time
 from ..io.path import clean_path
 from ..print.message import info, warning
-from .consolidate import consolidate_backups
+from .consolidate import consolidate_backups, merge_backups
 
 
 # Function to limit the number of delta backups by consolidating the oldest ones
 @measure_time(message="Limiting backups")
 @handle_error
-def limit_backups(max_backups: int, backup_folder: str, keep_oldest: bool = True) -> None:
+def limit_backups(
+	max_backups: int, backup_folder: str, keep_oldest: bool = True, strategy: Literal["consolidate", "merge"] = "consolidate"
+) -> None:
 	""" Limits the number of delta backups by consolidating the oldest ones.
 
 	If the number of backups exceeds max_backups, the oldest backups are consolidated
 	into a single backup file, then deleted, until the count is within the limit.
 
+	With the "merge" strategy, the oldest delta is folded into the next one instead (see :py:func:`~consolidate.merge_backups`)
+	until the count is within the limit: only these two deltas are rewritten, not the whole chain,
+	so each run writes a bounded amount of data (when keeping the oldest backup, the full one is never rewritten).
+
 	Args:
 		max_backups (int): Maximum number of delta backups to keep
 		backup_folder (str): Path to the folder containing backups
 		keep_oldest (bool): If True, never delete the oldest backup (default: True)
+		strategy (Literal["consolidate", "merge"]): Consolidate the oldest backups into a new one,
+			or merge the oldest delta into the next one
 	Examples:
 
 	.. code-block:: python
@@ -29,10 +38,16 @@ def limit_backups(max_backups: int, backup_folder: str, keep_oldest: bool = True
 		[INFO HH:MM:SS] Limiting backups
 		[INFO HH:MM:SS] Consolidated 3 oldest backups into '/path/to/backups/consolidated_YYYY_MM_DD-HH_MM_SS.zip'
 		[INFO HH:MM:SS] Deleted 3 old backups
+
+		> limit_backups(5, "/path/to/backups", strategy="merge")
+		[INFO HH:MM:SS] Limiting backups
+		[INFO HH:MM:SS] Merged '2025_02_14-10_00_00.zip' into '/path/to/backups/2025_02_15-10_00_00.zip'
 	"""
 	backup_folder = clean_path(os.path.abspath(backup_folder))
 	if max_backups < 1:
 		raise ValueError("max_backups must be at least 1")
+	if strategy not in ("consolidate", "merge"):
+		raise ValueError(f"Unknown strategy '{strategy}', expected 'consolidate' or 'merge'")
 
 	# Get all backup files sorted by date (oldest first), including consolidated ones
 	# Sort by timestamp (removing "consolidated_" prefix for proper chronological ordering)
@@ -53,6 +68,15 @@ def limit_backups(max_backups: int, backup_folder: str, keep_oldest: bool = True
 		info(f"Current backup count ({backup_count}) is within limit ({max_backups}). No action needed.")
 		return
 
+	# Fold the oldest delta into the next one until the count is within the limit
+	if strategy == "merge":
+		first: int = 1 if keep_oldest else 0
+		while len(backup_files) > max(max_backups, first + 1):
+			merge_backups(backup_files[first], backup_files[first + 1])
+			backup_files.pop(first)
+		info(f"Successfully limited backups to {len(backup_files)} by merging the oldest deltas")
+		return
+
 	# Calculate how many backups to consolidate
 	num_to_consolidate: int = backup_count - max_backups + 1
 
@@ -0,0 +1,229 @@
+
+# Imports
+import copy
+import struct
+import tempfile
+import zipfile
+import zlib
+from typing import IO, Any, NamedTuple
+
+from ..config import StouputilsConfig as Cfg
+
+# Constants
+SPOOL_SIZE: int = 4 * 1024 * 1024
+""" Compressed members bigger than this are spooled to a temporary file instead of being kept in memory """
+LOCAL_HEADER_STRUCT: struct.Struct = struct.Struct("<4s2B4HL2L2H")
+""" Layout of the local header of a ZIP member, ending with the lengths of its name and extra field """
+LOCAL_HEADER_SIGNATURE: bytes = b"PK\003\004"
+""" Signature starting the local header of a ZIP member """
+ZIP64_EXTRA_ID: int = 0x0001
+""" Header ID of the ZIP64 extra field, holding the sizes and offset that do not fit in the headers """
+
+
+# Class representing a ZIP member compressed ahead of time
+class CompressedMember(NamedTuple):
+	""" ZIP member compressed ahead of time (e.g. by a worker thread), ready to be appended with :py:func:`write_raw_member` """
+	zip_info: zipfile.ZipInfo
+	""" ZipInfo of the member, with its CRC, sizes and compression type set """
+	data: IO[bytes]
+	""" File holding the compressed data (close it once written, it may be shared by several members) """
+	offset: int = 0
+	""" Position of the compressed data in :py:attr:`data` """
+
+
+# "Private" function to create the compressor of a compression type
+def get_compressor(compress_type: int, compresslevel: int | None) -> Any:
+	""" Get the raw compressor used by ZipFile for a compression type (None for ZIP_STORED) """
+	if compress_type != zipfile.ZIP_STORED:
+		zipfile._check_compression(compress_type)	# pyright: ignore[reportPrivateUsage, reportAttributeAccessIssue, reportUnknownMemberType]
+	return zipfile._get_compressor(compress_type, compresslevel)	# pyright: ignore[reportPrivateUsage, reportAttributeAccessIssue, reportUnknownMemberType, reportUnknownVariableType]
+
+
+# Function to compress a file into a member that can be appended to a ZipFile later
+def compress_file(source_path: str, zip_info: zipfile.ZipInfo, compresslevel: int | None = 9, hasher: Any = None) -> CompressedMember:
+	""" Compresses a file into a raw ZIP member, without needing the ZipFile (so it can run in parallel).
+
+	The compressors (zlib, bz2, lzma) release the GIL, so several files can be compressed at once by threads.
+	The compressed data is kept in memory up to :py:data:`SPOOL_SIZE`, then spooled to a temporary file.
+
+	Args:
+		source_path		(str):				Path to the file to compress
+		zip_info		(zipfile.ZipInfo):	ZipInfo of the member, with the compression type to use
+		compresslevel	(int | None):		Compression level (None for the default level of the compression type)
+		hasher			(Any):				Optional hashlib-like object updated with the file content (avoids reading it twice)
+	Returns:
+		CompressedMember: The member, whose zip_info CRC and sizes are set
+
+	Examples:
+		>>> import tempfile, os
+		>>> with tempfile.TemporaryDirectory() as folder:
+		...     with open(f"{folder}/file.txt", "w") as f:
+		...         _ = f.write("hello " * 1000)
+		...     zip_info = zipfile.ZipInfo("file.txt")
+		...     zip_info.compress_type = zipfile.ZIP_DEFLATED
+		...     member = compress_file(f"{folder}/file.txt", zip_info)
+		...     with zipfile.ZipFile(f"{folder}/archive.zip", "w") as zipf:
+		...         write_raw_member(zipf, member)
+		...     with zipfile.ZipFile(f"{folder}/archive.zip") as zipf:
+		...         print(member.zip_info.file_size, member.zip_info.compress_size < 100, zipf.read("file.txt") == b"hello " * 1000)
+		6000 True True
+	"""
+	compressor: Any = get_compressor(zip_info.compress_type, compresslevel)
+	data: IO[bytes] = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+	crc: int = 0
+	file_size: int = 0
+	try:
+		with open(source_path, "rb") as f:
+			while True:
+				chunk: bytes = f.read(Cfg.CHUNK_SIZE)
+				if not chunk:
+					break
+				if hasher is not None:
+					hasher.update(chunk)
+				crc = zlib.crc32(chunk, crc)
+				file_size += len(chunk)
+				data.write(compressor.compress(chunk) if compressor is not None else chunk)
+		if compressor is not None:
+			data.write(compressor.flush())
+	except BaseException:
+		data.close()
+		raise
+
+	# Fill the ZipInfo
+	zip_info.CRC = crc
+	zip_info.file_size = file_size
+	zip_info.compress_size = data.tell()
+	return CompressedMember(zip_info, data)
+
+
+# Function to compress bytes into a member, possibly sharing its data file with other members
+def compress_bytes(content: bytes, zip_info: zipfile.ZipInfo, compresslevel: int | None = 9, data: IO[bytes] | None = None) -> CompressedMember:
+	""" Compresses bytes into a raw ZIP member, appending the compressed data at the end of ``data``.
+
+	Sharing one data file between many small members (e.g. the chunks of a big file)
+	avoids creating a temporary file for each of them.
+
+	Args:
+		content			(bytes):			Uncompressed content of the member
+		zip_info		(zipfile.ZipInfo):	ZipInfo of the member, with the compression type to use
+		compresslevel	(int | None):		Compression level (None for the default level of the compression type)
+		data			(IO[bytes] | None):	File to append the compressed data to, a new spooled temporary file if None
+	Returns:
+		CompressedMember: The member, whose zip_info CRC and sizes are set
+
+	Examples:
+		>>> import io
+		>>> shared = io.BytesIO()
+		>>> first = compress_bytes(b"a" * 1000, zipfile.ZipInfo("a.txt"), data=shared)
+		>>> second = compress_bytes(b"b" * 1000, zipfile.ZipInfo("b.txt"), data=shared)
+		>>> second.offset == first.zip_info.compress_size, second.data is shared
+		(True, True)
+		>>> with zipfile.ZipFile(io.BytesIO(), "w") as zipf:
+		...     write_raw_member(zipf, second)
+		...     write_raw_member(zipf, first)
+		...     print(zipf.read("a.txt") == b"a" * 1000, zipf.read("b.txt") == b"b" * 1000)
+		True True
+	"""
+	if data is None:
+		data = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+	compressed: bytes = content
+	compressor: Any = get_compressor(zip_info.compress_type, compresslevel)
+	if compressor is not None:
+		compressed = compressor.compress(content) + compressor.flush()
+
+	# Append the data and fill the ZipInfo
+	offset: int = data.seek(0, 2)
+	data.write(compressed)
+	zip_info.CRC = zlib.crc32(content)
+	zip_info.file_size = len(content)
+	zip_info.compress_size = len(compressed)
+	return CompressedMember(zip_info, data, offset)
+
+
+# Function to append an already compressed member to a ZipFile
+def write_raw_member(zipf: zipfile.ZipFile, member: CompressedMember) -> None:
+	""" Appends an already compressed member to a ZipFile opened for writing, copying its bytes as they are.
+
+	The local header is written with the final CRC and sizes (no data descriptor),
+	the central directory entry is written by the ZipFile when it is closed.
+
+	Args:
+		zipf	(zipfile.ZipFile):		ZipFile opened in "w", "x" or "a" mode
+		member	(CompressedMember):		Member to append (see :py:func:`compress_file`)
+	"""
+	zip_info: zipfile.ZipInfo = member.zip_info
+	zip64: bool = zip_info.file_size > zipfile.ZIP64_LIMIT or zip_info.compress_size > zipfile.ZIP64_LIMIT
+	if zipf.mode not in ("w", "x", "a"):
+		raise ValueError("write_raw_member() requires a ZipFile opened with mode 'w', 'x' or 'a'")
+	if zip_info.filename in zipf.NameToInfo:
+		raise ValueError(f"Duplicate name in ZIP file: '{zip_info.filename}'")
+
+	# Same steps as ZipFile.mkdir(), followed by the raw copy of the data
+	zip_info.flag_bits &= ~0x08	# Sizes are known, so no data descriptor
+	zipf.fp.seek(zipf.start_dir)	# pyright: ignore[reportOptionalMemberAccess]
+	zip_info.header_offset = zipf.fp.tell()	# pyright: ignore[reportOptionalMemberAccess]
+	zipf._didModify = True	# pyright: ignore[reportPrivateUsage, reportAttributeAccessIssue]
+	zipf.fp.write(zip_info.FileHeader(zip64))	# pyright: ignore[reportOptionalMemberAccess]
+	member.data.seek(member.offset)
+	remaining: int = zip_info.compress_size
+	while remaining > 0:
+		chunk: bytes = member.data.read(min(Cfg.CHUNK_SIZE, remaining))
+		if not chunk:
+			raise ValueError(f"Compressed data of '{zip_info.filename}' is shorter than its compress_size")
+		zipf.fp.write(chunk)	# pyright: ignore[reportOptionalMemberAccess]
+		remaining -= len(chunk)
+	zipf.start_dir = zipf.fp.tell()	# pyright: ignore[reportOptionalMemberAccess, reportAttributeAccessIssue]
+	zipf.filelist.append(zip_info)
+	zipf.NameToInfo[zip_info.filename] = zip_info
+
+
+# "Private" function to remove a field from a ZIP extra field
+def strip_extra(extra: bytes, header_id: int) -> bytes:
+	""" Remove the fields with the given header ID from a ZIP extra field """
+	kept: bytes = b""
+	while len(extra) >= 4:
+		field_id, data_size = struct.unpack("<HH", extra[:4])
+		if field_id != header_id:
+			kept += extra[:4 + data_size]
+		extra = extra[4 + data_size:]
+	return kept
+
+
+# Function to get the compressed data of a member of a ZipFile, to copy it without decompressing it
+def open_raw_member(zipf: zipfile.ZipFile, zip_info: zipfile.ZipInfo) -> CompressedMember:
+	""" Locates the compressed data of a member of a ZipFile opened for reading,
+	so it can be appended as is to another ZipFile with :py:func:`write_raw_member` (no decompression nor recompression).
+
+	The CRC, sizes, compression type, date, comment and extra field of the member are kept.
+
+	Args:
+		zipf		(zipfile.ZipFile):	ZipFile opened for reading (no member of it must be opened while copying)
+		zip_info	(zipfile.ZipInfo):	Member to copy
+	Returns:
+		CompressedMember: The member, whose data is the file of the ZipFile (do not close it)
+
+	Examples:
+		>>> import io
+		>>> source = io.BytesIO()
+		>>> with zipfile.ZipFile(source, "w", compression=zipfile.ZIP_DEFLATED) as zipf:
+		...     zipf.writestr("file.txt", "hello " * 1000)
+		>>> target = io.BytesIO()
+		>>> with zipfile.ZipFile(source) as zipf_in, zipfile.ZipFile(target, "w") as zipf_out:
+		...     write_raw_member(zipf_out, open_raw_member(zipf_in, zipf_in.getinfo("file.txt")))
+		>>> with zipfile.ZipFile(target) as zipf:
+		...     zipf.read("file.txt") == b"hello " * 1000, zipf.getinfo("file.txt").compress_type == zipfile.ZIP_DEFLATED
+		(True, True)
+	"""
+	if zip_info.flag_bits & 0x01:
+		raise ValueError(f"Cannot copy the encrypted member '{zip_info.filename}' as is")
+	fp: IO[bytes] = zipf.fp	# pyright: ignore[reportAssignmentType]
+	fp.seek(zip_info.header_offset)
+	header: tuple[Any, ...] = LOCAL_HEADER_STRUCT.unpack(fp.read(LOCAL_HEADER_STRUCT.size))
+	if header[0] != LOCAL_HEADER_SIGNATURE:
+		raise zipfile.BadZipFile(f"Bad magic number for the local header of '{zip_info.filename}'")
+	offset: int = zip_info.header_offset + LOCAL_HEADER_STRUCT.size + header[-2] + header[-1]
+
+	# The ZIP64 extra field is written again by write_raw_member() if needed
+	raw_info: zipfile.ZipInfo = copy.copy(zip_info)
+	raw_info.extra = strip_extra(zip_info.extra, ZIP64_EXTRA_ID)
+	return CompressedMember(raw_info, fp, offset)
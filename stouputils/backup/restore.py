@@ -0,0 +1,149 @@
+
+# Imports
+import os
+import zipfile
+from typing import Any
+
+from ..config import StouputilsConfig as Cfg
+from ..decorators import measure_time
+from ..io.path import clean_path
+from ..print.message import info, warning
+from .catalog import BackupCatalog, CatalogEntry
+from .chunking import CHUNKS_FOLDER, iter_manifest_content
+from .hash import get_hash_algorithm, new_file_hasher
+
+
+# "Private" function to check if a file of the backups is selected by the requested paths
+def is_requested(arcname: str, paths: list[str] | None) -> bool:
+	""" Check if a path inside the backups is one of the requested files or inside one of the requested folders """
+	return paths is None or any(arcname == path or arcname.startswith(path + "/") for path in paths)
+
+# "Private" function to get the path where a file of the backups is restored, refusing paths escaping the destination
+def get_restore_path(destination: str, arcname: str) -> str:
+	""" Get the path where a file is restored, raising ValueError if it would be outside the destination """
+	target: str = clean_path(os.path.normpath(os.path.join(destination, arcname)))
+	if os.path.isabs(arcname) or not target.startswith(destination.rstrip("/") + "/"):
+		raise ValueError(f"Refusing to restore '{arcname}' outside of '{destination}'")
+	return target
+
+
+# "Private" function run by the worker threads to restore the files whose newest version is in a backup
+def restore_from_backup(
+	backup_path: str, files: list[tuple[str, CatalogEntry]], destination: str, chunk_locations: dict[str, str], verify: bool
+) -> list[str]:
+	""" Restore files from a backup ZIP file (opened once), reading the chunks of chunked files from the backups holding them.
+
+	Returns:
+		list[str]: Paths (inside the backups) of the restored files
+	"""
+	restored: list[str] = []
+	chunk_zips: dict[str, zipfile.ZipFile] = {}
+
+	def read_chunk(chunk_hash: str) -> bytes:
+		location: str | None = chunk_locations.get(chunk_hash)
+		if location is None:
+			raise ValueError(f"Chunk '{chunk_hash}' is not stored in any backup")
+		if location not in chunk_zips:
+			chunk_zips[location] = zipfile.ZipFile(location, "r")
+		return chunk_zips[location].read(CHUNKS_FOLDER + chunk_hash)
+
+	try:
+		with zipfile.ZipFile(backup_path, "r") as zipf:
+			for arcname, entry in files:
+				try:
+					target: str = get_restore_path(destination, arcname)
+					os.makedirs(os.path.dirname(target), exist_ok=True)
+					hasher: Any = new_file_hasher(get_hash_algorithm(entry.hash)) if verify and entry.hash is not None else None
+
+					# Write the file, from its member or from its chunks
+					with open(target, "wb") as f:
+						if entry.chunked:
+							for chunk in iter_manifest_content(zipf.read(arcname), read_chunk):
+								if hasher is not None:
+									hasher.update(chunk)
+								f.write(chunk)
+						else:
+							with zipf.open(arcname, "r") as source:
+								while True:
+									chunk = source.read(Cfg.CHUNK_SIZE)
+									if not chunk:
+										break
+									if hasher is not None:
+										hasher.update(chunk)
+									f.write(chunk)
+					if hasher is not None and hasher.hexdigest() != entry.hash:
+						raise ValueError(f"Content does not match its stored hash '{entry.hash}'")
+
+					# Restore the modification time, so the next backup of the restored files does not hash them again
+					if entry.mtime_ns is not None:
+						os.utime(target, ns=(entry.mtime_ns, entry.mtime_ns))
+					restored.append(arcname)
+				except Exception as e:
+					warning(f"Error restoring file {arcname} from {backup_path}: {e}")
+	finally:
+		for chunk_zip in chunk_zips.values():
+			chunk_zip.close()
+	return restored
+
+
+# Function to restore files from the backups, as they were at a given backup
+@measure_time(message="Restoring backup")
+def restore_backup(
+	zip_path: str,
+	destination: str,
+	paths: list[str] | None = None,
+	max_workers: int = Cfg.CPU_COUNT,
+	verify: bool = True,
+) -> list[str]:
+	""" Restores files as they were at the given backup, without consolidating the backups first.
+
+	The newest version of each requested file up to the given backup is resolved with the
+	:py:class:`~catalog.BackupCatalog` (files deleted before it are not restored),
+	then only the needed members are extracted, the backup ZIP files being read in parallel by several threads.
+
+	Args:
+		zip_path (str): Path to the backup ZIP file to restore (If endswith "/latest.zip" or "/", the latest backup will be used)
+		destination (str): Folder where the files are restored (with their path inside the backups, e.g. "source/file.txt")
+		paths (list[str] | None): Files or folders to restore, as paths inside the backups (None to restore everything)
+		max_workers (int): Number of threads extracting files
+		verify (bool): If True, check the content of each restored file against its stored hash
+	Returns:
+		list[str]: Paths (inside the backups) of the restored files
+	Examples:
+
+	.. code-block:: python
+
+		> restore_backup("/path/to/backups/latest.zip", "/path/to/restored", paths=["source/config.json", "source/data"])
+		[INFO HH:MM:SS] Restored 42 files to '/path/to/restored'
+		[PROGRESS HH:MM:SS] Restoring backup: 0.12345s
+	"""
+	from ..parallel.multi import multithreading
+	zip_path = clean_path(os.path.abspath(zip_path))
+	destination = clean_path(os.path.abspath(destination))
+	zip_folder: str = zip_path if os.path.isdir(zip_path) else clean_path(os.path.dirname(zip_path))
+	requested: list[str] | None = [clean_path(path).strip("/") for path in paths] if paths else None
+
+	# Resolve the newest version of each requested file up to the given backup
+	with BackupCatalog(zip_folder) as catalog:
+		files: dict[str, CatalogEntry] = catalog.resolve(zip_path)[0]
+		selected: dict[str, CatalogEntry] = {arcname: entry for arcname, entry in files.items() if is_requested(arcname, requested)}
+		chunk_locations: dict[str, str] = catalog.chunk_locations(zip_path) if any(entry.chunked for entry in selected.values()) else {}
+	if not selected:
+		warning(f"No file to restore from '{zip_path}'" + (f" matching {paths}" if paths else ""))
+		return []
+
+	# Group the files by the backup holding their newest version, so each ZIP file is opened once
+	groups: dict[str, list[tuple[str, CatalogEntry]]] = {}
+	for arcname, entry in sorted(selected.items()):
+		groups.setdefault(entry.backup, []).append((arcname, entry))
+	os.makedirs(destination, exist_ok=True)
+	tasks: list[tuple[str, list[tuple[str, CatalogEntry]], str, dict[str, str], bool]] = [
+		(backup_path, group, destination, chunk_locations, verify) for backup_path, group in groups.items()
+	]
+	results: list[list[str]] = multithreading(
+		restore_from_backup, tasks, use_starmap=True, max_workers=max_workers,
+		desc="Restoring files" if len(tasks) > 1 else "", cost=lambda task: sum(entry.size for _, entry in task[1]),
+	)
+	restored: list[str] = [arcname for result in results for arcname in result]
+	info(f"Restored {len(restored)} files to '{destination}'")
+	return restored
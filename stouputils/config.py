@@ -77,6 +77,20 @@ class StouputilsConfig:
 
 	Used by: :mod:`stouputils.parallel.multi` (see :py:func:`~stouputils.parallel.multi.process_title_wrapper`). """
 
+	AUTO_CHUNK_TARGET_DURATION: float = 0.05
+	""" Target duration in seconds of one chunk of tasks when using ``chunksize="auto"`` (float).
+	- The chunk size grows until a chunk takes about this long, amortizing the pickling and IPC round trip of each chunk.
+	- Lower values give a smoother progress and better load balancing, higher values a lower overhead.
+
+	Used by: :mod:`stouputils.parallel.multi` (see :py:class:`~stouputils.parallel.common.AdaptiveChunker`). """
+
+	CAPTURE_OUTPUT_PREFIX: str = ""
+	""" Prefix added to each line of output relayed from the worker processes (str, empty for no prefix).
+	- Can contain ``{pid}`` (process id) and ``{name}`` (process name) placeholders, e.g. ``"[{pid}] "``.
+	- Useful to keep interleaved lines of many workers readable.
+
+	Used by: :mod:`stouputils.parallel.capturer` (see :py:class:`~stouputils.parallel.capturer.CaptureOutput`). """
+
 	# I/O buffer sizes
 	CHUNK_SIZE: int = 1024 * 1024  # 1MB chunks for I/O operations
 	""" Default chunk size for file I/O operations (bytes).
@@ -5,6 +5,8 @@ This module provides utilities for file management.
 - :py:func:`~json.json_load`: Load a JSON file from the given path
 - :py:func:`~csv.csv_dump`: Writes data to a CSV file with customizable options
 - :py:func:`~csv.csv_load`: Load a CSV file from the given path
+- :py:class:`~ignore.IgnoreMatcher`: Match paths against gitignore-style patterns compiled into a single regex
+- :py:func:`~ignore.walk_files`: Walk the files of a folder in a deterministic order, without entering the excluded folders
 - :py:func:`~path.get_root_path`: Get the absolute path of the directory
 - :py:func:`~path.relative_path`: Get the relative path of a file relative to a given directory
 - :py:func:`~path.super_copy`: Copy a file (or a folder) from the source to the destination (always create the directory)
@@ -21,6 +23,7 @@ This module provides utilities for file management.
 
 # Imports
 from .csv import *
+from .ignore import *
 from .json import *
 from .path import *
 from .redirect import *
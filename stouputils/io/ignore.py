@@ -0,0 +1,191 @@
+
+# Imports
+import os
+import re
+from collections.abc import Iterable, Iterator
+
+
+# "Private" function to translate the glob part of a gitignore pattern into a regex
+def translate_glob(pattern: str) -> str:
+	""" Translate a gitignore glob (without its leading "!" nor its trailing "/") into a regex matching whole paths.
+
+	"*" and "?" never match a "/", "**/" matches any number of folders, "/**" matches everything inside a folder.
+	"""
+	parts: list[str] = []
+	i: int = 0
+	while i < len(pattern):
+		char: str = pattern[i]
+		if pattern.startswith("**/", i) and (i == 0 or pattern[i - 1] == "/"):
+			parts.append("(?:.*/)?")
+			i += 3
+			continue
+		if pattern.startswith("**", i) and (i == 0 or pattern[i - 1] == "/") and i + 2 == len(pattern):
+			parts.append(".*")
+			i += 2
+			continue
+		if char == "*":
+			parts.append("[^/]*")
+		elif char == "?":
+			parts.append("[^/]")
+		elif char == "\\" and i + 1 < len(pattern):
+			i += 1
+			parts.append(re.escape(pattern[i]))
+		elif char == "[" and (end := pattern.find("]", i + 2)) != -1:
+			content: str = pattern[i + 1:end].replace("\\", "\\\\")
+			if content[0] in "!^":
+				content = "^" + content[1:]
+			parts.append(f"(?!/)[{content}]")
+			i = end
+		else:
+			parts.append(re.escape(char))
+		i += 1
+	return "".join(parts)
+
+
+# "Private" function keeping the meaning of the patterns written for fnmatch, whose "*" also matches "/"
+def widen_leading_wildcard(patterns: Iterable[str], replacement: str = "**/") -> list[str]:
+	""" Rewrite a leading "*/" into "**/" (with a warning), so that e.g. "*/cache/*" still excludes the nested "cache" folders,
+	as it did when the patterns were matched with fnmatch. Use "/*/cache/*" to only match at depth 1.
+
+	Args:
+		patterns	(Iterable[str]):	The patterns, possibly starting with "!"
+		replacement	(str):				Replacement of the leading "*/", e.g. "*/**/" to keep requiring at least one folder (Defaults to "**/")
+	Returns:
+		list[str]: The patterns, with a leading "*/" rewritten
+
+	Examples:
+		>>> widen_leading_wildcard(["*.pyc", "/*/cache/*", "!**/keep/*"])
+		['*.pyc', '/*/cache/*', '!**/keep/*']
+	"""
+	widened: list[str] = []
+	for pattern in patterns:
+		negation: str = "!" if pattern.strip().startswith("!") else ""
+		body: str = pattern.strip().removeprefix("!")
+		if body.startswith("*/"):
+			from ..print.message import warning
+			pattern = f"{negation}{replacement}{body[2:]}"
+			warning(f"Pattern '{negation}{body}' is read as '{pattern}' (any depth) as before, use '{negation}/{body}' to only match at depth 1")
+		widened.append(pattern)
+	return widened
+
+
+# Class matching paths against gitignore-style patterns, compiled once into a single regex
+class IgnoreMatcher:
+	""" Matches paths (relative to a root folder, with "/" separators) against gitignore-style patterns.
+
+	- A pattern without "/" (e.g. ``*.pyc``, ``node_modules``) matches a file or folder name at any depth
+	- A pattern with a "/" (e.g. ``temp/*``, ``/build``, ``docs/**/*.md``) is relative to the root folder
+	- ``*`` and ``?`` do not match "/", while ``**`` matches any number of folders
+	- A trailing "/" (e.g. ``cache/``) only matches folders
+	- A leading "!" re-includes what a previous pattern excluded (the last matching pattern wins),
+		but a file cannot be re-included if one of its parent folders is excluded
+
+	All the patterns are compiled into one regex, whose alternatives are in reverse order
+	so the first alternative that matches (the only capturing group) is the last matching pattern.
+
+	Args:
+		patterns (Iterable[str]): The patterns, empty ones and comments (starting with "#") being ignored
+
+	Examples:
+		>>> matcher = IgnoreMatcher(["*.pyc", "node_modules", "temp/*", "cache/", "!keep.pyc"])
+		>>> [matcher.matches(path) for path in ("a.pyc", "src/b.pyc", "src/keep.pyc", "main.py")]
+		[True, True, False, False]
+		>>> matcher.matches("web/node_modules", is_dir=True), matcher.matches("temp/x.txt"), matcher.matches("src/temp/x.txt")
+		(True, True, False)
+		>>> matcher.matches("cache", is_dir=True), matcher.matches("cache")
+		(True, False)
+		>>> IgnoreMatcher(["docs/**/*.md"]).matches("docs/a/b/readme.md"), IgnoreMatcher(["/build"]).matches("src/build")
+		(True, False)
+		>>> bool(IgnoreMatcher([]))
+		False
+	"""
+	def __init__(self, patterns: Iterable[str]) -> None:
+		self.patterns: list[str] = [pattern.strip() for pattern in patterns if pattern.strip() and not pattern.strip().startswith("#")]
+		""" The patterns, in the given order """
+		self.negated: list[bool] = []
+		""" Whether each alternative of the regex (patterns in reverse order) re-includes the paths it matches """
+		alternatives: list[str] = []
+		for pattern in reversed(self.patterns):
+			negated: bool = pattern.startswith("!")
+			pattern = pattern.removeprefix("!")
+			dir_only: bool = pattern.endswith("/")
+			pattern = pattern.rstrip("/")
+			if not pattern:
+				continue
+			anchored: bool = "/" in pattern
+			regex: str = ("" if anchored else "(?:.*/)?") + translate_glob(pattern.lstrip("/"))
+			alternatives.append(f"({regex}{'/' if dir_only else '/?'})")
+			self.negated.append(negated)
+		self.regex: re.Pattern[str] | None = re.compile("|".join(alternatives), re.DOTALL) if alternatives else None
+		""" The combined regex, matched against the path followed by "/" for folders (None if there is no pattern) """
+
+	def __bool__(self) -> bool:
+		return self.regex is not None
+
+	def __repr__(self) -> str:
+		return f"IgnoreMatcher({self.patterns!r})"
+
+	def matches(self, path: str, is_dir: bool = False) -> bool:
+		""" Check if a path is excluded by the patterns.
+
+		Args:
+			path	(str):	Path relative to the root folder, with "/" separators
+			is_dir	(bool):	Whether the path is a folder (for patterns ending with "/")
+		Returns:
+			bool: True if the last pattern matching the path excludes it
+		"""
+		if self.regex is None:
+			return False
+		match: re.Match[str] | None = self.regex.fullmatch(path + "/" if is_dir else path)
+		return match is not None and match.lastindex is not None and not self.negated[match.lastindex - 1]
+
+
+# Function to walk the files of a folder, pruning the excluded folders
+def walk_files(root: str, exclude: IgnoreMatcher | Iterable[str] | None = None) -> Iterator[tuple[str, str]]:
+	""" Walks the files of a folder with :py:func:`os.scandir`, in a deterministic order
+	(files of a folder sorted by name, then its sub-folders sorted by name).
+
+	Excluded folders are never opened (e.g. ``node_modules`` or ``.venv``), and symbolic links to folders are not followed.
+
+	Args:
+		root	(str):									Folder to walk
+		exclude	(IgnoreMatcher | Iterable[str] | None):	Matcher or gitignore-style patterns of the paths to exclude (see :py:class:`IgnoreMatcher`)
+	Returns:
+		Iterator[tuple[str, str]]: (full_path, relative_path) of each file that is not excluded, with "/" separators
+
+	Examples:
+		>>> import tempfile
+		>>> with tempfile.TemporaryDirectory() as folder:
+		...     for path in ("b.txt", "a.log", "src/main.py", "src/main.pyc", "node_modules/x/y.js"):
+		...         os.makedirs(os.path.dirname(f"{folder}/{path}"), exist_ok=True)
+		...         open(f"{folder}/{path}", "w").close()
+		...     [relative for _, relative in walk_files(folder, ["*.pyc", "node_modules/", "*.log"])]
+		['b.txt', 'src/main.py']
+	"""
+	matcher: IgnoreMatcher = exclude if isinstance(exclude, IgnoreMatcher) else IgnoreMatcher(exclude or ())
+	root = root.replace("\\", "/").rstrip("/") or "/"
+	stack: list[tuple[str, str]] = [(root, "")]
+	while stack:
+		folder, prefix = stack.pop()
+		files: list[str] = []
+		folders: list[str] = []
+		try:
+			with os.scandir(folder) as entries:
+				for entry in entries:
+					try:
+						is_dir: bool = entry.is_dir()
+					except OSError:
+						is_dir = False
+					if is_dir and entry.is_symlink():
+						continue
+					if matcher.matches(prefix + entry.name, is_dir):
+						continue
+					(folders if is_dir else files).append(entry.name)
+		except OSError:
+			continue
+
+		base: str = folder.rstrip("/") + "/"
+		for name in sorted(files):
+			yield base + name, prefix + name
+		stack.extend((base + name, f"{prefix}{name}/") for name in sorted(folders, reverse=True))
+
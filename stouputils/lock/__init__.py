@@ -6,7 +6,7 @@ Source:
 - https://en.wikipedia.org/wiki/Starvation_%28computer_science%29
 - https://en.wikipedia.org/wiki/FIFO_and_LIFO_accounting
 
-Provides three classes:
+Provides three classes, usable with ``with`` or ``async with``:
 
 - :py:class:`~base.LockFifo`: basic cross-process lock using filesystem (POSIX via fcntl, Windows via msvcrt).
 - :py:class:`~re_entrant.RLockFifo`: reentrant per-(process,thread) lock built on top of :py:class:`~base.LockFifo`.
@@ -21,6 +21,12 @@ Usage
 >>> with stp.RLockFifo("some_directory/my_r.lock", timeout=5):
 ...     pass
 
+>>> import asyncio
+>>> async def _async_example():
+...     async with stp.LockFifo("some_directory/my.lock", timeout=5):
+...         pass
+>>> asyncio.run(_async_example())
+
 >>> def _redis_example():
 ...     with stp.RedisLockFifo("my_redis_lock", timeout=5):
 ...         pass
@@ -4,10 +4,13 @@ from __future__ import annotations
 
 import errno
 import time
-from contextlib import AbstractContextManager
-from typing import IO, Any
+from typing import IO, TYPE_CHECKING, Any
 
-from .shared import LockError, LockTimeoutError, resolve_acquire_defaults, resolve_path
+from ..ctx.common import AbstractBothContextManager
+from .shared import LockError, LockTimeoutError, acquire_local_gate, resolve_acquire_defaults, resolve_path
+
+if TYPE_CHECKING:
+    import asyncio
 
 
 def _lock_fd(fd: int, blocking: bool, timeout: float | None) -> None:
@@ -177,21 +180,30 @@ def _hold(path: str) -> None: # pyright: ignore[reportUnusedFunction]
             pass
 
 
-class LockFifo(AbstractContextManager["LockFifo"]):
+class LockFifo(AbstractBothContextManager["LockFifo"]):
     """ A simple cross-platform inter-process lock backed by a file.
 
     This implementation supports optional Fifo ordering via a small ticket queue
     stored alongside the lock file. Fifo is enabled by default to avoid
     starvation. Fifo behaviour is implemented with a small sequence file and
-    per-ticket files in ``<lockpath>.queue/``. On platforms without fcntl the
-    implementation falls back to a timestamp-based ticket.
+    per-ticket files in ``<lockpath>.queue/``. On POSIX, waiters block in
+    ``flock`` on the ticket ahead of theirs and are woken up as soon as it is
+    released, so the handoff does not depend on ``check_interval``. On
+    platforms without fcntl the implementation falls back to a timestamp-based
+    ticket and polling.
+
+    The lock also supports ``async with`` (see :meth:`acquire_async`), waiting
+    with :func:`asyncio.sleep` instead of blocking the event loop. Like threads,
+    each coroutine must use its own instance. The coroutines of an event loop
+    waiting on the same lock queue locally first, in arrival order, so only one
+    of them per process takes a ticket and polls.
 
     Args:
         name               (str):           Lock filename or path. If a simple name is given,
             it is created in the system temporary directory.
         timeout            (float | None):  Seconds to wait for the lock. ``None`` means block indefinitely.
         blocking           (bool):          Whether to block until acquired (subject to ``timeout``).
-        check_interval     (float):         Interval between lock attempts, in seconds.
+        check_interval     (float):         Interval between lock attempts when polling, in seconds.
         fifo               (bool):          Whether to enforce Fifo ordering (default: True).
         fifo_stale_timeout (float | None):  Seconds after which a ticket is considered stale; if ``None`` the lock's ``timeout`` value will be used.
 
@@ -261,6 +273,19 @@ class LockFifo(AbstractContextManager["LockFifo"]):
         ... finally:
         ...     p.terminate(); p.join()
         timeout
+
+        >>> # Asynchronous usage: many coroutines queue on the lock without blocking the event loop
+        >>> import asyncio
+        >>> async def _task(path: str, inside: list[int], i: int) -> None:
+        ...     async with LockFifo(path, timeout=5, check_interval=0.005):
+        ...         inside.append(i)
+        ...         await asyncio.sleep(0.001)
+        ...         assert inside == [i]
+        ...         inside.remove(i)
+        >>> async def _main(path: str) -> None:
+        ...     inside: list[int] = []
+        ...     await asyncio.gather(*(_task(path, inside, i) for i in range(50)))
+        >>> asyncio.run(_main(tempfile.mkdtemp() + "/alock"))
     """
 
     def __init__(
@@ -288,6 +313,8 @@ class LockFifo(AbstractContextManager["LockFifo"]):
         """ Whether the lock is currently held. """
         self.member: str | None = None
         """ The name of our ticket file in the queue directory when using Fifo. """
+        self.gate: asyncio.Lock | None = None
+        """ The local gate held between :meth:`acquire_async` and :meth:`release` (see :func:`~.shared.acquire_local_gate`). """
 
         # Fifo queue configuration
         self.fifo: bool = fifo
@@ -333,31 +360,8 @@ class LockFifo(AbstractContextManager["LockFifo"]):
         """
         deadline: float | None = None if timeout is None else (time.monotonic() + timeout)
 
-        # Open file if not already opened
-        if self.fd is None:
-            self.file = open(self.path, "a+b")
-            self.fd = self.file.fileno()
-
         # Main loop
-        while True:
-            blocked: bool = False
-            try:
-                _lock_fd(self.fd, blocking, timeout)
-                self.is_locked = True
-                return
-            except (ImportError, ModuleNotFoundError) as e:
-                raise LockError("Could not acquire lock: unsupported platform") from e
-            except BlockingIOError:
-                blocked = True
-            except OSError as exc:
-                if getattr(exc, "errno", None) in (errno.EACCES, errno.EAGAIN, errno.EDEADLK):
-                    blocked = True
-                else:
-                    raise LockError(str(exc)) from exc
-
-            if not blocked:
-                raise LockError("Could not acquire lock: unsupported platform")
-
+        while not self.try_lock(blocking, timeout):
             # If we reach here, lock was busy
             if not blocking:
                 raise LockTimeoutError("Lock is already held and blocking is False")
@@ -365,13 +369,55 @@ class LockFifo(AbstractContextManager["LockFifo"]):
                 raise LockTimeoutError(f"Timeout while waiting for lock '{self.path}'")
             time.sleep(check_interval)
 
+    async def perform_lock_async(self, blocking: bool, timeout: float | None, check_interval: float) -> None:
+        """ Asynchronous :meth:`perform_lock`, retrying a non-blocking lock with :func:`asyncio.sleep` in between. """
+        import asyncio
+        deadline: float | None = None if timeout is None else (time.monotonic() + timeout)
+        while not self.try_lock(blocking=False, timeout=None):
+            if not blocking:
+                raise LockTimeoutError("Lock is already held and blocking is False")
+            if deadline is not None and time.monotonic() >= deadline:
+                raise LockTimeoutError(f"Timeout while waiting for lock '{self.path}'")
+            await asyncio.sleep(check_interval)
+
+    def try_lock(self, blocking: bool, timeout: float | None) -> bool:
+        """ Make one attempt at locking the file (blocking in the OS call only if ``blocking`` and ``timeout`` is None).
+
+        Returns:
+            bool: True if the lock was acquired, False if it is busy.
+        """
+        # Open file if not already opened
+        if self.fd is None:
+            self.file = open(self.path, "a+b")
+            self.fd = self.file.fileno()
+
+        blocked: bool = False
+        try:
+            _lock_fd(self.fd, blocking, timeout)
+            self.is_locked = True
+            return True
+        except (ImportError, ModuleNotFoundError) as e:
+            raise LockError("Could not acquire lock: unsupported platform") from e
+        except BlockingIOError:
+            blocked = True
+        except OSError as exc:
+            if getattr(exc, "errno", None) in (errno.EACCES, errno.EAGAIN, errno.EDEADLK):
+                blocked = True
+            else:
+                raise LockError(str(exc)) from exc
+
+        if not blocked:
+            raise LockError("Could not acquire lock: unsupported platform")
+        return False
+
     def acquire(self, timeout: float | None = None, blocking: bool | None = None, check_interval: float | None = None) -> None:
         """ Acquire the lock, optionally using Fifo ordering.
 
         When Fifo is enabled (default), a ticket file is created and the caller
         waits until its ticket becomes head of the queue before attempting the
         actual underlying lock. This avoids starvation by ensuring waiters are
-        served in arrival order.
+        served in arrival order. On POSIX, the wait blocks until the previous
+        ticket is released instead of polling (see :meth:`FileTicketQueue.wait_turn`).
         """
         # Use instance defaults if parameters not provided
         blocking, timeout, check_interval, deadline = resolve_acquire_defaults(
@@ -387,23 +433,18 @@ class LockFifo(AbstractContextManager["LockFifo"]):
         self.member = member
 
         try:
-            while True:
-                # Cleanup stale head ticket if needed
+            if not blocking:
+                # Cleanup stale head ticket if needed, then check once
                 self.queue.cleanup_stale()
-
                 if not self.queue.is_head(ticket):
-                    if not blocking:
-                        raise LockTimeoutError("Lock is already held and blocking is False")
-                    if deadline is not None and time.monotonic() >= deadline:
-                        raise LockTimeoutError(f"Timeout while waiting for lock '{self.path}'")
-                    time.sleep(check_interval)
-                    continue
-
-                # We're head of the queue; attempt to acquire underlying lock
-                self.perform_lock(blocking, timeout, check_interval)
-
-                # We obtained OS lock; keep our ticket until release to ensure mutual exclusion
-                return
+                    raise LockTimeoutError("Lock is already held and blocking is False")
+
+            # Wait for our turn (woken up by the previous ticket's release when supported, polling otherwise)
+            elif not self.queue.wait_turn(ticket, member, deadline, check_interval):
+                raise LockTimeoutError(f"Timeout while waiting for lock '{self.path}'")
+
+            # We're head of the queue; acquire underlying lock and keep our ticket until release to ensure mutual exclusion
+            self.perform_lock(blocking, timeout, check_interval)
         finally:
             # Ensure our ticket is removed if we timed out or an unexpected error occurred
             try:
@@ -413,6 +454,56 @@ class LockFifo(AbstractContextManager["LockFifo"]):
             except Exception:
                 pass
 
+    async def acquire_async(self, timeout: float | None = None, blocking: bool | None = None, check_interval: float | None = None) -> None:
+        """ Asynchronous :meth:`acquire`, for use inside an event loop.
+
+        The coroutines of the event loop waiting on the same path first queue
+        locally, then the Fifo ordering is the same, but the wait for our turn
+        and for the underlying lock polls every ``check_interval`` seconds with
+        :func:`asyncio.sleep` (see :meth:`~.queue.BaseTicketQueue.wait_turn_async`),
+        so the event loop keeps running and no thread is used per waiter.
+        """
+        blocking, timeout, check_interval, deadline = resolve_acquire_defaults(
+            blocking, timeout, check_interval, self.blocking, self.timeout, self.check_interval
+        )
+        self.gate = await acquire_local_gate(self.path, blocking, deadline)
+
+        if not self.fifo or self.queue is None:
+            try:
+                return await self.perform_lock_async(blocking, timeout, check_interval)
+            except BaseException:
+                self.release_gate()
+                raise
+
+        try:
+            ticket, member = self.queue.register()
+        except BaseException:
+            self.release_gate()
+            raise
+        self.member = member
+        try:
+            if not blocking:
+                self.queue.cleanup_stale()
+                if not self.queue.is_head(ticket):
+                    raise LockTimeoutError("Lock is already held and blocking is False")
+            elif not await self.queue.wait_turn_async(ticket, member, deadline, check_interval):
+                raise LockTimeoutError(f"Timeout while waiting for lock '{self.path}'")
+            await self.perform_lock_async(blocking, timeout, check_interval)
+        finally:
+            try:
+                if not self.is_locked:
+                    self.release_gate()
+                    self.queue.remove(self.member)
+                    self.member = None
+            except Exception:
+                pass
+
+    def release_gate(self) -> None:
+        """ Let the next coroutine of this event loop waiting on the lock go (see :meth:`acquire_async`). """
+        if self.gate is not None:
+            self.gate.release()
+            self.gate = None
+
     def release(self) -> None:
         """ Release the lock. """
         if not self.is_locked:
@@ -424,6 +515,7 @@ class LockFifo(AbstractContextManager["LockFifo"]):
 
         # Ensure internal state is updated even if unlocking failed
         self.is_locked = False
+        self.release_gate()
         # Perform some cleanup of stale tickets
         try:
             self._cleanup_stale_tickets()
@@ -447,6 +539,13 @@ class LockFifo(AbstractContextManager["LockFifo"]):
     def __exit__(self, exc_type: type | None, exc: BaseException | None, tb: Any | None) -> None:
         self.release()
 
+    async def __aenter__(self) -> LockFifo:
+        await self.acquire_async()
+        return self
+
+    async def __aexit__(self, exc_type: type | None, exc: BaseException | None, tb: Any | None) -> None:
+        self.release()
+
     def close(self) -> None:
         """ Release and close underlying file descriptor.
 
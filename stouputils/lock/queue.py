@@ -3,14 +3,18 @@
 from __future__ import annotations
 
 import os
+import threading
 import time
 import uuid
-from typing import IO, TYPE_CHECKING, Any, cast
+from collections.abc import Generator
+from contextlib import contextmanager
+from typing import IO, TYPE_CHECKING, Any, ClassVar, cast
 
 from ..decorators import abstract
 
 if TYPE_CHECKING:
     import redis
+    import redis.asyncio
 
 
 class BaseTicketQueue:
@@ -50,14 +54,169 @@ class BaseTicketQueue:
         """
         raise NotImplementedError
 
+    def wait_turn(self, ticket: int, member: str, deadline: float | None, check_interval: float) -> bool:
+        """ Wait until ``ticket`` is the head of the queue.
+
+        This default implementation is the portable fallback: it polls
+        :meth:`cleanup_stale` and :meth:`is_head` every ``check_interval``
+        seconds. Backends able to be notified override it.
+
+        Args:
+            ticket         (int):           Our ticket, as returned by :meth:`register`.
+            member         (str):           Our queue member, as returned by :meth:`register`.
+            deadline       (float | None):  ``time.monotonic()`` value after which to give up, ``None`` to wait indefinitely.
+            check_interval (float):         Seconds between two checks.
+
+        Returns:
+            bool: True if the ticket is the head, False if the deadline was reached first.
+        """
+        while True:
+            self.cleanup_stale()
+            if self.is_head(ticket):
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(check_interval)
+
+    async def wait_turn_async(self, ticket: int, member: str, deadline: float | None, check_interval: float) -> bool:
+        """ Asynchronous :meth:`wait_turn`, polling with :func:`asyncio.sleep` so the event loop is never blocked.
+
+        The checks are short local operations, so any number of coroutines can
+        wait on the queue without tying up a thread each.
+
+        Args:
+            ticket         (int):           Our ticket, as returned by :meth:`register`.
+            member         (str):           Our queue member, as returned by :meth:`register`.
+            deadline       (float | None):  ``time.monotonic()`` value after which to give up, ``None`` to wait indefinitely.
+            check_interval (float):         Seconds between two checks.
+
+        Returns:
+            bool: True if the ticket is the head, False if the deadline was reached first.
+        """
+        import asyncio
+        while True:
+            if self.is_head(ticket):
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            self.cleanup_stale()
+            await asyncio.sleep(check_interval)
+
+
+def parse_ticket(name: str) -> int | None:
+    """ Return the ticket number of a ticket file name, or None if the file is not a ticket (e.g. ``seq``). """
+    try:
+        return int(name.split(".")[0])
+    except ValueError:
+        return None
+
+
+def lock_file(f: IO[bytes], exclusive: bool) -> None:
+    """ Lock a whole open file, shared or exclusive (``msvcrt`` locks are always exclusive).
+
+    Proceeds without locking if neither ``fcntl`` nor ``msvcrt`` is available.
+    """
+    try:
+        import fcntl
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH) # type: ignore
+        return
+    except (ImportError, ModuleNotFoundError):
+        pass
+    try:
+        import msvcrt
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)  # type: ignore
+    except (ImportError, ModuleNotFoundError):
+        pass
+
+
+def unlock_file(f: IO[bytes]) -> None:
+    """ Unlock a file locked with :func:`lock_file`, ignoring errors. """
+    try:
+        import fcntl
+        fcntl.flock(f, fcntl.LOCK_UN) # type: ignore
+        return
+    except Exception:
+        pass
+    try:
+        import msvcrt
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)  # type: ignore
+    except Exception:
+        pass
+
+
+class TicketQueueState:
+    """ State of a :class:`FileTicketQueue`, stored in its ``seq`` file as ``"last head released..."``.
+
+    Tickets ``head`` to ``last`` are queued, except the ones in ``released``
+    (removed out of order, e.g. by a waiter that timed out). The head only
+    moves forward, so the state stays small whatever the number of waiters.
+
+    Examples:
+        >>> state = TicketQueueState("")
+        >>> state.last, state.head
+        (0, 1)
+        >>> state.last = 4
+        >>> state.release(2); state.release(1)
+        >>> str(state), state.head, state.predecessor(4), state.is_queued(2)
+        ('4 3', 3, 3, False)
+        >>> state.release(3)
+        >>> state.predecessor(4) is None
+        True
+        >>> str(TicketQueueState("7"))  # Sequence written by older versions, without queue state
+        '7 8'
+    """
+
+    def __init__(self, data: str) -> None:
+        values: list[int] = [int(x) for x in data.split()]
+        self.last: int = values[0] if values else 0
+        """ Last ticket given. """
+        self.head: int = values[1] if len(values) > 1 else self.last + 1
+        """ Lowest ticket that is not released (``last + 1`` when the queue is empty). """
+        self.released: set[int] = set(values[2:])
+        """ Released tickets above the head. """
+
+    def __str__(self) -> str:
+        return " ".join(str(x) for x in (self.last, self.head, *sorted(self.released)))
+
+    def is_queued(self, ticket: int) -> bool:
+        """ Return True if the ticket was given and is not released yet. """
+        return self.head <= ticket <= self.last and ticket not in self.released
+
+    def predecessor(self, ticket: int) -> int | None:
+        """ Return the queued ticket just ahead of ``ticket``, or None if it is the head. """
+        previous: int = ticket - 1
+        while previous >= self.head and previous in self.released:
+            previous -= 1
+        return previous if previous >= self.head else None
+
+    def release(self, ticket: int) -> None:
+        """ Mark a ticket as released, moving the head past the released tickets. """
+        if not self.is_queued(ticket):
+            return
+        self.released.add(ticket)
+        while self.head in self.released:
+            self.released.remove(self.head)
+            self.head += 1
+
 
 class FileTicketQueue(BaseTicketQueue):
     """ File-system backed ticket queue.
 
-    Tickets are assigned using a small ``seq`` file protected by an exclusive
-    lock (via ``fcntl`` on POSIX). Each waiter creates a ticket file named
-    ``{ticket:020d}.{pid}.{uuid}`` in the queue directory. The head of the
-    sorted directory listing is considered the current owner.
+    The queue state (last ticket given, current head and tickets released out
+    of order, see :class:`TicketQueueState`) is kept in a small ``seq`` file
+    protected by a lock (``fcntl`` on POSIX, ``msvcrt`` on Windows), so head
+    checks are a single small read whatever the number of waiters. Each waiter
+    also creates a ticket file named ``{ticket:020d}`` in the queue directory,
+    in the same locked section, so a queued ticket always has its file.
+
+    On POSIX, each ticket file is created under a temporary name, locked with
+    an exclusive ``flock`` and then renamed, so a visible ticket is always
+    locked by its owner until it is removed. :meth:`wait_turn` is then woken as
+    soon as the ticket just ahead of ours is released (or its owner dies), by a
+    thread blocked in ``flock`` on it and shared by all the waiters of the
+    process, while still reading the queue state every ``check_interval``.
 
     Examples:
         >>> # Basic filesystem queue behaviour and cleanup
@@ -81,148 +240,264 @@ class FileTicketQueue(BaseTicketQueue):
         >>> q.maybe_cleanup()
         >>> os.path.exists(qd)
         False
+
+        >>> # A ticket waits until the one ahead of it is removed
+        >>> q2 = FileTicketQueue(tmp + "/q2")
+        >>> t1, m1 = q2.register()
+        >>> t2, m2 = q2.register()
+        >>> q2.wait_turn(t2, m2, deadline=time.monotonic() + 0.05, check_interval=0.01)
+        False
+        >>> q2.remove(m1)
+        >>> q2.wait_turn(t2, m2, deadline=time.monotonic() + 1, check_interval=0.01)
+        True
+        >>> q2.remove(m2)
     """
 
+    release_events: ClassVar[dict[str, threading.Event]] = {}
+    """ Per ticket path, the event set once the ticket is released, each watched by one thread (see :meth:`wait_released`). """
+    release_events_lock: ClassVar[threading.Lock] = threading.Lock()
+    """ Protects :attr:`release_events`. """
+
     def __init__(self, queue_dir: str, stale_timeout: float | None = None) -> None:
         self.queue_dir: str = queue_dir
         self.stale_timeout: float | None = stale_timeout
+        self.seq_path: str = os.path.join(queue_dir, "seq")
+        """ Path of the file holding the queue state. """
+        self.seq_file: IO[bytes] | None = None
+        """ Open ``seq`` file, locked while reading or updating the queue state. """
+        self.thread_lock: threading.Lock = threading.Lock()
+        """ Serializes the threads using this queue, as they share the ``seq`` file (and its lock). """
+        self.ticket_files: dict[str, IO[bytes]] = {}
+        """ Open ticket files of our members, whose ``flock`` is held until they are removed. """
         os.makedirs(queue_dir, exist_ok=True)
 
-    def get_ticket(self) -> int:
-        seq_path: str = os.path.join(self.queue_dir, "seq")
-        # Ensure queue directory exists
-        os.makedirs(self.queue_dir, exist_ok=True)
-
-        def _inc_seq_in_file(f: IO[Any]) -> int:
-            """Read, increment and persist the sequence in the given open file."""
-            f.seek(0)
-            data: str = f.read().decode().strip()
-            seq: int = int(data) if data else 0
-            seq += 1
-            f.seek(0)
-            f.truncate(0)
-            f.write(str(seq).encode())
-            f.flush()
-            return seq
+    def ticket_path(self, ticket: int) -> str:
+        """ Return the path of the file of a ticket. """
+        return os.path.join(self.queue_dir, f"{ticket:020d}")
 
-        # Try POSIX advisory lock via fcntl when available
-        try:
-            import fcntl
-            with open(seq_path, "a+b") as f:
-                fcntl.flock(f, fcntl.LOCK_EX) # type: ignore
-                try:
-                    seq = _inc_seq_in_file(f)
-                finally:
-                    try:
-                        fcntl.flock(f, fcntl.LOCK_UN) # type: ignore
-                    except Exception:
-                        pass
-            return seq
-        except Exception:
-            # fallthrough to try Windows locking
-            pass
+    @contextmanager
+    def locked_state(self, exclusive: bool = True) -> Generator[TicketQueueState]:
+        """ Lock the ``seq`` file and yield the queue state, written back on exit if ``exclusive``.
 
-        # Try Windows locking via msvcrt
-        try:
-            import msvcrt
-            with open(seq_path, "a+b") as f:
-                fd = f.fileno()
-                # Lock first byte of the file (blocking)
-                locked = False
-                try:
-                    msvcrt.locking(fd, msvcrt.LK_LOCK, 1)  # type: ignore
-                    locked = True
-                except Exception:
-                    # Fallback to non-blocking lock if needed
+        The ``seq`` file is kept open between calls. The queue directory is
+        created if needed, and if the ``seq`` file was removed by a concurrent
+        :meth:`maybe_cleanup`, the new one is opened instead.
+        """
+        with self.thread_lock:
+            while True:
+                f: IO[bytes] | None = self.seq_file
+                if f is None:
                     try:
-                        msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)  # type: ignore
-                        locked = True
-                    except Exception:
-                        locked = False
+                        os.makedirs(self.queue_dir, exist_ok=True)
+                        f = open(self.seq_path, "a+b")
+                    except (FileNotFoundError, FileExistsError):
+                        continue
+                    self.seq_file = f
                 try:
-                    if locked:
-                        seq = _inc_seq_in_file(f)
-                    else:
-                        # If locking failed, still attempt a best-effort increment
-                        seq = _inc_seq_in_file(f)
-                finally:
-                    try:
-                        if locked:
-                            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)  # type: ignore
-                    except Exception:
-                        pass
-            return seq
-        except Exception:
-            # Fallback to timestamp + random suffix to reduce collisions
-            import random
-            return int(time.time() * 1e6) * 1000000 + random.getrandbits(48)
+                    lock_file(f, exclusive)
+                    current: bool = os.path.samestat(os.fstat(f.fileno()), os.stat(self.seq_path))
+                except FileNotFoundError:
+                    current = False
+                if current:
+                    break
+                unlock_file(f)
+                f.close()
+                self.seq_file = None
 
-    def register(self) -> tuple[int, str]:
-        ticket: int = self.get_ticket()
-        fname: str = f"{ticket:020d}.{os.getpid()}.{uuid.uuid4().hex}"
-        p: str = os.path.join(self.queue_dir, fname)
-        # Create our ticket file. Recreate queue_dir if concurrent cleanup removed it.
-        os.makedirs(self.queue_dir, exist_ok=True)
-        with open(p, "w") as f:
-            f.write(str(time.time()))
-        return ticket, fname
+            try:
+                f.seek(0)
+                state: TicketQueueState = TicketQueueState(f.read().decode())
+                yield state
+                if exclusive:
+                    f.seek(0)
+                    f.truncate(0)
+                    f.write(str(state).encode())
+                    f.flush()
+            finally:
+                unlock_file(f)
 
-    def is_head(self, ticket: int) -> bool:
+    def get_ticket(self) -> int:
+        """ Obtain a monotonically increasing ticket number, without joining the queue. """
+        with self.locked_state() as state:
+            state.last += 1
+            state.release(state.last)
+            return state.last
+
+    def register(self) -> tuple[int, str]:
+        # The ticket file is created in the same locked section, so a queued ticket always has its file
+        with self.locked_state() as state:
+            ticket: int = state.last + 1
+            p: str = self.ticket_path(ticket)
+            if not self.create_locked_ticket(p):
+                with open(p, "w") as f:
+                    f.write(str(time.time()))
+            state.last = ticket
+        return ticket, os.path.basename(p)
+
+    def create_locked_ticket(self, p: str) -> bool:
+        """ Create a ticket file already locked by us (POSIX only), returning False if ``flock`` is unavailable. """
         try:
-            files: list[str] = sorted(os.listdir(self.queue_dir))
-        except FileNotFoundError:
-            return False
-        if not files:
+            import fcntl
+        except (ImportError, ModuleNotFoundError):
             return False
+        tmp: str = os.path.join(self.queue_dir, f"~{uuid.uuid4().hex}.tmp")
+        f: IO[bytes] = open(tmp, "w+b")
         try:
-            head_ticket: int = int(files[0].split(".")[0])
-        except Exception:
+            f.write(str(time.time()).encode())
+            f.flush()
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB) # type: ignore
+            os.rename(tmp, p)
+        except OSError:
+            f.close()
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
             return False
-        return head_ticket == ticket
+        self.ticket_files[os.path.basename(p)] = f
+        return True
+
+    def is_head(self, ticket: int) -> bool:
+        if not os.path.exists(self.seq_path):
+            return False
+        with self.locked_state(exclusive=False) as state:
+            return state.is_queued(ticket) and state.head == ticket
 
     def remove(self, member: str) -> None:
         try:
-            p: str = os.path.join(self.queue_dir, member)
-            if os.path.exists(p):
-                os.remove(p)
+            ticket: int | None = parse_ticket(member)
+            with self.locked_state() as state:
+                p: str = os.path.join(self.queue_dir, member)
+                if os.path.exists(p):
+                    os.remove(p)
+                if ticket is not None:
+                    state.release(ticket)
         except Exception:
             pass
+        finally:
+            # Unlocking wakes up the waiter behind us, even if a forked child still has the file open
+            f: IO[bytes] | None = self.ticket_files.pop(member, None)
+            if f is not None:
+                try:
+                    unlock_file(f)
+                    f.close()
+                except Exception:
+                    pass
+
+    def wait_released(self, ticket: int, timeout: float | None) -> bool:
+        """ Wait until the owner of a ticket releases it, without polling.
+
+        Owners hold an exclusive ``flock`` on their ticket file from its creation
+        until its removal, so a shared ``flock`` on it is granted by the kernel as
+        soon as the owner removes it, or dies. A ticket file that still exists once
+        the lock is granted was left behind by a dead owner and is removed.
+
+        The blocking ``flock`` runs in a daemon thread shared by all the waiters of
+        the process on this ticket, so repeated waits (e.g. retries after a timeout)
+        never start more than one thread per ticket.
+
+        Returns:
+            bool: True once the ticket is released, False if the timeout expired first.
+        """
+        p: str = self.ticket_path(ticket)
+        with self.release_events_lock:
+            event: threading.Event | None = self.release_events.get(p)
+            if event is None:
+                try:
+                    f: IO[bytes] = open(p, "rb")
+                    event = threading.Event()
+                    self.release_events[p] = event
+                    threading.Thread(target=self.watch_ticket, args=(f, p, event), name="ticket-wait", daemon=True).start()
+                except FileNotFoundError:
+                    pass
+        if event is None:
+            self.remove(os.path.basename(p))
+            return True
+        return event.wait(timeout)
+
+    def watch_ticket(self, f: IO[bytes], p: str, event: threading.Event) -> None:
+        """ Block in ``flock`` until the ticket file ``f`` is released, then set ``event`` (run by :meth:`wait_released`). """
+        import fcntl
+        with f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_SH) # type: ignore
+                dead_owner: bool = os.path.samestat(os.fstat(f.fileno()), os.stat(p))
+            except OSError:
+                dead_owner = False
+        if dead_owner:
+            self.remove(os.path.basename(p))
+        with self.release_events_lock:
+            self.release_events.pop(p, None)
+        event.set()
+
+    def wait_turn(self, ticket: int, member: str, deadline: float | None, check_interval: float) -> bool:
+        """ Wait until ``ticket`` is the head of the queue, woken up by the release of the ticket just ahead of ours.
+
+        The queue state is read again at least every ``check_interval`` seconds,
+        so a ticket released without its ``flock`` being (e.g. still held by a
+        forked child) only delays the handoff. Falls back to polling (see
+        :meth:`BaseTicketQueue.wait_turn`) when our ticket is not locked (no
+        ``flock`` support) or is no longer queued.
+        """
+        if member not in self.ticket_files:
+            return super().wait_turn(ticket, member, deadline, check_interval)
+        while True:
+            with self.locked_state(exclusive=False) as state:
+                queued: bool = state.is_queued(ticket)
+                predecessor: int | None = state.predecessor(ticket)
+            if not queued:
+                return super().wait_turn(ticket, member, deadline, check_interval)
+            if predecessor is None:
+                return True
+
+            # Dead owners are detected by the flock wait, but a stale head (by mtime) is still skipped as when polling
+            self.cleanup_stale()
+            remaining: float | None = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            self.wait_released(predecessor, check_interval if remaining is None else min(check_interval, remaining))
 
     def cleanup_stale(self) -> None:
         """ Remove stale head ticket if its mtime exceeds the stale timeout. """
         stale: float | None = self.stale_timeout
-        if stale is None:
+        if stale is None or not os.path.exists(self.seq_path):
             return
-        try:
-            files: list[str] = sorted(os.listdir(self.queue_dir))
-            if not files:
-                return
-            head: str = files[0]
-            p: str = os.path.join(self.queue_dir, head)
+
+        def is_stale(state: TicketQueueState) -> bool:
+            if state.head > state.last:
+                return False
             try:
-                mtime: float = os.path.getmtime(p)
+                mtime: float = os.path.getmtime(self.ticket_path(state.head))
+            except FileNotFoundError:
+                mtime = 0.0  # Ticket given without its file (e.g. crash while registering)
             except Exception:
-                return
-            if time.time() - mtime >= stale:
-                try:
-                    os.remove(p)
-                except Exception:
-                    pass
+                return False
+            return time.time() - mtime >= stale
+
+        try:
+            # Check under a shared lock first, so waiters only take the exclusive lock when there is something to remove
+            with self.locked_state(exclusive=False) as state:
+                if not is_stale(state):
+                    return
+            with self.locked_state() as state:
+                if is_stale(state):
+                    try:
+                        os.remove(self.ticket_path(state.head))
+                    except Exception:
+                        pass
+                    state.release(state.head)
         except Exception:
             pass
 
     def is_empty(self) -> bool:
-        """Return True if the queue directory contains no ticket files.
-
-        The sequence file ``seq`` is ignored when determining emptiness.
-        """
+        """ Return True if no ticket is queued (the queue state in the ``seq`` file is a single read). """
+        if not os.path.exists(self.seq_path):
+            return True
         try:
-            files: list[str] = sorted(os.listdir(self.queue_dir))
+            with self.locked_state(exclusive=False) as state:
+                return state.head > state.last
         except Exception:
             return True
-        # Exclude the seq file which is used to allocate tickets
-        members = [f for f in files if f != "seq"]
-        return len(members) == 0
 
     def maybe_cleanup(self) -> None:
         """ Try to remove sequence file and queue dir if the queue is empty.
@@ -233,13 +508,18 @@ class FileTicketQueue(BaseTicketQueue):
         try:
             if not self.is_empty():
                 return
-            # Remove seq file if present
-            seq_path: str = os.path.join(self.queue_dir, "seq")
-            try:
-                if os.path.exists(seq_path):
-                    os.remove(seq_path)
-            except Exception:
-                pass
+            # Remove seq file while holding its lock, so clients waiting for it open a new one
+            with self.locked_state() as state:
+                if state.head <= state.last:
+                    return
+                try:
+                    os.remove(self.seq_path)
+                except Exception:
+                    pass
+            with self.thread_lock:
+                if self.seq_file is not None:
+                    self.seq_file.close()
+                    self.seq_file = None
             # Attempt to remove directory if empty
             try:
                 os.rmdir(self.queue_dir)
@@ -249,13 +529,40 @@ class FileTicketQueue(BaseTicketQueue):
             pass
 
 
+
+# The threads watching tickets do not exist in a forked child, so it starts without any
+def reset_release_events() -> None:
+    FileTicketQueue.release_events = {}
+    FileTicketQueue.release_events_lock = threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_release_events)
+
 class RedisTicketQueue(BaseTicketQueue):
     """ Redis-backed ticket queue using INCR + ZADD.
 
     Member format: ``{ticket}:{token}:{ts_ms}`` where ``ts_ms`` is the
-    insertion timestamp in milliseconds. The ZSET score is the ticket number
-    which provides ordering. This class performs stale head cleanup based on
-    the provided stale timeout.
+    insertion timestamp in milliseconds, taken from the Redis ``TIME`` command
+    so that clients on different hosts agree on the age of an entry. The ZSET
+    score is the ticket number which provides ordering. This class performs
+    stale head cleanup based on the provided stale timeout.
+
+    Every operation is a server-side Lua script (one round trip, loaded once
+    and then run with ``EVALSHA``), and :meth:`try_acquire` registers or
+    checks a ticket, removes the stale heads and ``SET NX`` the lock key
+    (``name``) when the ticket is the head, all atomically.
+
+    Waiters can block on their own ``{name}:wake:{ticket}`` list with
+    :meth:`wait_wakeup`, :meth:`wake_head` pushing a token to the head's list
+    whenever the lock key may have become available.
+
+    The queue, sequence and wake-up keys are prefixed with ``{name}`` (see
+    :attr:`key_prefix`), a hash tag putting them in the same Redis Cluster slot
+    as the lock key, as the scripts write to the wake-up list of the current
+    head, which cannot be declared in ``KEYS`` beforehand. The scripts read
+    ``TIME`` before writing, which needs Redis 3.2 or later (effects replication,
+    the default since Redis 5). ``BLPOP`` takes fractional timeouts from Redis 6.0,
+    older servers wait whole seconds instead (polling for sub-second waits).
 
     Examples:
         >>> # Redis queue examples; run only on non-Windows environments
@@ -269,9 +576,8 @@ class RedisTicketQueue(BaseTicketQueue):
         ...
         ...     name = "doctest:rq"
         ...     # Ensure clean start
-        ...     _ = client.delete(f"{name}:queue")
-        ...     _ = client.delete(f"{name}:seq")
         ...     q = RedisTicketQueue(name, client, stale_timeout=0.01)
+        ...     _ = client.delete(q.queue_key, q.seq_key)
         ...     t1, m1 = q.register()
         ...     t2, m2 = q.register()
         ...     q.is_head(t1)
@@ -279,9 +585,19 @@ class RedisTicketQueue(BaseTicketQueue):
         ...     q.remove(m1)
         ...     q.is_head(t2)
         ...     True
+        ...     # The lock key is free, so the head is woken up
+        ...     q.wake_head()
+        ...     assert q.wait_wakeup(t2, timeout=1)
         ...     q.remove(m2)
+        ...     # Register and acquire in one round trip, then wait behind the holder
+        ...     t3, m3, acquired = q.try_acquire("token3", ttl=1)
+        ...     t4, m4, waiting = q.try_acquire("token4", ttl=1)
+        ...     assert acquired and not waiting and q.is_head(t4)
+        ...     _ = client.delete(name)
+        ...     assert q.try_acquire("token4", ttl=1, member=m4) == (t4, m4, True)
+        ...     _ = client.delete(name)
         ...     q.maybe_cleanup()
-        ...     print(client.exists(f"{name}:queue") == 0 and client.exists(f"{name}:seq") == 0)
+        ...     print(client.exists(q.queue_key) == 0 and client.exists(q.seq_key) == 0)
         >>> import os
         >>> if os.name != 'nt':
         ...     _redis_ticket_queue_doctest()
@@ -290,10 +606,125 @@ class RedisTicketQueue(BaseTicketQueue):
         True
     """
 
-    def __init__(self, name: str, client: redis.Redis | None = None, stale_timeout: float | None = None) -> None:
+    SCRIPT_FUNCTIONS: str = """
+    -- KEYS: lock key, queue, seq / ARGV: wake prefix, wake expiry ms, stale ms (-1 for none), member, token, px ms (0 for none)
+    -- The wake-up lists (ARGV[1] .. ticket) share the hash tag of the other keys, so they are in the same cluster slot
+    if redis.replicate_commands then
+        redis.replicate_commands()
+    end
+
+    local function now_ms()
+        local now = redis.call('time')
+        return tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+    end
+
+    local function wake_head()
+        if redis.call('exists', KEYS[1]) == 1 then
+            return 0
+        end
+        local head = redis.call('zrange', KEYS[2], 0, 0)
+        if #head == 0 then
+            return 0
+        end
+        local key = ARGV[1] .. string.match(head[1], '^[^:]+')
+        redis.call('rpush', key, '1')
+        redis.call('pexpire', key, ARGV[2])
+        return 1
+    end
+
+    local function cleanup_stale(member)
+        local stale_ms = tonumber(ARGV[3])
+        local now = now_ms()
+        local removed = false
+        local head = redis.call('zrange', KEYS[2], 0, 0)[1]
+        while stale_ms >= 0 and head and head ~= member do
+            local ts = tonumber(string.match(head, ':(%d+)$'))
+            if not ts or now - ts < stale_ms then
+                break
+            end
+            redis.call('zrem', KEYS[2], head)
+            removed = true
+            head = redis.call('zrange', KEYS[2], 0, 0)[1]
+        end
+        if removed and head ~= member then
+            wake_head()
+        end
+        return head
+    end
+
+    local function register(ticket)
+        ticket = ticket or redis.call('incr', KEYS[3])
+        local member = ticket .. ':' .. ARGV[5] .. ':' .. now_ms()
+        redis.call('zadd', KEYS[2], ticket, member)
+        return ticket, member
+    end
+    """
+    """ Lua functions shared by the scripts, which all take the same keys and arguments (see :meth:`run_script`) """
+    REGISTER_SCRIPT: str = SCRIPT_FUNCTIONS + """
+    local ticket, member = register(nil)
+    return {ticket, member}
+    """
+    """ Take a ticket (``INCR``) and add it to the queue with the server time. """
+    CLEANUP_STALE_SCRIPT: str = SCRIPT_FUNCTIONS + """
+    cleanup_stale('')
+    return 0
+    """
+    """ Remove the heads older than the stale timeout, waking up the new head if the lock key is free. """
+    WAKE_HEAD_SCRIPT: str = SCRIPT_FUNCTIONS + """
+    return wake_head()
+    """
+    """ Push a wake-up token to the list of the queue head, unless the lock key is held. """
+    ACQUIRE_SCRIPT: str = SCRIPT_FUNCTIONS + """
+    local ticket, member
+    if ARGV[4] == '' then
+        ticket, member = register(nil)
+    else
+        member = ARGV[4]
+        ticket = tonumber(string.match(member, '^[^:]+'))
+        if not redis.call('zscore', KEYS[2], member) then
+            -- Removed as stale while still waiting: back at its place with a new timestamp
+            ticket, member = register(ticket)
+        end
+    end
+    if cleanup_stale(member) == member then
+        local ok
+        if tonumber(ARGV[6]) > 0 then
+            ok = redis.call('set', KEYS[1], ARGV[5], 'NX', 'PX', ARGV[6])
+        else
+            ok = redis.call('set', KEYS[1], ARGV[5], 'NX')
+        end
+        if ok then
+            redis.call('zrem', KEYS[2], member)
+            redis.call('del', ARGV[1] .. ticket)
+            return {ticket, member, 1}
+        end
+    end
+    return {ticket, member, 0}
+    """
+    """ Register (or check) a ticket, remove the stale heads and ``SET NX`` the lock key if the ticket is the head. """
+    WAKE_EXPIRY_MS: int = 60_000
+    """ Expiry of the wake-up lists, so tokens pushed to a ticket that left the queue do not linger. """
+    WAKEUP_POLL_INTERVAL: float = 0.02
+    """ Interval in seconds between the checks of a wake-up list, for sub-second waits on servers before Redis 6.0. """
+
+    def __init__(
+        self, name: str, client: redis.Redis | None = None, stale_timeout: float | None = None, async_client: redis.asyncio.Redis | None = None
+    ) -> None:
         self.name: str = name
+        # Redis Cluster hashes the part between the first "{" and the next "}" when it is not empty
+        tag_start: int = name.find("{")
+        has_hash_tag: bool = tag_start != -1 and name.find("}", tag_start + 1) > tag_start + 1
+        self.key_prefix: str = name if has_hash_tag else f"{{{name}}}"
+        """ Prefix of the queue keys, ``{name}`` so that they are in the Redis Cluster slot of the lock key ``name`` (unless it has its own hash tag) """
+        self.queue_key: str = f"{self.key_prefix}:queue"
+        self.seq_key: str = f"{self.key_prefix}:seq"
         self.client: redis.Redis | None = client
+        self.async_client: redis.asyncio.Redis | None = async_client
         self.stale_timeout: float | None = stale_timeout
+        self.scripts: dict[str, Any] = {}
+        self.async_scripts: dict[str, Any] = {}
+        self.fractional_timeouts: bool = True
+        """ Whether the server accepts fractional ``BLPOP`` timeouts (Redis 6.0 or later), set to False on the first rejection """
 
     def ensure_client(self) -> redis.Redis:
         if self.client is None:
@@ -301,20 +732,54 @@ class RedisTicketQueue(BaseTicketQueue):
             self.client = redis.Redis()
         return self.client
 
+    def run_script(self, script: str, member: str = "", token: str = "", px: int = 0) -> Any:
+        """ Run one of the Lua scripts of the class with ``EVALSHA`` (loading it on first use).
+
+        Args:
+            script (str): The script, e.g. :attr:`ACQUIRE_SCRIPT`
+            member (str): Queue member of the caller (empty if not registered yet)
+            token  (str): Token stored in new members and in the lock key
+            px     (int): Expiry of the lock key in milliseconds (0 for no expiry)
+        """
+        if script not in self.scripts:
+            self.scripts[script] = self.ensure_client().register_script(script)
+        return self.scripts[script](**self.script_arguments(member, token, px))
+
+    def script_arguments(self, member: str, token: str, px: int) -> dict[str, list[Any]]:
+        """ Return the keys and arguments shared by all the Lua scripts (see :attr:`SCRIPT_FUNCTIONS`). """
+        stale_ms: int = -1 if self.stale_timeout is None else int(self.stale_timeout * 1000)
+        return {
+            "keys": [self.name, self.queue_key, self.seq_key],
+            "args": [f"{self.key_prefix}:wake:", self.WAKE_EXPIRY_MS, stale_ms, member, token, px],
+        }
+
     def register(self) -> tuple[int, str]:
-        client: redis.Redis = self.ensure_client()
-        # redis-py may have a partly unknown return type; cast to int for Pylance
-        ticket: Any = client.incr(f"{self.name}:seq")
-        ts_ms: int = int(time.monotonic() * 1000)
-        token: str = uuid.uuid4().hex
-        member: str = f"{ticket}:{token}:{ts_ms}"
-        client.zadd(f"{self.name}:queue", {member: ticket})
-        return ticket, member
+        ticket, member = self.run_script(self.REGISTER_SCRIPT, token=uuid.uuid4().hex)
+        return int(ticket), member.decode()
+
+    def try_acquire(self, token: str, ttl: float | None = None, member: str | None = None) -> tuple[int, str, bool]:
+        """ Register a ticket (or check the given one) and ``SET NX`` the lock key if it is the head, in one round trip.
+
+        Stale heads are removed first. On success the member is removed from the
+        queue, otherwise it stays registered and must be passed to the next call.
+        A member removed as stale while still waiting is registered again with
+        the same ticket, so the returned member must always be used afterwards.
+
+        Args:
+            token  (str):          Value stored in the lock key (and in a new member)
+            ttl    (float | None): Expiry of the lock key in seconds (None for no expiry)
+            member (str | None):   Member returned by a previous call, None to register a new ticket
+        Returns:
+            tuple[int, str, bool]: The ticket, the member and whether the lock key was set
+        """
+        px: int = 0 if ttl is None else max(1, int(ttl * 1000))
+        ticket, new_member, acquired = self.run_script(self.ACQUIRE_SCRIPT, member or "", token, px)
+        return int(ticket), new_member.decode(), bool(acquired)
 
     def is_head(self, ticket: int) -> bool:
         client: redis.Redis = self.ensure_client()
         # zrange may return an Awaitable or a list of bytes; cast to list[bytes]
-        head = cast(list[bytes], client.zrange(f"{self.name}:queue", 0, 0))  # type: ignore[reportUnknownMemberType]
+        head = cast(list[bytes], client.zrange(self.queue_key, 0, 0))  # type: ignore[reportUnknownMemberType]
         if not head:
             return False
         head_member: str = head[0].decode()
@@ -327,38 +792,76 @@ class RedisTicketQueue(BaseTicketQueue):
     def remove(self, member: str) -> None:
         try:
             client: redis.Redis = self.ensure_client()
-            client.zrem(f"{self.name}:queue", member)
+            client.zrem(self.queue_key, member)
+            client.delete(self.wake_key(int(member.split(":")[0])))
         except Exception:
             pass
 
+    def wake_key(self, ticket: int) -> str:
+        """ Return the key of the list a waiter blocks on (``BLPOP``) until it is woken up. """
+        return f"{self.key_prefix}:wake:{ticket}"
+
+    def wake_head(self) -> None:
+        """ Wake up the waiter at the head of the queue if the lock key (``name``) is free, in one round trip.
+
+        Called whenever the lock may have become available to the head: on
+        release, when a waiter leaves the queue and when a stale head is removed.
+        """
+        try:
+            self.run_script(self.WAKE_HEAD_SCRIPT)
+        except Exception:
+            pass
+
+    def wait_wakeup(self, ticket: int, timeout: float) -> bool:
+        """ Block (``BLPOP``) until woken up by :meth:`wake_head` or until ``timeout`` seconds, without polling.
+
+        Before Redis 6.0, the timeout is rounded down to whole seconds, and a sub-second wait
+        polls the list (``LPOP`` every :attr:`WAKEUP_POLL_INTERVAL`), as fractional timeouts are rejected.
+
+        Returns:
+            bool: True if a wake-up token was received.
+        """
+        client: redis.Redis = self.ensure_client()
+        key: str = self.wake_key(ticket)
+        if self.fractional_timeouts:
+            try:
+                return client.blpop([key], timeout=max(0.01, timeout)) is not None # type: ignore
+            except Exception as exc:
+                if not self.reject_fractional_timeouts(exc):
+                    raise
+        if timeout >= 1:
+            return client.blpop([key], timeout=int(timeout)) is not None # type: ignore
+        deadline: float = time.monotonic() + timeout
+        while client.lpop(key) is None:
+            remaining: float = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self.WAKEUP_POLL_INTERVAL, remaining))
+        return True
+
+    def reject_fractional_timeouts(self, exc: Exception) -> bool:
+        """ Remember that the server rejects fractional ``BLPOP`` timeouts if exc is that error (Redis before 6.0).
+
+        Returns:
+            bool: True if exc is a rejected fractional timeout
+        """
+        if "timeout is not an integer" not in str(exc):
+            return False
+        self.fractional_timeouts = False
+        return True
+
     def cleanup_stale(self) -> None:
-        stale: float | None = self.stale_timeout
-        if stale is None:
+        if self.stale_timeout is None:
             return
         try:
-            client: redis.Redis = self.ensure_client()
-            # zrange may return an Awaitable or a list of bytes; cast to list[bytes]
-            head = cast(list[bytes], client.zrange(f"{self.name}:queue", 0, 0))  # type: ignore[reportUnknownMemberType]
-            if not head:
-                return
-            head_member: str = head[0].decode()
-            parts: list[str] = head_member.split(":" )
-            if len(parts) < 3:
-                return
-            ts_ms: int = int(parts[2])
-            age: float = (time.monotonic() * 1000) - ts_ms
-            if age >= (stale * 1000):
-                try:
-                    client.zrem(f"{self.name}:queue", head_member)
-                except Exception:
-                    pass
+            self.run_script(self.CLEANUP_STALE_SCRIPT)
         except Exception:
             pass
 
     def is_empty(self) -> bool:
         try:
             client: redis.Redis = self.ensure_client()
-            cnt = client.zcard(f"{self.name}:queue")
+            cnt = client.zcard(self.queue_key)
             return cnt == 0
         except Exception:
             # On error assume non-empty to avoid aggressive cleanup
@@ -375,9 +878,86 @@ class RedisTicketQueue(BaseTicketQueue):
                 return
             client: redis.Redis = self.ensure_client()
             try:
-                client.delete(f"{self.name}:queue")
-                client.delete(f"{self.name}:seq")
+                client.delete(self.queue_key)
+                client.delete(self.seq_key)
             except Exception:
                 pass
         except Exception:
             pass
+
+    # Asynchronous versions (``redis.asyncio``), used by RedisLockFifo.acquire_async()
+    def ensure_async_client(self) -> redis.asyncio.Redis:
+        if self.async_client is None:
+            from .shared import shared_async_redis_client
+            return shared_async_redis_client()
+        return self.async_client
+
+    async def run_script_async(self, script: str, member: str = "", token: str = "", px: int = 0) -> Any:
+        """ Asynchronous :meth:`run_script`. """
+        client: redis.asyncio.Redis = self.ensure_async_client()
+        if script not in self.async_scripts:
+            self.async_scripts[script] = client.register_script(script)
+        # The client is passed explicitly, as the shared one differs from an event loop to another
+        return await self.async_scripts[script](**self.script_arguments(member, token, px), client=client)
+
+    async def try_acquire_async(self, token: str, ttl: float | None = None, member: str | None = None) -> tuple[int, str, bool]:
+        """ Asynchronous :meth:`try_acquire`. """
+        px: int = 0 if ttl is None else max(1, int(ttl * 1000))
+        ticket, new_member, acquired = await self.run_script_async(self.ACQUIRE_SCRIPT, member or "", token, px)
+        return int(ticket), new_member.decode(), bool(acquired)
+
+    async def wait_wakeup_async(self, ticket: int, timeout: float) -> bool:
+        """ Asynchronous :meth:`wait_wakeup`, the coroutine waiting on its own connection without blocking the event loop. """
+        import asyncio
+        client: redis.asyncio.Redis = self.ensure_async_client()
+        key: str = self.wake_key(ticket)
+        if self.fractional_timeouts:
+            try:
+                return await client.blpop([key], timeout=max(0.01, timeout)) is not None # type: ignore
+            except Exception as exc:
+                if not self.reject_fractional_timeouts(exc):
+                    raise
+        if timeout >= 1:
+            return await client.blpop([key], timeout=int(timeout)) is not None # type: ignore
+        deadline: float = time.monotonic() + timeout
+        while await client.lpop(key) is None:
+            remaining: float = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(self.WAKEUP_POLL_INTERVAL, remaining))
+        return True
+
+    async def wake_head_async(self) -> None:
+        """ Asynchronous :meth:`wake_head`. """
+        try:
+            await self.run_script_async(self.WAKE_HEAD_SCRIPT)
+        except Exception:
+            pass
+
+    async def remove_async(self, member: str) -> None:
+        """ Asynchronous :meth:`remove`. """
+        try:
+            client: redis.asyncio.Redis = self.ensure_async_client()
+            await client.zrem(self.queue_key, member)
+            await client.delete(self.wake_key(int(member.split(":")[0])))
+        except Exception:
+            pass
+
+    async def cleanup_stale_async(self) -> None:
+        """ Asynchronous :meth:`cleanup_stale`. """
+        if self.stale_timeout is None:
+            return
+        try:
+            await self.run_script_async(self.CLEANUP_STALE_SCRIPT)
+        except Exception:
+            pass
+
+    async def maybe_cleanup_async(self) -> None:
+        """ Asynchronous :meth:`maybe_cleanup`. """
+        try:
+            client: redis.asyncio.Redis = self.ensure_async_client()
+            if await client.zcard(self.queue_key) == 0:
+                await client.delete(self.queue_key)
+                await client.delete(self.seq_key)
+        except Exception:
+            pass
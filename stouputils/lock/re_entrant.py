@@ -1,7 +1,7 @@
 
 # Imports
 import os
-from typing import ClassVar
+from typing import Any, ClassVar
 
 from .base import LockFifo
 
@@ -21,6 +21,9 @@ class RLockFifo(LockFifo):
         according to the lock's timeout and blocking parameters.
       - Implemented on top of :class:`LockFifo` and shares its constructor
         parameters and error semantics.
+      - With ``async with`` (or :meth:`acquire_async`), the owner is the current
+        asyncio task instead of the thread, as all the tasks of an event loop
+        share the same thread.
 
     Args:
         name               (str):           Lock filename or path. If a simple name is given,
@@ -61,6 +64,21 @@ class RLockFifo(LockFifo):
         >>> r.acquire(); r.acquire(); r.release(); r.release(); r.close()
         >>> os.path.exists(p + ".queue")
         False
+
+        >>> # Asynchronous re-entrancy is per task
+        >>> import asyncio
+        >>> async def _nested() -> None:
+        ...     r = RLockFifo(tmp + "/arlock", timeout=1)
+        ...     async with r:
+        ...         async with r:
+        ...             pass
+        ...         other = RLockFifo(tmp + "/arlock", timeout=0.1)
+        ...         await asyncio.create_task(other.acquire_async())
+        >>> try:
+        ...     asyncio.run(_nested())
+        ... except TimeoutError:
+        ...     print("timeout")
+        timeout
     """
     owners: ClassVar[dict[tuple[str, int, int], int]] = {}
     """ Mapping of owner keys to re-entrant acquisition counts. """
@@ -97,19 +115,41 @@ class RLockFifo(LockFifo):
         super().acquire(timeout=timeout, blocking=blocking, check_interval=check_interval)
         self.owners[self.key] = 1
 
+    async def acquire_async(self, timeout: float | None = None, blocking: bool | None = None, check_interval: float | None = None) -> None:
+        """ Asynchronous :meth:`acquire`, with re-entrancy for the same asyncio task (see :meth:`task_key`). """
+        key: tuple[str, int, int] = self.task_key()
+        cnt: int = self.owners.get(key, 0)
+        if cnt > 0:
+            self.owners[key] = cnt + 1
+            return
+        await super().acquire_async(timeout=timeout, blocking=blocking, check_interval=check_interval)
+        self.owners[key] = 1
+
+    def task_key(self) -> tuple[str, int, int]:
+        """ Owner key of the current asyncio task ``(path, pid, id(task))``, used instead of ``self.key`` by the async methods. """
+        import asyncio
+        return (self.path, os.getpid(), id(asyncio.current_task()))
+
     def release(self) -> None:
         """ Release the lock for this owner.
 
         Decrements the re-entrant counter for the current owner and only when
         the counter reaches zero the underlying :class:`LockFifo` is released.
         """
-        cnt: int = self.owners.get(self.key, 0)
+        self.release_owner(self.key)
+
+    def release_owner(self, key: tuple[str, int, int]) -> None:
+        """ Decrement the re-entrant counter of ``key``, releasing the underlying lock when it reaches zero. """
+        cnt: int = self.owners.get(key, 0)
         if cnt <= 1:
             # last release: release underlying lock
             try:
                 super().release()
             finally:
-                self.owners.pop(self.key, None)
+                self.owners.pop(key, None)
         else:
-            self.owners[self.key] = cnt - 1
+            self.owners[key] = cnt - 1
+
+    async def __aexit__(self, exc_type: type | None, exc: BaseException | None, tb: Any | None) -> None:
+        self.release_owner(self.task_key())
 
@@ -4,17 +4,21 @@ from __future__ import annotations
 
 import time
 import uuid
-from collections.abc import Awaitable
-from contextlib import AbstractContextManager
 from typing import TYPE_CHECKING, Any
 
 if TYPE_CHECKING:
+    import asyncio
+
     import redis
+    import redis.asyncio
+
+    from .queue import RedisTicketQueue
 
-from .shared import LockError, LockTimeoutError, resolve_acquire_defaults
+from ..ctx.common import AbstractBothContextManager
+from .shared import LockError, LockTimeoutError, acquire_local_gate, resolve_acquire_defaults, shared_async_redis_client
 
 
-class RedisLockFifo(AbstractContextManager["RedisLockFifo"]):
+class RedisLockFifo(AbstractBothContextManager["RedisLockFifo"]):
     """ A Redis-backed inter-process lock (requires `redis`).
 
     This lock provides optional Fifo fairness (enabled by default) and is
@@ -22,9 +26,25 @@ class RedisLockFifo(AbstractContextManager["RedisLockFifo"]):
     lock uses an owner token and `SET NX` (with optional PX expiry when a
     timeout/TTL is specified). When Fifo is enabled the implementation uses
     a small ticket queue using `INCR` + `ZADD` and only the queue head attempts
-    to `SET NX`. Release uses an atomic Lua script to ensure only the token
+    to `SET NX`: each attempt (registering the ticket on the first one, removing
+    stale heads, checking the head and setting the key) is a single Lua script
+    run with `EVALSHA`, so it costs one round trip and has no race window. Release uses an atomic Lua script to ensure only the token
     owner can delete the lock key.
 
+    In handoff mode (enabled by default with Fifo), waiters do not poll: each
+    one blocks with `BLPOP` on its own ``{name}:wake:{ticket}`` list, and the
+    releaser pushes a token to the list of the queue head, which then takes the
+    lock right away. The queue keys (``{name}:queue``, ``{name}:seq`` and the
+    wake-up lists) use ``{name}`` as a hash tag, so they share the Redis Cluster
+    slot of the lock key ``name``.
+
+    The lock also supports ``async with`` (see :meth:`acquire_async`), using
+    ``redis.asyncio`` so that waiting coroutines never block the event loop.
+    The coroutines of an event loop waiting on the same lock name first queue
+    locally (in arrival order), only the first one holding a ticket in Redis:
+    a process uses a single ticket and connection per lock however many
+    coroutines wait, and processes take turns.
+
     Notes:
       - The lock stores a locally-generated random token; releasing without the
         correct token has no effect on the remote key.
@@ -32,6 +52,9 @@ class RedisLockFifo(AbstractContextManager["RedisLockFifo"]):
         the lock; stale queue entries (from crashed clients) are removed lazily
         when their age exceeds ``fifo_stale_timeout`` (defaults to ``timeout`` if
         ``None``).
+      - In handoff mode, waiters still wake up every ``HANDOFF_MAX_WAIT`` seconds (or the stale timeout if shorter)
+        to clean stale entries and recover from a missed wake-up (e.g. a lock
+        key expiring through its TTL instead of being released).
       - This class raises ``ImportError`` if the ``redis`` package is not
         installed and raises ``LockTimeoutError`` / ``LockError`` for runtime
         acquisition errors.
@@ -39,11 +62,13 @@ class RedisLockFifo(AbstractContextManager["RedisLockFifo"]):
     Args:
         name               (str):           Redis key name used for the lock.
         redis_client       (redis.Redis | None): Optional Redis client. A client is created lazily if not provided.
+        async_redis_client (redis.asyncio.Redis | None): Optional asyncio Redis client used by ``async with``. If not provided, the locks of an event loop share one lazily created client (closed when the loop shuts down).
         timeout            (float | None):  Maximum time to wait for the lock and (when provided) the lock TTL used by ``SET PX`` in seconds. ``None`` means block indefinitely and no automatic expiry.
         blocking           (bool):          Whether to block until acquired (subject to ``timeout``).
-        check_interval     (float):         Poll interval while waiting for the lock, in seconds.
+        check_interval     (float):         Poll interval while waiting for the lock, in seconds (unused by Fifo waiters in handoff mode).
         fifo               (bool):          Whether to enforce Fifo ordering using a ZSET queue (default: True).
         fifo_stale_timeout (float | None):  Seconds after which a queue entry is considered stale; if ``None`` the lock's ``timeout`` value will be used; if both are ``None``, no stale cleanup is performed.
+        handoff            (bool):          Whether Fifo waiters block on `BLPOP` until the releaser wakes them up instead of polling (default: True).
 
     Raises:
         :py:exc:`ImportError`: If the ``redis`` package is not installed.
@@ -68,31 +93,47 @@ class RedisLockFifo(AbstractContextManager["RedisLockFifo"]):
         ...     with RedisLockFifo('test:lock', fifo=False, timeout=1):
         ...         pass
         ...
+        ...     # Polling Fifo usage example (no handoff)
+        ...     with RedisLockFifo('test:lock', handoff=False, timeout=1):
+        ...         pass
+        ...
+        ...     # Asynchronous usage: coroutines queue on the lock in order
+        ...     import asyncio
+        ...     async def _task(order: list[int], i: int) -> None:
+        ...         async with RedisLockFifo('test:lock:async', timeout=5):
+        ...             order.append(i)
+        ...             await asyncio.sleep(0.001)
+        ...     async def _main() -> list[int]:
+        ...         order: list[int] = []
+        ...         await asyncio.gather(*(_task(order, i) for i in range(20)))
+        ...         return order
+        ...     assert sorted(asyncio.run(_main())) == list(range(20))
+        ...
         ...     # Fifo stale-ticket behaviour (requires a local redis server)
         ...     # Inject a stale head entry
         ...     name = 'doctest:lock:stale'
-        ...     _ = client.delete(f"{name}:queue")
-        ...     _ = client.delete(f"{name}:seq")
+        ...     _ = client.delete(f"{{{name}}}:queue")
+        ...     _ = client.delete(f"{{{name}}}:seq")
         ...     _ = client.delete(name)
         ...     old_ts = int((time.time() - 10) * 1000)
-        ...     _ = client.zadd(f"{name}:queue", {f"1:stale:{old_ts}": 1})
+        ...     _ = client.zadd(f"{{{name}}}:queue", {f"1:stale:{old_ts}": 1})
         ...     # Now acquire with small stale timeout which should remove head then succeed
         ...     with RedisLockFifo(name, fifo=True, fifo_stale_timeout=0.01, timeout=1):
         ...         print('acquired')
-        ...     _ = client.delete(f"{name}:queue")
-        ...     _ = client.delete(f"{name}:seq")
+        ...     _ = client.delete(f"{{{name}}}:queue")
+        ...     _ = client.delete(f"{{{name}}}:seq")
         ...     _ = client.delete(name)
         ...     # After using the lock, the queue keys should be removed when empty
         ...     with RedisLockFifo(name, timeout=1):
         ...         pass
-        ...     print(client.exists(f"{name}:queue") == 0 and client.exists(f"{name}:seq") == 0)
+        ...     print(client.exists(f"{{{name}}}:queue") == 0 and client.exists(f"{{{name}}}:seq") == 0)
         ...
         ...     # Non-Fifo acquisition should not create queue keys
         ...     name2 = 'doctest:lock:nonfifo'
-        ...     _ = client.delete(f"{name2}:queue"); _ = client.delete(f"{name2}:seq")
+        ...     _ = client.delete(f"{{{name2}}}:queue"); _ = client.delete(f"{{{name2}}}:seq")
         ...     with RedisLockFifo(name2, fifo=False, timeout=1):
         ...         pass
-        ...     print(client.exists(f"{name2}:queue") == 0 and client.exists(f"{name2}:seq") == 0)
+        ...     print(client.exists(f"{{{name2}}}:queue") == 0 and client.exists(f"{{{name2}}}:seq") == 0)
         ...
         >>> import os
         >>> if os.name != 'nt':
@@ -112,6 +153,8 @@ class RedisLockFifo(AbstractContextManager["RedisLockFifo"]):
         return 0
     end
     """
+    HANDOFF_MAX_WAIT: float = 1.0
+    """ Maximum time in seconds a waiter blocks on its wake-up list before checking the queue again (handoff mode) """
 
     def __init__(
         self,
@@ -121,7 +164,9 @@ class RedisLockFifo(AbstractContextManager["RedisLockFifo"]):
         blocking: bool = True,
         check_interval: float = 0.05,
         fifo: bool = True,
-        fifo_stale_timeout: float | None = None
+        fifo_stale_timeout: float | None = None,
+        handoff: bool = True,
+        async_redis_client: redis.asyncio.Redis | None = None
     ) -> None:
         try:
             import redis  # type: ignore  # noqa: F401
@@ -129,15 +174,18 @@ class RedisLockFifo(AbstractContextManager["RedisLockFifo"]):
             raise ImportError("`redis` package is not installed; Please install it to use RedisLockFifo.") from e
         self.name: str = name
         self.client: redis.Redis | None = redis_client
+        self.async_client: redis.asyncio.Redis | None = async_redis_client
         self.timeout: float | None = timeout
         self.blocking: bool = blocking
         self.check_interval: float = check_interval
         self.fifo: bool = fifo
         self.fifo_stale_timeout: float | None = fifo_stale_timeout
+        self.handoff: bool = handoff
         self.token: str | None = None
         self.queue_member: str | None = None
+        self.gate: asyncio.Lock | None = None
         # Lazy queue backend; created on first Fifo acquisition
-        self.queue = None
+        self.queue: RedisTicketQueue | None = None
 
 
     def ensure_client(self) -> redis.Redis:
@@ -147,33 +195,19 @@ class RedisLockFifo(AbstractContextManager["RedisLockFifo"]):
             self.client = redis.Redis()
         return self.client
 
-    def _cleanup_stalequeue(self) -> None:
-        """ Remove a stale head member from the queue if it exceeds the stale timeout. """
-        if not self.fifo:
-            return
-        # Determine effective stale timeout (seconds)
-        stale: float | None = self.fifo_stale_timeout if self.fifo_stale_timeout is not None else self.timeout
-        if stale is None:
-            return
-        client: redis.Redis = self.ensure_client()
-        try:
-            head: Awaitable[Any] | Any = client.zrange(f"{self.name}:queue", 0, 0) # type: ignore
-            if not head:
-                return
-            head_member = str(head[0].decode()) # type: ignore
-            # member format: ticket:token:ts_ms
-            parts: list[str] = head_member.split(":")
-            if len(parts) < 3:
-                return
-            ts_ms: int = int(parts[2])
-            age: float = (time.monotonic() * 1000) - ts_ms
-            if age >= (stale * 1000):
-                try:
-                    client.zrem(f"{self.name}:queue", head_member)
-                except Exception:
-                    pass
-        except Exception:
-            pass
+    def ensure_async_client(self) -> redis.asyncio.Redis:
+        """ Return the given ``redis.asyncio.Redis`` client, or the one shared by the running event loop (see :func:`shared_async_redis_client`). """
+        if self.async_client is None:
+            return shared_async_redis_client()
+        return self.async_client
+
+    def ensure_queue(self) -> RedisTicketQueue:
+        """ Ensure the Fifo queue backend is available (lazy creation). """
+        if self.queue is None:
+            from .queue import RedisTicketQueue
+            stale_timeout: float | None = self.fifo_stale_timeout if self.fifo_stale_timeout is not None else self.timeout
+            self.queue = RedisTicketQueue(self.name, self.client, stale_timeout=stale_timeout, async_client=self.async_client)
+        return self.queue
 
     def _try_set_nx(self, token: str, timeout: float | None) -> bool:
         """ Attempt a single Redis SET NX with optional PX expiry. Raises LockError on client errors. """
@@ -189,7 +223,8 @@ class RedisLockFifo(AbstractContextManager["RedisLockFifo"]):
 
         When Fifo is enabled (default), this function obtains a ticket via INCR
         and registers it in a ZSET. The client waits until its ticket is the
-        head of the queue and then attempts to SET NX the lock key.
+        head of the queue and then attempts to SET NX the lock key, every attempt
+        being one round trip (see :meth:`~.queue.RedisTicketQueue.try_acquire`).
         """
         # Use instance defaults if parameters not provided
         blocking, timeout, check_interval, deadline = resolve_acquire_defaults(
@@ -212,44 +247,137 @@ class RedisLockFifo(AbstractContextManager["RedisLockFifo"]):
 
         # Fifo path using RedisTicketQueue backend
         try:
-            if self.queue is None:
-                from .queue import RedisTicketQueue
-                self.queue = RedisTicketQueue(self.name, self.client, stale_timeout=(self.fifo_stale_timeout if self.fifo_stale_timeout is not None else self.timeout))
-            ticket, member = self.queue.register()
-
+            queue: RedisTicketQueue = self.ensure_queue()
+            member: str | None = None
             while True:
-                self.queue.cleanup_stale()
-                if not self.queue.is_head(ticket):
-                    if not blocking:
-                        raise LockTimeoutError("Lock is already held and blocking is False")
-                    if deadline is not None and time.monotonic() >= deadline:
-                        raise LockTimeoutError(f"Timeout while waiting for redis lock '{self.name}'")
-                    time.sleep(check_interval)
-                    continue
-                # We're head; attempt to SET NX
-                if self._try_set_nx(token, timeout):
+                # Register (first attempt), remove stale heads and SET NX if head, in one round trip
+                try:
+                    ticket, member, acquired = queue.try_acquire(token, timeout, member)
+                except Exception as exc:
+                    raise LockError(str(exc)) from exc
+                self.queue_member = member
+                if acquired:
                     self.token = token
-                    try:
-                        self.queue.remove(member)
-                        self.queue_member = None
-                    except Exception:
-                        pass
+                    self.queue_member = None
                     return
                 if not blocking:
                     raise LockTimeoutError("Lock is already held and blocking is False")
                 if deadline is not None and time.monotonic() >= deadline:
                     raise LockTimeoutError(f"Timeout while waiting for redis lock '{self.name}'")
-                time.sleep(check_interval)
+                self._wait(ticket, deadline, check_interval)
         except Exception:
-            # On error, ensure we remove our queue entry if present
+            # On error, ensure we remove our queue entry if present, and hand the lock
+            # over to the next waiter in case we were woken up for it
             try:
                 if hasattr(self, "queue") and self.queue is not None and self.queue_member is not None:
                     self.queue.remove(self.queue_member)
                     self.queue_member = None
+                    if self.handoff:
+                        self.queue.wake_head()
             except Exception:
                 pass
             raise
 
+    def _wait(self, ticket: int, deadline: float | None, check_interval: float) -> None:
+        """ Wait before checking the queue again: block on the wake-up list of the ticket in handoff mode, sleep otherwise. """
+        if not self.handoff or self.queue is None:
+            time.sleep(check_interval)
+            return
+        wait: float = self.HANDOFF_MAX_WAIT
+        if self.queue.stale_timeout is not None:
+            wait = min(wait, self.queue.stale_timeout)
+        if deadline is not None:
+            wait = min(wait, deadline - time.monotonic())
+        try:
+            self.queue.wait_wakeup(ticket, wait)
+        except Exception as exc:
+            raise LockError(str(exc)) from exc
+
+    async def acquire_async(self, timeout: float | None = None, blocking: bool | None = None, check_interval: float | None = None) -> None:
+        """ Asynchronous :meth:`acquire` using ``redis.asyncio``, for use inside an event loop.
+
+        The behaviour is the same, but waiting coroutines only await (the
+        ``BLPOP`` of handoff mode or :func:`asyncio.sleep`), so hundreds of them
+        can queue on the lock without blocking the event loop nor using threads.
+        """
+        import asyncio
+        blocking, timeout, check_interval, deadline = resolve_acquire_defaults(
+            blocking, timeout, check_interval, self.blocking, self.timeout, self.check_interval
+        )
+        client: redis.asyncio.Redis = self.ensure_async_client()
+        token: str = uuid.uuid4().hex
+
+        # Non-Fifo fast path
+        if not self.fifo:
+            px: int | None = None if timeout is None else int((timeout or 0) * 1000)
+            while True:
+                try:
+                    ok: Any = await client.set(self.name, token, nx=True, px=px)
+                except Exception as exc:
+                    raise LockError(str(exc)) from exc
+                if ok:
+                    self.token = token
+                    return
+                if not blocking:
+                    raise LockTimeoutError("Lock is already held and blocking is False")
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise LockTimeoutError(f"Timeout while waiting for redis lock '{self.name}'")
+                await asyncio.sleep(check_interval)
+
+        # Queue behind the other coroutines of this event loop waiting on the same lock name
+        self.gate = await acquire_local_gate(f"redis:{self.name}", blocking, deadline)
+
+        # Fifo path, one round trip per attempt as in acquire()
+        queue: RedisTicketQueue = self.ensure_queue()
+        try:
+            member: str | None = None
+            while True:
+                try:
+                    ticket, member, acquired = await queue.try_acquire_async(token, timeout, member)
+                except Exception as exc:
+                    raise LockError(str(exc)) from exc
+                self.queue_member = member
+                if acquired:
+                    self.token = token
+                    self.queue_member = None
+                    return
+                if not blocking:
+                    raise LockTimeoutError("Lock is already held and blocking is False")
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise LockTimeoutError(f"Timeout while waiting for redis lock '{self.name}'")
+                await self._wait_async(ticket, deadline, check_interval)
+        except BaseException:
+            # Also on cancellation: leave the queue and hand the lock over to the next waiter
+            self.release_gate()
+            if self.queue_member is not None:
+                await queue.remove_async(self.queue_member)
+                self.queue_member = None
+                if self.handoff:
+                    await queue.wake_head_async()
+            raise
+
+    def release_gate(self) -> None:
+        """ Let the next coroutine of this event loop waiting on the lock name go (see :meth:`acquire_async`). """
+        if self.gate is not None:
+            self.gate.release()
+            self.gate = None
+
+    async def _wait_async(self, ticket: int, deadline: float | None, check_interval: float) -> None:
+        """ Asynchronous :meth:`_wait`. """
+        import asyncio
+        if not self.handoff or self.queue is None:
+            await asyncio.sleep(check_interval)
+            return
+        wait: float = self.HANDOFF_MAX_WAIT
+        if self.queue.stale_timeout is not None:
+            wait = min(wait, self.queue.stale_timeout)
+        if deadline is not None:
+            wait = min(wait, deadline - time.monotonic())
+        try:
+            await self.queue.wait_wakeup_async(ticket, wait)
+        except Exception as exc:
+            raise LockError(str(exc)) from exc
+
 
     def release(self) -> None:
         """ Release the lock if currently owned by this instance.
@@ -263,17 +391,20 @@ class RedisLockFifo(AbstractContextManager["RedisLockFifo"]):
         self.client = self.ensure_client()
 
         try:
-            # Use eval to run atomic check-and-del
+            # Use eval to run atomic check-and-del, then wake the next waiter up
             self.client.eval(self.RELEASE_SCRIPT, 1, self.name, self.token)
+            if self.handoff and self.queue is not None:
+                self.queue.wake_head()
         finally:
             # Ensure local state cleared and remove any queue entry we may have left
             try:
                 if self.queue_member is not None:
-                    self.client.zrem(f"{self.name}:queue", self.queue_member)
+                    self.client.zrem(self.ensure_queue().queue_key, self.queue_member)
             except Exception:
                 pass
             self.queue_member = None
             self.token = None
+            self.release_gate()
 
             # Best-effort cleanup of the queue keys when empty
             try:
@@ -289,6 +420,25 @@ class RedisLockFifo(AbstractContextManager["RedisLockFifo"]):
             except Exception:
                 pass
 
+    async def release_async(self) -> None:
+        """ Asynchronous :meth:`release` using ``redis.asyncio``. """
+        if not self.token:
+            return
+        client: redis.asyncio.Redis = self.ensure_async_client()
+        try:
+            await client.eval(self.RELEASE_SCRIPT, 1, self.name, self.token) # type: ignore
+            if self.handoff and self.queue is not None:
+                await self.queue.wake_head_async()
+        finally:
+            self.token = None
+            self.release_gate()
+            if self.queue is not None:
+                if self.queue_member is not None:
+                    await self.queue.remove_async(self.queue_member)
+                    self.queue_member = None
+                await self.queue.cleanup_stale_async()
+                await self.queue.maybe_cleanup_async()
+
     def __enter__(self) -> RedisLockFifo:
         self.acquire()
         return self
@@ -296,3 +446,10 @@ class RedisLockFifo(AbstractContextManager["RedisLockFifo"]):
     def __exit__(self, exc_type: type | None, exc: BaseException | None, tb: Any | None) -> None:
         self.release()
 
+    async def __aenter__(self) -> RedisLockFifo:
+        await self.acquire_async()
+        return self
+
+    async def __aexit__(self, exc_type: type | None, exc: BaseException | None, tb: Any | None) -> None:
+        await self.release_async()
+
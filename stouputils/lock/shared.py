@@ -1,8 +1,17 @@
 
 # Imports
+from __future__ import annotations
+
 import os
 import tempfile
 import time
+import weakref
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import asyncio
+
+    import redis.asyncio
 
 from ..io.path import clean_path
 
@@ -49,3 +58,74 @@ def resolve_acquire_defaults(
     deadline: float | None = None if timeout is None else (time.monotonic() + timeout)
     return blocking, timeout, check_interval, deadline
 
+
+# Per event loop, the asyncio locks queuing the coroutines waiting on the same lock (see acquire_local_gate())
+LOCAL_GATES: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, asyncio.Lock]] = weakref.WeakKeyDictionary()
+
+async def acquire_local_gate(key: str, blocking: bool, deadline: float | None) -> asyncio.Lock:
+    """ Wait for our turn among the coroutines of the running event loop waiting on the same lock, in arrival order.
+
+    Only the coroutine holding the gate takes part in the inter-process queue, so
+    any number of coroutines can wait on a lock at the cost of a single waiter.
+
+    Args:
+        key      (str):           Identifier of the lock (e.g. its path)
+        blocking (bool):          Whether to wait if another coroutine holds the gate
+        deadline (float | None):  ``time.monotonic()`` value after which to give up, ``None`` to wait indefinitely
+    Returns:
+        asyncio.Lock: The acquired gate, to release once the lock is released (or not acquired)
+
+    Examples:
+        >>> import asyncio
+        >>> async def _main() -> tuple[bool, bool]:
+        ...     gate = await acquire_local_gate("doctest", blocking=True, deadline=None)
+        ...     try:
+        ...         await acquire_local_gate("doctest", blocking=True, deadline=time.monotonic() + 0.01)
+        ...     except LockTimeoutError:
+        ...         timed_out = True
+        ...     gate.release()
+        ...     return timed_out, gate is await acquire_local_gate("doctest", blocking=False, deadline=None)
+        >>> asyncio.run(_main())
+        (True, True)
+    """
+    import asyncio
+    gate: asyncio.Lock = LOCAL_GATES.setdefault(asyncio.get_running_loop(), {}).setdefault(key, asyncio.Lock())
+    if not blocking and gate.locked():
+        raise LockTimeoutError("Lock is already held and blocking is False")
+    try:
+        await asyncio.wait_for(gate.acquire(), None if deadline is None else max(0.0, deadline - time.monotonic()))
+    except TimeoutError as exc:
+        raise LockTimeoutError(f"Timeout while waiting for lock '{key}'") from exc
+    return gate
+
+
+# Per event loop, the redis.asyncio client shared by the Redis locks created without one (see shared_async_redis_client())
+ASYNC_REDIS_CLIENTS: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, tuple[redis.asyncio.Redis, asyncio.Task[None]]] = weakref.WeakKeyDictionary()
+
+def shared_async_redis_client() -> redis.asyncio.Redis:
+    """ Return the ``redis.asyncio.Redis()`` client shared by the running event loop, creating it on first use.
+
+    Opening a connection per lock would cost a connect for each acquisition (and leave it unclosed),
+    so the Redis locks created without an async client share this one and its connection pool.
+    It is closed when the event loop shuts down and cancels its remaining tasks, as ``asyncio.run()`` does.
+
+    Returns:
+        redis.asyncio.Redis: The client of the running event loop
+    """
+    import asyncio
+    loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+    entry: tuple[redis.asyncio.Redis, asyncio.Task[None]] | None = ASYNC_REDIS_CLIENTS.get(loop)
+    if entry is None:
+        import redis.asyncio
+        client: redis.asyncio.Redis = redis.asyncio.Redis()
+        entry = ASYNC_REDIS_CLIENTS[loop] = (client, loop.create_task(close_at_shutdown(client)))
+    return entry[0]
+
+# "Private" task closing a shared client once cancelled by the shutdown of its event loop
+async def close_at_shutdown(client: redis.asyncio.Redis) -> None:
+    import asyncio
+    try:
+        await asyncio.get_running_loop().create_future()
+    finally:
+        ASYNC_REDIS_CLIENTS.pop(asyncio.get_running_loop(), None)
+        await client.aclose()
@@ -3,7 +3,16 @@ This module provides utility functions for parallel processing, such as:
 
 - :py:func:`~multi.multiprocessing`: Execute a function in parallel using multiprocessing
 - :py:func:`~multi.multithreading`: Execute a function in parallel using multithreading
+- :py:func:`~multi.imultiprocessing`: Lazy (generator) version of multiprocessing, for huge or streamed inputs
+- :py:func:`~multi.imultithreading`: Lazy (generator) version of multithreading, for huge or streamed inputs
+- :py:func:`~async_multi.amultithreading`: Asyncio-native version, awaiting coroutines (or running functions in threads) with bounded concurrency
+- :py:func:`~async_multi.amultiprocessing`: Asyncio-native version of multiprocessing, streaming the results as an async iterator
+- :py:class:`~pool.WorkerPool`: Persistent pool of warm worker processes, reusable across many calls
+- :py:class:`~shared_arrays.SharedArraysSession`: Zero-copy transport of NumPy arrays through shared memory (``shared_memory=True``)
+- :py:func:`~supervised.iter_supervised_results`: Workers killed and replaced one by one, for per-task ``timeout``, ``retries`` and ``on_error``
 - :py:func:`~subprocess.run_in_subprocess`: Execute a function in a subprocess with args and kwargs
+- :py:class:`~supervised.SubprocessPool`: Pool of warm isolated workers for run_in_subprocess, recycled after ``max_tasks_per_child`` calls
+- :py:func:`~benchmark.benchmark_parallel`: Benchmark multiprocessing and multithreading against a sequential run (``stouputils benchmark``)
 
 I highly encourage you to read the function docstrings to understand when to use each method.
 
@@ -22,8 +31,13 @@ Priority (nice) mapping for :py:func:`~multi.multiprocessing`:
 """
 
 # Imports
+from .async_multi import *
+from .benchmark import *
 from .capturer import *
 from .common import *
 from .multi import *
+from .pool import *
+from .shared_arrays import *
 from .subprocess import *
+from .supervised import *
 
@@ -0,0 +1,447 @@
+
+# Imports
+import asyncio
+import inspect
+from collections import deque
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable
+from functools import partial
+from itertools import count, repeat
+from typing import Any, cast
+
+from ..config import StouputilsConfig as Cfg
+from .capturer import CaptureOutput
+from .common import resolve_bar_format, resolve_max_workers, resolve_process_title, setup_smooth_tqdm, starmap
+from .multi import wrap_worker_chain
+
+
+# Small test functions for doctests
+async def doctest_async_square(x: int) -> int:
+	await asyncio.sleep(0.01)
+	return x * x
+
+# Functions
+async def amultithreading[T, R](
+	func: Callable[..., R] | Callable[..., Awaitable[R]] | list[Callable[..., Any]],
+	args: Iterable[T] | AsyncIterable[T],
+	use_starmap: bool = False,
+	max_concurrency: int | float = Cfg.CPU_COUNT,
+	ordered: bool = True,
+	max_in_flight: int | None = None,
+	desc: str = "",
+	delay_first_calls: float = 0,
+	color: str = Cfg.MAGENTA,
+	bar_format: str = Cfg.BAR_FORMAT,
+	ascii: bool = False,
+	smooth_tqdm: bool = True,
+	**tqdm_kwargs: Any
+) -> AsyncIterator[R]:
+	r""" Asyncio-native version of :py:func:`~stouputils.parallel.multi.imultithreading`, without blocking the event loop
+
+	- Coroutine functions are awaited directly in the event loop (ideal for I/O-bound fan-out: HTTP requests, database queries, ...)
+	- Regular functions are executed in a thread pool (like ``asyncio.to_thread``)
+
+	At most ``max_concurrency`` calls run at the same time (semaphore) and at most ``max_in_flight`` arguments
+	are pulled and not yet yielded, so ``args`` can be a huge (async) iterable.
+	Closing the async generator (e.g. breaking out of the loop) or cancelling the consuming task cancels the pending calls.
+
+	Args:
+		func				(Callable | list[Callable]):	Function or coroutine function to execute, or list of functions (one per argument)
+		args				(Iterable | AsyncIterable):	Arguments to pass to the function(s), consumed lazily
+		use_starmap			(bool):				Whether to use starmap or not (Defaults to False):
+			True means the function will be called like func(*args[i]) instead of func(args[i])
+		max_concurrency		(int | float):		Maximum number of calls running at the same time (Defaults to CPU_COUNT), -1 means CPU_COUNT.
+			If float between 0 and 1, it's treated as a percentage of CPU_COUNT.
+			If negative float between -1 and 0, it's treated as a percentage of len(args) (args must have a length).
+		ordered				(bool):				Whether to yield results in input order (Defaults to True),
+			if False, results are yielded as soon as they finish
+		max_in_flight		(int | None):		Maximum number of arguments pulled but not yet yielded
+			(Defaults to None, meaning 2 * max_concurrency)
+		desc				(str):				Description displayed in the progress bar
+			(if not provided no progress bar will be displayed)
+		delay_first_calls	(float):			Apply i*delay_first_calls seconds delay to the first "max_concurrency" calls.
+		color				(str):				Color of the progress bar (Defaults to MAGENTA)
+		bar_format			(str):				Format of the progress bar (Defaults to BAR_FORMAT)
+		ascii				(bool):				Whether to use ASCII or Unicode characters for the progress bar
+		smooth_tqdm			(bool):				Whether to enable smooth progress bar updates by setting miniters and mininterval (Defaults to True)
+		**tqdm_kwargs		(Any):				Additional keyword arguments to pass to tqdm
+
+	Returns:
+		AsyncIterator[object]:	Results of the function execution, yielded as they are available
+
+	Examples:
+		>>> async def collect(func, args, **kwargs):
+		...     return [result async for result in amultithreading(func, args, **kwargs)]
+
+		>>> asyncio.run(collect(doctest_async_square, range(5), max_concurrency=2))
+		[0, 1, 4, 9, 16]
+
+		>>> asyncio.run(collect(int.__mul__, [(1, 2), (3, 4)], use_starmap=True))
+		[2, 12]
+
+		>>> sorted(asyncio.run(collect([doctest_async_square, abs], [3, -4], ordered=False)))
+		[4, 9]
+
+		.. code-block:: python
+
+			> # Fan out 1000 requests with at most 50 of them at the same time, with a progress bar
+			> async for page in amultithreading(fetch_page, urls, max_concurrency=50, ordered=False, desc="Fetching"):
+			.     process(page)
+	"""
+	# Imports
+	from concurrent.futures import ThreadPoolExecutor
+
+	# Handle parameters
+	total, max_concurrency, bar_format = normalize_async_params(args, func, max_concurrency, color, bar_format, smooth_tqdm, tqdm_kwargs)
+	loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+	executor: ThreadPoolExecutor = ThreadPoolExecutor(max_concurrency)
+
+	async def call(index: int, item: tuple[Callable[[Any], Any], Any, bool]) -> Any:
+		callee, arg, is_async = item
+		if index < max_concurrency and delay_first_calls > 0:
+			await asyncio.sleep(index * delay_first_calls)
+		result: Any = callee(arg) if is_async else await loop.run_in_executor(executor, callee, arg)
+		return (await result) if inspect.isawaitable(result) else result
+
+	try:
+		results: AsyncIterator[Any] = amap_bounded(
+			call, aiter_calls(func, args, use_starmap), max_concurrency, max_in_flight or 2 * max_concurrency, ordered
+		)
+		async for result in aiter_progress(results, total, desc, color, bar_format, ascii, tqdm_kwargs):
+			yield result
+	finally:
+		# Running threads can't be interrupted, don't block the event loop waiting for them
+		executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def amultiprocessing[T, R](
+	func: Callable[..., R] | Callable[..., Awaitable[R]] | list[Callable[..., Any]],
+	args: Iterable[T] | AsyncIterable[T],
+	use_starmap: bool = False,
+	max_workers: int | float = Cfg.CPU_COUNT,
+	max_concurrency: int | None = None,
+	ordered: bool = True,
+	max_in_flight: int | None = None,
+	desc: str = "",
+	capture_output: bool = True,
+	delay_first_calls: float = 0,
+	nice: int | None = None,
+	process_title: str | None = None,
+	color: str = Cfg.MAGENTA,
+	bar_format: str = Cfg.BAR_FORMAT,
+	ascii: bool = False,
+	smooth_tqdm: bool = True,
+	**tqdm_kwargs: Any
+) -> AsyncIterator[R]:
+	r""" Asyncio-native version of :py:func:`~stouputils.parallel.multi.imultiprocessing`, without blocking the event loop
+
+	Each call is executed in a worker process, coroutine functions are run there with ``asyncio.run()``.
+	The results are streamed as an async iterator, and closing it (or cancelling the consuming task)
+	cancels the calls that did not start yet.
+
+	Args:
+		func				(Callable | list[Callable]):	Function or coroutine function to execute, or list of functions (one per argument)
+			(SHOULD BE TOP-LEVEL FUNCTIONS TO BE PICKLABLE)
+		args				(Iterable | AsyncIterable):	Arguments to pass to the function(s), consumed lazily
+		use_starmap			(bool):				Whether to use starmap or not (Defaults to False):
+			True means the function will be called like func(*args[i]) instead of func(args[i])
+		max_workers			(int | float):		Number of workers to use (Defaults to CPU_COUNT), -1 means CPU_COUNT.
+			If float between 0 and 1, it's treated as a percentage of CPU_COUNT.
+			If negative float between -1 and 0, it's treated as a percentage of len(args) (args must have a length).
+		max_concurrency		(int | None):		Maximum number of calls submitted to the workers at the same time
+			(Defaults to None, meaning max_workers)
+		ordered				(bool):				Whether to yield results in input order (Defaults to True),
+			if False, results are yielded as soon as they finish
+		max_in_flight		(int | None):		Maximum number of arguments pulled but not yet yielded
+			(Defaults to None, meaning 2 * max_concurrency)
+		desc				(str):				Description displayed in the progress bar
+			(if not provided no progress bar will be displayed)
+		capture_output		(bool):				Whether to capture stdout/stderr from the worker processes (Defaults to True)
+		delay_first_calls	(float):			Apply i*delay_first_calls seconds delay to the first "max_concurrency" calls.
+		nice				(int | None):		Adjust the priority of worker processes (Defaults to None).
+			Use Unix-style values: -20 (highest priority) to 19 (lowest priority).
+		process_title		(str | None):		If provided, sets the process title for worker processes.
+			If it starts with '+++', this prefix is replaced by the current process title.
+		color				(str):				Color of the progress bar (Defaults to MAGENTA)
+		bar_format			(str):				Format of the progress bar (Defaults to BAR_FORMAT)
+		ascii				(bool):				Whether to use ASCII or Unicode characters for the progress bar
+		smooth_tqdm			(bool):				Whether to enable smooth progress bar updates by setting miniters and mininterval (Defaults to True)
+		**tqdm_kwargs		(Any):				Additional keyword arguments to pass to tqdm
+
+	Returns:
+		AsyncIterator[object]:	Results of the function execution, yielded as they are available
+
+	Examples:
+		.. code-block:: python
+
+			> async def main():
+			.     return [result async for result in amultiprocessing(doctest_square, range(5), max_workers=2)]
+			> asyncio.run(main())
+			[0, 1, 4, 9, 16]
+
+			> # CPU-bound work from an async service, the event loop keeps serving requests meanwhile
+			> async for thumbnail in amultiprocessing(make_thumbnail, paths, ordered=False, desc="Thumbnails"):
+			.     await upload(thumbnail)
+	"""
+	# Imports
+	from concurrent.futures import ProcessPoolExecutor
+
+	# Handle parameters
+	total, max_workers_int, bar_format = normalize_async_params(args, func, max_workers, color, bar_format, smooth_tqdm, tqdm_kwargs)
+	concurrency: int = max(1, max_concurrency or max_workers_int)
+	loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+
+	# Wrap the calls with nice, process_title and capture_output if specified
+	capturer: CaptureOutput | None = CaptureOutput() if capture_output else None
+	if capturer is not None:
+		capturer.start_listener()
+	worker_func: Callable[[int, tuple[Callable[[Any], Any], Any]], Any] = partial(
+		run_worker_chain, nice, resolve_process_title(process_title), capturer
+	)
+	executor: ProcessPoolExecutor = ProcessPoolExecutor(max_workers=max_workers_int)
+
+	async def call(index: int, item: tuple[Callable[[Any], Any], Any, bool]) -> Any:
+		callee, arg, _ = item
+		if index < concurrency and delay_first_calls > 0:
+			await asyncio.sleep(index * delay_first_calls)
+		return await loop.run_in_executor(executor, worker_func, index, (callee, arg))
+
+	def shutdown() -> None:
+		executor.shutdown(wait=True, cancel_futures=True)
+		if capturer is not None:
+			capturer.parent_close_write()
+			capturer.join_listener(timeout=5.0)
+
+	try:
+		results: AsyncIterator[Any] = amap_bounded(
+			call, aiter_calls(func, args, use_starmap), concurrency, max_in_flight or 2 * concurrency, ordered
+		)
+		async for result in aiter_progress(results, total, desc, color, bar_format, ascii, tqdm_kwargs):
+			yield result
+	finally:
+		# Wait for the running calls in a thread to keep the event loop responsive
+		await asyncio.to_thread(shutdown)
+
+
+# "Private" helper shared by amultithreading and amultiprocessing to normalize parameters without consuming args
+def normalize_async_params(
+	args: Iterable[Any] | AsyncIterable[Any],
+	func: Callable[..., Any] | list[Callable[..., Any]],
+	max_workers: int | float,
+	color: str,
+	bar_format: str,
+	smooth_tqdm: bool,
+	tqdm_kwargs: dict[str, Any],
+) -> tuple[int | None, int, str]:
+	""" Async counterpart of :py:func:`~stouputils.parallel.common.normalize_lazy_parallel_params`.
+
+	Mutates tqdm_kwargs in place for smooth_tqdm settings.
+
+	Returns:
+		tuple: (total, max_workers_int, bar_format) where total is None if args has no length
+	"""
+	total: int | None = len(args) if hasattr(args, "__len__") else None # type: ignore
+	if isinstance(func, list):
+		nb_funcs: int = len(cast(list[Any], func))
+		assert total is None or nb_funcs == total, f"Length mismatch: {nb_funcs} functions but {total} arguments"
+	max_workers_int: int = max(1, resolve_max_workers(max_workers, total))
+	bar_format = resolve_bar_format(bar_format, color)
+	if smooth_tqdm:
+		setup_smooth_tqdm(tqdm_kwargs, total)
+	return total, max_workers_int, bar_format
+
+
+# "Private" function pairing each argument with the function to call, for sync or async iterables
+async def aiter_calls(
+	func: Callable[..., Any] | list[Callable[..., Any]],
+	args: Iterable[Any] | AsyncIterable[Any],
+	use_starmap: bool,
+) -> AsyncIterator[tuple[Callable[[Any], Any], Any, bool]]:
+	r""" Lazily yield (callee, arg, is_async) triples so that ``callee(arg)`` performs the call.
+
+	Args:
+		func		(Callable | list[Callable]):	Function to execute, or list of functions (one per argument)
+		args		(Iterable | AsyncIterable):		Arguments to pass to the function(s)
+		use_starmap	(bool):							Whether the function will be called like func(\*args[i]) instead of func(args[i])
+
+	Returns:
+		AsyncIterator[tuple]: (callee, arg, is_async) where is_async tells if the call returns a coroutine
+
+	Examples:
+		>>> async def collect():
+		...     return [item async for item in aiter_calls([abs, doctest_async_square], [(-1,), (2,)], True)]
+		>>> [(callee.__name__, arg[1], is_async) for callee, arg, is_async in asyncio.run(collect())]
+		[('starmap', (-1,), False), ('starmap', (2,), True)]
+	"""
+	funcs: Iterable[Callable[..., Any]] = cast(list[Callable[..., Any]], func) if isinstance(func, list) else repeat(func)
+	items: AsyncIterator[tuple[Callable[..., Any], Any]]
+	if isinstance(args, AsyncIterable):
+		items = (pair async for pair in azip(funcs, args))
+	else:
+		async def sync_items() -> AsyncIterator[tuple[Callable[..., Any], Any]]:
+			for pair in zip(funcs, args, strict=False):
+				yield pair
+		items = sync_items()
+	async for f, arg in items:
+		is_async: bool = inspect.iscoroutinefunction(f)
+		if use_starmap:
+			yield starmap, (f, arg), is_async
+		else:
+			yield f, arg, is_async
+
+
+# "Private" function zipping a sync iterable with an async iterable
+async def azip[A, B](first: Iterable[A], second: AsyncIterable[B]) -> AsyncIterator[tuple[A, B]]:
+	""" Async counterpart of ``zip(first, second)``, stopping when ``second`` is exhausted. """
+	first_iter = iter(first)
+	async for item in second:
+		yield next(first_iter), item
+
+
+# "Private" engine for async bounded concurrency shared by amultithreading and amultiprocessing
+async def amap_bounded[R](
+	call: Callable[[int, Any], Awaitable[R]],
+	items: AsyncIterator[Any],
+	max_concurrency: int,
+	max_in_flight: int,
+	ordered: bool = True,
+) -> AsyncIterator[R]:
+	""" Lazily run ``call(index, item)`` as asyncio tasks and yield the results as they finish.
+
+	At most ``max_concurrency`` calls run at the same time (semaphore), and at most ``max_in_flight``
+	items are pulled and not yet yielded. When the generator is closed, cancelled or a call fails,
+	the pending tasks are cancelled and awaited before leaving.
+
+	Args:
+		call			(Callable):			Coroutine function called with the index and the item
+		items			(AsyncIterator):	Items to process, consumed lazily
+		max_concurrency	(int):				Maximum number of calls running at the same time
+		max_in_flight	(int):				Maximum number of items pulled but not yet yielded
+		ordered			(bool):				Whether to yield results in input order (Defaults to True)
+
+	Returns:
+		AsyncIterator[R]: Results of the calls
+
+	Examples:
+		>>> async def call(index, item):
+		...     await asyncio.sleep(item / 100)
+		...     return index, item
+		>>> async def items():
+		...     for item in (3, 1, 2):
+		...         yield item
+		>>> async def collect(ordered):
+		...     return [result async for result in amap_bounded(call, items(), 3, 3, ordered)]
+		>>> asyncio.run(collect(True))
+		[(0, 3), (1, 1), (2, 2)]
+		>>> asyncio.run(collect(False))
+		[(1, 1), (2, 2), (0, 3)]
+	"""
+	semaphore: asyncio.Semaphore = asyncio.Semaphore(max_concurrency)
+	async def run(index: int, item: Any) -> R:
+		async with semaphore:
+			return await call(index, item)
+
+	pending: deque[asyncio.Task[R]] = deque()
+	indices: count[int] = count()
+	exhausted: bool = False
+	try:
+		while True:
+			# Pull items until the in-flight limit is reached
+			while not exhausted and len(pending) < max(1, max_in_flight):
+				try:
+					item: Any = await anext(items)
+				except StopAsyncIteration:
+					exhausted = True
+					break
+				pending.append(asyncio.ensure_future(run(next(indices), item)))
+			if not pending:
+				return
+
+			# Yield the next result in input order, or the first ones to finish
+			if ordered:
+				task: asyncio.Task[R] = pending.popleft()
+				yield await task
+			else:
+				done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+				for task in sorted(done, key=pending.index):
+					pending.remove(task)
+					yield task.result()
+	finally:
+		for task in pending:
+			task.cancel()
+		await asyncio.gather(*pending, return_exceptions=True)
+
+
+# "Private" function to display a progress bar while iterating over async results
+async def aiter_progress[R](
+	results: AsyncIterator[R],
+	total: int | None,
+	desc: str,
+	color: str,
+	bar_format: str,
+	ascii: bool,
+	tqdm_kwargs: dict[str, Any],
+) -> AsyncIterator[R]:
+	""" Yield the results, updating a tqdm progress bar if a description is provided. """
+	if not desc:
+		async for result in results:
+			yield result
+		return
+	from tqdm.auto import tqdm
+	pbar = tqdm(total=total, desc=color + desc, bar_format=bar_format, ascii=ascii, **tqdm_kwargs)
+	try:
+		async for result in results:
+			pbar.update(1)
+			yield result
+	finally:
+		pbar.close()
+
+
+# "Private" function running a call in a worker process, and its coroutine if it returns one (must be at module level for pickling)
+def run_awaitable_wrapper[T](args: tuple[Callable[[T], Any], T]) -> Any:
+	""" Wrapper function to execute the target function, running the returned coroutine with ``asyncio.run()`` if any.
+
+	Args:
+		tuple[Callable,T]: Tuple containing:
+			Callable: Target function (or coroutine function) to execute
+			T: Argument to pass to the target function
+
+	Returns:
+		object: Result of the function execution
+
+	Examples:
+		>>> run_awaitable_wrapper((doctest_async_square, 3)), run_awaitable_wrapper((abs, -3))
+		(9, 3)
+	"""
+	func, arg = args
+	result: Any = func(arg)
+	if inspect.iscoroutine(result):
+		return asyncio.run(result)
+	return result
+
+
+# "Private" function running a call of amultiprocessing through the worker wrappers (must be at module level for pickling)
+def run_worker_chain[T](
+	nice: int | None,
+	process_title: str | None,
+	capturer: CaptureOutput | None,
+	index: int,
+	item: tuple[Callable[[T], Any], T],
+) -> Any:
+	""" Run a (callee, arg) pair with :py:func:`run_awaitable_wrapper`, wrapped as :py:func:`~stouputils.parallel.multi.wrap_worker_chain` does.
+
+	Args:
+		nice			(int | None):				Priority of the worker process (None to skip)
+		process_title	(str | None):				Title of the worker process, already resolved (None to skip)
+		capturer		(CaptureOutput | None):		Capturer to redirect the worker output to (None to skip)
+		index			(int):						Index of the call, appended to the process title
+		item			(tuple[Callable,T]):		Target function (or coroutine function) and its argument
+
+	Returns:
+		object: Result of the function execution
+
+	Examples:
+		>>> run_worker_chain(None, None, None, 0, (doctest_async_square, 4))
+		16
+	"""
+	func, args = wrap_worker_chain(run_awaitable_wrapper, (item,), nice, process_title, capturer, first_index=index)
+	return func(next(args))
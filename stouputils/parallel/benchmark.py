@@ -0,0 +1,349 @@
+
+# Imports
+import time
+from collections.abc import Iterable, Sequence
+from typing import Any, Literal
+
+from ..config import StouputilsConfig as Cfg
+
+# Constants
+BENCHMARK_BACKENDS: tuple[str, ...] = ("sequential", "multiprocessing", "multithreading")
+""" Backends compared by :py:func:`benchmark_parallel`, "sequential" being the baseline of the speedups """
+BENCHMARK_FIELDS: tuple[str, ...] = (
+	"backend", "start_method", "kind", "task_cost", "payload_size", "n_tasks",
+	"chunksize", "workers", "capture_output", "repeats", "best", "median", "speedup",
+)
+""" Keys of every result row returned by :py:func:`benchmark_parallel` (and columns of the CSV output) """
+
+
+# "Private" task used by the benchmark, top-level so it can be pickled to spawned workers
+def benchmark_task(kind: str, cost: float, payload: bytes) -> bytes:
+	""" Simulate a task taking `cost` seconds and sending back a payload of the same size.
+
+	Args:
+		kind	(str):		"cpu" for a busy loop holding the GIL, "io" for a sleep releasing it
+		cost	(float):	Duration of the task in seconds
+		payload	(bytes):	Data received by the worker, returned as is to measure the transport both ways
+	Returns:
+		bytes: The payload
+
+	Examples:
+		>>> benchmark_task("cpu", 0.001, b"abc")
+		b'abc'
+		>>> benchmark_task("io", 0, b"")
+		b''
+	"""
+	if kind == "io":
+		time.sleep(cost)
+	else:
+		end: float = time.perf_counter() + cost
+		while time.perf_counter() < end:
+			pass
+	return payload
+
+
+# "Private" unpacking wrapper for the sequential baseline
+def star_benchmark_task(arg: tuple[str, float, bytes]) -> bytes:
+	""" Call :py:func:`benchmark_task` with the unpacked tuple """
+	return benchmark_task(*arg)
+
+
+# "Private" function to time a single configuration
+def time_backend(
+	backend: str,
+	args: list[tuple[str, float, bytes]],
+	chunksize: int | Literal["auto"],
+	workers: int,
+	capture_output: bool,
+	repeats: int,
+) -> list[float]:
+	""" Run the benchmark task over args `repeats` times with the given backend and return the durations.
+
+	Args:
+		backend			(str):				One of :py:data:`BENCHMARK_BACKENDS`
+		args			(list[tuple]):		Arguments of :py:func:`benchmark_task` (one tuple per task)
+		chunksize		(int | "auto"):		Chunksize given to multiprocessing
+		workers			(int):				Number of workers given to multiprocessing and multithreading
+		capture_output	(bool):				Whether multiprocessing captures the output of the workers
+		repeats			(int):				Number of timed runs
+	Returns:
+		list[float]: Duration of each run in seconds
+
+	Examples:
+		>>> durations = time_backend("multithreading", [("io", 0.01, b"")] * 4, 1, 4, False, 2)
+		>>> len(durations), all(0.01 <= d < 0.04 for d in durations)
+		(2, True)
+	"""
+	from .common import run_sequential
+	from .multi import multiprocessing, multithreading
+
+	durations: list[float] = []
+	for _ in range(repeats):
+		start: float = time.perf_counter()
+		if backend == "sequential":
+			run_sequential(star_benchmark_task, args, False, "", "", False, {})
+		elif backend == "multithreading":
+			multithreading(benchmark_task, args, use_starmap=True, max_workers=workers)
+		elif backend == "multiprocessing":
+			multiprocessing(
+				benchmark_task, args, use_starmap=True, chunksize=chunksize,
+				max_workers=workers, capture_output=capture_output,
+			)
+		else:
+			raise ValueError(f"Unknown backend '{backend}', expected one of {BENCHMARK_BACKENDS}")
+		durations.append(time.perf_counter() - start)
+	return durations
+
+
+# Function to sweep the parallel backends over many configurations
+def benchmark_parallel(
+	task_costs: Iterable[float] = (0.0001, 0.001, 0.01),
+	payload_sizes: Iterable[int] = (0, 100_000),
+	chunksizes: Iterable[int | Literal["auto"]] = (1, "auto"),
+	workers: Iterable[int] = (Cfg.CPU_COUNT,),
+	capture_outputs: Iterable[bool] = (False, True),
+	start_methods: Iterable[str | None] = (None,),
+	kinds: Iterable[str] = ("cpu",),
+	backends: Iterable[str] = BENCHMARK_BACKENDS,
+	n_tasks: int = 64,
+	repeats: int = 3,
+	verbose: bool = True,
+) -> list[dict[str, Any]]:
+	""" Benchmark :py:func:`~multi.multiprocessing` and :py:func:`~multi.multithreading`
+	against a sequential run, sweeping over every combination of the given parameters.
+
+	Each backend is only swept over the parameters it depends on
+	(e.g. the sequential baseline ignores workers and chunksize, multithreading ignores the start method),
+	the irrelevant fields of its rows are set to None.
+	The pool start-up is part of the measured time, as it is paid on every call.
+
+	Args:
+		task_costs		(Iterable[float]):			Duration of a single task in seconds
+		payload_sizes	(Iterable[int]):			Size in bytes of the data sent to each task and returned by it
+		chunksizes		(Iterable[int | "auto"]):	Chunksizes given to multiprocessing
+		workers			(Iterable[int]):			Worker counts given to multiprocessing and multithreading
+		capture_outputs	(Iterable[bool]):			capture_output values given to multiprocessing
+		start_methods	(Iterable[str | None]):		Multiprocessing start methods ("fork", "spawn", "forkserver"),
+			None meaning the current one. Methods unavailable on this platform are skipped with a warning.
+		kinds			(Iterable[str]):			"cpu" (busy loop holding the GIL) and/or "io" (sleep releasing it)
+		backends		(Iterable[str]):			Backends to run, among :py:data:`BENCHMARK_BACKENDS`
+		n_tasks			(int):						Number of tasks per run
+		repeats			(int):						Number of timed runs per configuration (best and median are kept)
+		verbose			(bool):						Whether to print each configuration as it is measured
+	Returns:
+		list[dict[str, Any]]: One row per configuration, with the keys of :py:data:`BENCHMARK_FIELDS`.
+			"speedup" is the best sequential time divided by the best time of the row (None without a baseline).
+
+	Examples:
+		>>> rows = benchmark_parallel(
+		...     task_costs=[0.02], payload_sizes=[16], workers=[4], kinds=["io"],
+		...     backends=["sequential", "multithreading"], n_tasks=4, repeats=1, verbose=False,
+		... )
+		>>> [(r["backend"], r["workers"], r["chunksize"]) for r in rows]
+		[('sequential', None, None), ('multithreading', 4, None)]
+		>>> rows[0]["speedup"], rows[1]["speedup"] > 1
+		(1.0, True)
+	"""
+	import multiprocessing as mp
+	import statistics
+
+	from ..ctx.set_mp_start_method import SetMPStartMethod
+	from ..print.message import info, warning
+
+	# Materialize the sweep and check the parameters
+	backends = list(backends)
+	for backend in backends:
+		if backend not in BENCHMARK_BACKENDS:
+			raise ValueError(f"Unknown backend '{backend}', expected one of {BENCHMARK_BACKENDS}")
+	chunksizes, workers, capture_outputs = list(chunksizes), list(workers), list(capture_outputs)
+	available: list[str] = mp.get_all_start_methods()
+	methods: list[str | None] = []
+	for method in start_methods:
+		if method is None or method in available:
+			methods.append(method)
+		else:
+			warning(f"Start method '{method}' is not available on this platform, skipping it (available: {available})")
+
+	rows: list[dict[str, Any]] = []
+	for kind in kinds:
+		for task_cost in task_costs:
+			for payload_size in payload_sizes:
+				args: list[tuple[str, float, bytes]] = [(kind, task_cost, bytes(payload_size))] * n_tasks
+				group: list[dict[str, Any]] = []
+
+				# Build the configurations of this group, only over the parameters each backend depends on
+				configs: list[dict[str, Any]] = []
+				if "sequential" in backends:
+					configs.append({"backend": "sequential", "start_method": None, "chunksize": None, "workers": None, "capture_output": None})
+				if "multithreading" in backends:
+					configs.extend(
+						{"backend": "multithreading", "start_method": None, "chunksize": None, "workers": w, "capture_output": None}
+						for w in workers
+					)
+				if "multiprocessing" in backends:
+					configs.extend(
+						{"backend": "multiprocessing", "start_method": m, "chunksize": c, "workers": w, "capture_output": o}
+						for m in methods for c in chunksizes for w in workers for o in capture_outputs
+					)
+
+				# Measure each configuration
+				for config in configs:
+					with SetMPStartMethod(config["start_method"]):
+						durations: list[float] = time_backend(
+							config["backend"], args, config["chunksize"] or 1,
+							config["workers"] or 1, bool(config["capture_output"]), repeats,
+						)
+					row: dict[str, Any] = {
+						**config, "kind": kind, "task_cost": task_cost, "payload_size": payload_size,
+						"n_tasks": n_tasks, "repeats": repeats,
+						"best": min(durations), "median": statistics.median(durations), "speedup": None,
+					}
+					group.append({field: row[field] for field in BENCHMARK_FIELDS})
+					if verbose:
+						info(
+							f"{config['backend']:<16} kind={kind} cost={task_cost:g}s payload={payload_size}B "
+							f"chunksize={config['chunksize']} workers={config['workers']} capture={config['capture_output']} "
+							f"start={config['start_method']} -> best {row['best']:.4f}s"
+						)
+
+				# Compute the speedups against the sequential baseline
+				baseline: float | None = next((r["best"] for r in group if r["backend"] == "sequential"), None)
+				if baseline is not None:
+					for r in group:
+						r["speedup"] = round(baseline / r["best"], 3) if r["best"] > 0 else None
+				rows.extend(group)
+	return rows
+
+
+# Function to format the benchmark results as a table
+def benchmark_summary(rows: Sequence[dict[str, Any]]) -> str:
+	""" Format the rows returned by :py:func:`benchmark_parallel` as a text table.
+
+	The fastest configuration of each (kind, task_cost, payload_size) group is marked with a trailing star.
+
+	Args:
+		rows	(Sequence[dict[str, Any]]):	Benchmark results
+	Returns:
+		str: The table, one line per row
+
+	Examples:
+		>>> base = {"start_method": None, "kind": "cpu", "task_cost": 0.01, "payload_size": 0, "n_tasks": 8, "repeats": 1}
+		>>> print(benchmark_summary([
+		...     {**base, "backend": "sequential", "chunksize": None, "workers": None, "capture_output": None,
+		...      "best": 0.08, "median": 0.08, "speedup": 1.0},
+		...     {**base, "backend": "multiprocessing", "start_method": "fork", "chunksize": 1, "workers": 4,
+		...      "capture_output": False, "best": 0.025, "median": 0.03, "speedup": 3.2},
+		... ]))
+		backend          start  kind  task_cost  payload  chunksize  workers  capture  best (s)  speedup
+		sequential       -      cpu   0.01       0        -          -        -        0.0800    1.00x
+		multiprocessing  fork   cpu   0.01       0        1          4        False    0.0250    3.20x    *
+	"""
+	def fmt(value: Any) -> str:
+		return "-" if value is None else str(value)
+
+	# Find the fastest row of each group
+	fastest: dict[tuple[Any, ...], float] = {}
+	for row in rows:
+		key: tuple[Any, ...] = (row["kind"], row["task_cost"], row["payload_size"])
+		fastest[key] = min(fastest.get(key, row["best"]), row["best"])
+
+	# Build the cells, then align the columns
+	header: list[str] = ["backend", "start", "kind", "task_cost", "payload", "chunksize", "workers", "capture", "best (s)", "speedup"]
+	table: list[list[str]] = [header]
+	marks: list[str] = [""]
+	for row in rows:
+		table.append([
+			row["backend"], fmt(row["start_method"]), row["kind"], f"{row['task_cost']:g}", str(row["payload_size"]),
+			fmt(row["chunksize"]), fmt(row["workers"]), fmt(row["capture_output"]), f"{row['best']:.4f}",
+			"-" if row["speedup"] is None else f"{row['speedup']:.2f}x",
+		])
+		marks.append("*" if row["best"] == fastest[(row["kind"], row["task_cost"], row["payload_size"])] else "")
+	widths: list[int] = [max(len(line[i]) for line in table) for i in range(len(header))]
+	return "\n".join(
+		"  ".join(cell.ljust(width) for cell, width in [*zip(line, widths, strict=True), (mark, 0)]).rstrip()
+		for mark, line in zip(marks, table, strict=True)
+	)
+
+
+# Main entry point for command line usage
+def benchmark_cli() -> None:
+	""" Main entry point for command line usage.
+
+	Examples:
+
+	.. code-block:: bash
+
+		# Quick sweep with the default parameters, printing a summary table
+		stouputils benchmark --quick
+
+		# Compare fork and spawn on heavy payloads and save the results
+		stouputils benchmark --start-methods fork spawn --payload-sizes 0 1000000 -o results.csv
+
+		# Find the best chunksize for tiny tasks
+		stouputils benchmark --task-costs 0.00001 --chunksizes 1 8 64 auto --n-tasks 2000
+	"""
+	import argparse
+
+	from ..print.message import info
+
+	def chunksize_type(value: str) -> int | Literal["auto"]:
+		return "auto" if value == "auto" else int(value)
+
+	def start_method_type(value: str) -> str | None:
+		return None if value in ("default", "none") else value
+
+	# Setup command line argument parser
+	parser: argparse.ArgumentParser = argparse.ArgumentParser(
+		prog="stouputils benchmark",
+		description="Benchmark multiprocessing() and multithreading() against a sequential run.",
+		formatter_class=argparse.RawDescriptionHelpFormatter,
+		epilog=f"""{Cfg.CYAN}Examples:{Cfg.RESET}
+  stouputils benchmark --quick
+  stouputils benchmark --start-methods fork spawn --payload-sizes 0 1000000 -o results.csv
+  stouputils benchmark --task-costs 0.00001 --chunksizes 1 8 64 auto --n-tasks 2000"""
+	)
+	parser.add_argument("--task-costs", type=float, nargs="+", default=[0.0001, 0.001, 0.01], help="Duration of a task in seconds")
+	parser.add_argument("--payload-sizes", type=int, nargs="+", default=[0, 100_000], help="Bytes sent to and returned by each task")
+	parser.add_argument("--chunksizes", type=chunksize_type, nargs="+", default=[1, "auto"], help="Chunksizes for multiprocessing (int or 'auto')")
+	parser.add_argument("--workers", type=int, nargs="+", default=[Cfg.CPU_COUNT], help="Worker counts")
+	parser.add_argument("--capture-output", choices=["on", "off", "both"], default="both", help="capture_output of multiprocessing")
+	parser.add_argument("--start-methods", type=start_method_type, nargs="+", default=[None], help="Start methods (fork, spawn, forkserver or default)")
+	parser.add_argument("--kinds", choices=["cpu", "io"], nargs="+", default=["cpu"], help="'cpu' busy loop (holds the GIL) or 'io' sleep")
+	parser.add_argument("--backends", choices=BENCHMARK_BACKENDS, nargs="+", default=list(BENCHMARK_BACKENDS), help="Backends to run")
+	parser.add_argument("-n", "--n-tasks", type=int, default=64, help="Number of tasks per run")
+	parser.add_argument("-r", "--repeats", type=int, default=3, help="Timed runs per configuration")
+	parser.add_argument("-o", "--output", type=str, default=None, help="Save the results to a .json or .csv file")
+	parser.add_argument("-q", "--quick", action="store_true", help="Single cost, no payload, no capture and one repeat")
+	args: argparse.Namespace = parser.parse_args()
+
+	# Reduce the sweep if asked
+	capture_outputs: list[bool] = {"on": [True], "off": [False], "both": [False, True]}[args.capture_output]
+	if args.quick:
+		args.task_costs, args.payload_sizes, args.repeats = [0.001], [0], 1
+		capture_outputs = [False]
+
+	# Run the benchmark
+	rows: list[dict[str, Any]] = benchmark_parallel(
+		task_costs=args.task_costs,
+		payload_sizes=args.payload_sizes,
+		chunksizes=args.chunksizes,
+		workers=args.workers,
+		capture_outputs=capture_outputs,
+		start_methods=args.start_methods,
+		kinds=args.kinds,
+		backends=args.backends,
+		n_tasks=args.n_tasks,
+		repeats=args.repeats,
+	)
+	print(f"\n{benchmark_summary(rows)}")
+
+	# Save the results
+	if args.output:
+		if args.output.lower().endswith(".csv"):
+			from ..io.csv import csv_dump
+			csv_dump(rows, args.output)
+		else:
+			from ..io.json import json_dump
+			json_dump(rows, args.output)
+		info(f"Results saved to '{args.output}'")
+
@@ -1,28 +1,179 @@
 
 # Imports
 import os
-from typing import IO, Any
+import select
+import threading
+import time
+from typing import IO, Any, ClassVar
 
+from ..config import StouputilsConfig as Cfg
 from ..io.utils import safe_close
 
 
 class PipeWriter:
-	""" A writer that sends data to a multiprocessing Connection. """
-	def __init__(self, conn: Any, encoding: str, errors: str):
+	""" A buffered writer that sends data to a multiprocessing Connection.
+
+	Writes are accumulated and sent as a single message, instead of one message per write:
+
+	- When ``BUFFER_SIZE`` characters are pending
+	- ``FLUSH_INTERVAL`` seconds after the first pending write, by a daemon thread (so output stays real-time)
+	- When :py:meth:`drain` is called, e.g. by :py:meth:`CaptureOutput.child_close` and when the process exits
+
+	Only complete lines are sent (an incomplete line is sent if it's still incomplete after another ``FLUSH_INTERVAL``),
+	in messages of at most ``MESSAGE_SIZE`` bytes, so that the lines of different processes don't mix.
+	:py:meth:`flush` doesn't send immediately (progress bars flush on every update), the data is sent within ``FLUSH_INTERVAL``.
+
+	Args:
+		conn		(Connection):	Write end of the pipe
+		encoding	(str):			Encoding of the sent bytes
+		errors		(str):			Error handling of the encoding
+		prefix		(str):			Prefix added at the start of each line (Defaults to no prefix)
+
+	Examples:
+		>>> from multiprocessing import Pipe
+		>>> read_conn, write_conn = Pipe(duplex=False)
+		>>> writer = PipeWriter(write_conn, "utf-8", "replace", prefix="[w1] ")
+		>>> writer.write("Hello"), writer.write(" World\\nBye\\n")
+		(5, 11)
+		>>> writer.drain()
+		>>> read_conn.recv_bytes()
+		b'[w1] Hello World\\n[w1] Bye\\n'
+		>>> read_conn.poll()
+		False
+	"""
+	BUFFER_SIZE: int = 64 * 1024
+	""" Number of pending characters triggering a send """
+	FLUSH_INTERVAL: float = 0.1
+	""" Maximum delay in seconds between a write and the send of its data """
+	MESSAGE_SIZE: int = getattr(select, "PIPE_BUF", 4096) - 4
+	""" Maximum size in bytes of a message, so that its write (with the 4 bytes header) to the pipe is atomic """
+	START_GUARD: ClassVar[threading.Lock] = threading.Lock()
+	""" Lock ensuring only one thread starts the flusher thread of a writer in a process """
+
+	def __init__(self, conn: Any, encoding: str, errors: str, prefix: str = ""):
+		from multiprocessing.util import Finalize
 		self.conn: Any = conn
 		self.encoding: str = encoding
 		self.errors: str = errors
+		self.prefix: str = prefix
+		self.pending: list[str] = []
+		self.pending_size: int = 0
+		self.at_line_start: bool = True
+		self.writes: int = 0
+		self.lock: threading.Lock = threading.Lock()
+		self.has_pending: threading.Event = threading.Event()
+		self.flusher: threading.Thread | None = None
+		self.flusher_pid: int | None = None
+
+		# Send the pending data when the process exits (worker processes exit with os._exit(), skipping atexit)
+		Finalize(self, self.drain, exitpriority=100)
 
 	def write(self, data: str) -> int:
-		self.conn.send_bytes(data.encode(self.encoding, errors=self.errors))
+		if not data:
+			return 0
+		if self.flusher_pid != os.getpid():
+			self.start_flusher()
+		with self.lock:
+			text: str = self.add_prefix(data) if self.prefix else data
+			self.pending.append(text)
+			self.pending_size += len(text)
+			self.writes += 1
+			if self.pending_size >= self.BUFFER_SIZE:
+				self.send_pending(complete_lines=True)
+			if self.pending and not self.has_pending.is_set():
+				self.has_pending.set()
 		return len(data)
 
 	def flush(self) -> None:
-		pass
+		pass	# Pending data is sent by the flusher thread within FLUSH_INTERVAL
+
+	def drain(self) -> None:
+		""" Send all the pending data now. """
+		with self.lock:
+			self.send_pending()
 
 	def isatty(self) -> bool:
 		return False
 
+	def set_connection(self, conn: Any, encoding: str, errors: str, prefix: str) -> None:
+		""" Send the pending data to the current connection, then write to another one (reusing the flusher thread). """
+		with self.lock:
+			self.send_pending()
+			self.conn, self.encoding, self.errors, self.prefix = conn, encoding, errors, prefix
+
+	def add_prefix(self, data: str) -> str:
+		""" Add the prefix at the start of each line of the data (a line starts after "\\n" or "\\r"), with the lock held. """
+		parts: list[str] = []
+		for line in data.splitlines(keepends=True):
+			if self.at_line_start:
+				parts.append(self.prefix)
+			parts.append(line)
+			self.at_line_start = line.endswith(("\n", "\r"))
+		return "".join(parts)
+
+	def send_pending(self, complete_lines: bool = False) -> None:
+		""" Send the pending data as a single message (must be called with the lock held).
+
+		Args:
+			complete_lines (bool): Whether to keep the last incomplete line pending (unless it's longer than BUFFER_SIZE)
+		"""
+		if not self.pending:
+			return
+		text: str = "".join(self.pending)
+		self.pending.clear()
+		if complete_lines:
+			cut: int = text.rfind("\n") + 1
+			if cut == 0 and len(text) < self.BUFFER_SIZE:
+				self.pending.append(text)	# Only an incomplete line, keep it
+				return
+			if 0 < cut < len(text):
+				self.pending.append(text[cut:])
+				text = text[:cut]
+		self.pending_size = len(self.pending[0]) if self.pending else 0
+
+		# Writes to a pipe shared by many processes are only atomic up to PIPE_BUF bytes,
+		# so the data is sent in messages small enough not to be interleaved (cut after a newline if possible)
+		data: bytes = text.encode(self.encoding, errors=self.errors)
+		start: int = 0
+		try:
+			while start < len(data):
+				end: int = len(data)
+				if end - start > self.MESSAGE_SIZE:
+					end = (data.rfind(b"\n", start, start + self.MESSAGE_SIZE) + 1) or (start + self.MESSAGE_SIZE)
+				self.conn.send_bytes(data, start, end - start)
+				start = end
+		except (OSError, ValueError):
+			pass	# The pipe is closed, nobody is listening anymore
+
+	def start_flusher(self) -> None:
+		""" Start the daemon thread sending the pending data, once per process (again after a fork, threads are not inherited). """
+		with self.START_GUARD:
+			if self.flusher_pid == os.getpid():
+				return	# Started by another thread in the meantime
+			self.lock = threading.Lock()	# A lock inherited from a fork may be held by a thread that doesn't exist here
+			self.has_pending = threading.Event()
+			self.flusher = threading.Thread(target=self.flusher_loop, daemon=True)
+			self.flusher.start()
+			self.flusher_pid = os.getpid()	# Set last, so other threads skip the start only once the new lock is in place
+
+	def flusher_loop(self) -> None:
+		""" Send the pending lines FLUSH_INTERVAL seconds after the first pending write, forever. """
+		last_writes: int = -1
+		while True:
+			self.has_pending.wait()
+			time.sleep(self.FLUSH_INTERVAL)
+			with self.lock:
+				# If nothing was written since the previous interval, the incomplete line is sent as is
+				self.send_pending(complete_lines=self.writes != last_writes)
+				last_writes = self.writes
+				if not self.pending:
+					self.has_pending.clear()
+
+
+# The start guard may be held by a thread that doesn't exist in a forked child
+if hasattr(os, "register_at_fork"):
+	os.register_at_fork(after_in_child=lambda: setattr(PipeWriter, "START_GUARD", threading.Lock()))
+
 
 class CaptureOutput:
 	""" Utility to capture stdout/stderr from a subprocess and relay it to the parent's stdout.
@@ -31,22 +182,38 @@ class CaptureOutput:
 	provides methods to start a listener thread that reads from the pipe and writes
 	to the main process's sys.stdout/sys.stderr, and to close/join the listener.
 
-	>>> capturer = CaptureOutput(encoding="utf-8", errors="replace")
+	The child side buffers its output (see :py:class:`PipeWriter`) and the listener joins all the
+	available messages before writing them at once, so chatty workers cost a few syscalls per interval
+	instead of a few per print().
+
+	Args:
+		encoding	(str):			Encoding of the relayed output (Defaults to "utf-8")
+		errors		(str):			Error handling of the encoding (Defaults to "replace")
+		prefix		(str | None):	Prefix added to each line of the child output, can contain ``{pid}`` and ``{name}``
+			placeholders (process id and name) to tell interleaved workers apart (Defaults to Cfg.CAPTURE_OUTPUT_PREFIX)
+
+	Examples:
+		>>> capturer = CaptureOutput(encoding="utf-8", errors="replace", prefix="[worker] ")
+		>>> capturer.start_listener()		# In the parent: start the thread relaying the output
 
-	>>> pass # send capturer object to subprocess
-	>>> capturer.redirect()  # Redirects sys.stdout/sys.stderr to the pipe
+		>>> pass # In the child (after sending the capturer object to the subprocess):
+		>>> pass # capturer.redirect()		# Redirects sys.stdout/sys.stderr to the pipe
+		>>> pass # capturer.child_close()	# Sends the pending output and restores sys.stdout/sys.stderr
 
-	>>> pass # in parent process:
-	>>> #capturer.parent_close_write()  # Close parent's write end
-	>>> capturer.start_listener()      # Start listener thread to read from pipe
-	>>> ...                            # do other work
-	>>> capturer.join_listener(timeout=0.1)       # Wait for listener to finish (on EOF)
+		>>> writer = PipeWriter(capturer.write_conn, "utf-8", "replace", prefix="[worker] ")
+		>>> _ = writer.write("Hello from the child\\n")
+		>>> pass # Send the output, close parent's write end (EOF once the children closed theirs) and wait for the listener
+		>>> writer.drain(); capturer.parent_close_write(); capturer.join_listener(timeout=5.0)
+		[worker] Hello from the child
 	"""
-	def __init__(self, encoding: str = "utf-8", errors: str = "replace"):
+	BLOCK_SIZE: int = 1024 * 1024
+	""" Maximum number of bytes joined by the listener before writing them """
+
+	def __init__(self, encoding: str = "utf-8", errors: str = "replace", prefix: str | None = None):
 		import multiprocessing as mp
-		import threading
 		self.encoding: str = encoding
 		self.errors: str = errors
+		self.prefix: str = Cfg.CAPTURE_OUTPUT_PREFIX if prefix is None else prefix
 		self.read_conn: Any = None
 		self.write_conn: Any = None
 		self.read_conn, self.write_conn = mp.Pipe(duplex=False)
@@ -72,9 +239,18 @@ class CaptureOutput:
 		return state
 
 	def redirect(self) -> None:
-		""" Redirect sys.stdout and sys.stderr to the pipe's write end. """
+		""" Redirect sys.stdout and sys.stderr to the pipe's write end.
+
+		If they are already redirected (e.g. called once per task in a worker), the existing writer is reused.
+		"""
+		import multiprocessing as mp
 		import sys
-		writer = PipeWriter(self.write_conn, self.encoding, self.errors)
+		prefix: str = self.prefix.format(pid=os.getpid(), name=mp.current_process().name) if self.prefix else ""
+		writer: Any = sys.stdout
+		if isinstance(writer, PipeWriter):
+			writer.set_connection(self.write_conn, self.encoding, self.errors, prefix)
+		else:
+			writer = PipeWriter(self.write_conn, self.encoding, self.errors, prefix)
 		sys.stdout = writer
 		sys.stderr = writer
 
@@ -84,57 +260,61 @@ class CaptureOutput:
 		self.write_fd = -1	# Prevent accidental reuse
 
 	def child_close(self) -> None:
-		""" Close the child's copy of the write end; the parent's copy remains. """
+		""" Send the pending output and close the child's copy of the write end; the parent's copy remains. """
 		import sys
+		if isinstance(sys.stdout, PipeWriter):
+			sys.stdout.drain()
 		sys.stdout = sys.__stdout__
 		sys.stderr = sys.__stderr__
 		self.parent_close_write()
 
 	def start_listener(self) -> None:
 		""" Start a daemon thread that forwards data from the pipe to sys.stdout/sys.stderr. """
+		import codecs
 		import sys
 		if self._thread is not None:
 			return
 
-		# Handler function for reading from the pipe
-		buffer: str = ""
-		def _handle_buffer() -> None:
-			nonlocal buffer
-			if buffer:
-				try:
-					sys.stdout.write(buffer)
-					sys.stdout.flush()
-				except Exception:
-					pass
-				buffer = ""
+		# Write a block of data to the parent's stdout (one write and one flush for many messages)
+		# (the incremental decoder keeps the end of a character cut between two messages)
+		decoder = codecs.getincrementaldecoder(self.encoding)(errors=self.errors)
+		def _write(data: bytes, final: bool = False) -> None:
+			try:
+				chunk: str = decoder.decode(data, final=final)
+			except Exception:
+				chunk = data.decode(self.encoding, errors="replace")
+			if not chunk:
+				return
+			try:
+				sys.stdout.write(chunk)
+				sys.stdout.flush()
+			except Exception:
+				pass
 
 		# Thread target function
 		def _reader() -> None:
-			nonlocal buffer
 			try:
-				while True:
-					# Read the next message from the pipe. Use recv_bytes() without a maxlength
-					# so we don't error when a single message is larger than our chunk size.
+				eof: bool = False
+				while not eof:
+					# Block until the next message, then join all the messages already available.
+					# Use recv_bytes() without a maxlength so we don't error when a single message is large.
+					messages: list[bytes] = []
+					size: int = 0
 					try:
-						data: bytes = self.read_conn.recv_bytes()
+						messages.append(self.read_conn.recv_bytes())
+						size = len(messages[0])
+						while size < self.BLOCK_SIZE and self.read_conn.poll():
+							messages.append(self.read_conn.recv_bytes())
+							size += len(messages[-1])
 					except (EOFError, OSError, BrokenPipeError):
-						_handle_buffer()
-						break
-
-					# Decode bytes to text & append to buffer
-					try:
-						chunk: str = data.decode(self.encoding, errors=self.errors)
-					except Exception:
-						chunk = data.decode(self.encoding, errors="replace")
-					buffer += chunk
-					_handle_buffer()
+						eof = True
+					_write(b"".join(messages), final=eof)
 			finally:
 				safe_close(self.read_conn)
 				self.read_fd = -1
 				self._thread = None		# Mark thread as stopped so callers don't block unnecessarily
 
 		# Start the listener thread
-		import threading
 		self._thread = threading.Thread(target=_reader, daemon=True)
 		self._thread.start()
 
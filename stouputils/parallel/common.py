@@ -2,7 +2,8 @@
 # Imports
 import os
 import time
-from collections.abc import Callable, Iterable
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Executor
 from typing import Any, cast
 
 # Constants (aliased from configuration)
@@ -145,28 +146,123 @@ def handle_parameters[T, R](
 	"""
 	desc = color + desc
 
-	# Handle list of functions: validate and convert to starmap format
+	# Validate list of functions eagerly since the arguments are already a list
+	if isinstance(func, list):
+		nb_funcs: int = len(cast(list[Any], func))
+		assert nb_funcs == len(args), f"Length mismatch: {nb_funcs} functions but {len(args)} arguments"
+
+	lazy_func, args_iter = handle_parameters_lazily(func, args, use_starmap, delay_first_calls, max_workers) # type: ignore
+	return desc, lazy_func, list(args_iter)
+
+
+# "Private" function to wrap the arguments lazily (without consuming the iterable)
+def handle_parameters_lazily[T, R](
+	func: Callable[[T], R] | list[Callable[[T], R]],
+	args: Iterable[T],
+	use_starmap: bool,
+	delay_first_calls: float,
+	max_workers: int,
+) -> tuple[Callable[[Any], R], Iterator[Any]]:
+	r""" Lazy counterpart of :py:func:`handle_parameters`, the arguments are wrapped one by one when consumed.
+
+	Args:
+		func				(Callable | list[Callable]):	Function to execute, or list of functions (one per argument)
+		args				(Iterable):			Iterable of arguments to pass to the function(s)
+		use_starmap			(bool):				Whether the function will be called like func(\*args[i]) instead of func(args[i])
+		delay_first_calls	(int):				Apply i*delay_first_calls seconds delay to the first "max_workers" calls
+		max_workers			(int):				Number of workers to use
+
+	Returns:
+		tuple[Callable, Iterator]:	Tuple containing the function to call and the iterator of its arguments
+
+	Examples:
+		>>> func, args = handle_parameters_lazily(int.__mul__, iter([(1, 2), (3, 4)]), True, 0, 2)
+		>>> [func(arg) for arg in args]
+		[2, 12]
+		>>> func, args = handle_parameters_lazily([abs, str], [-1, 2], False, 0, 2)
+		>>> [func(arg) for arg in args]
+		[1, '2']
+	"""
+	from itertools import count, repeat
+	args_iter: Iterator[Any] = iter(args)
+
+	# Handle list of functions: convert to starmap format
+	# (zip() with repeat() binds the current function immediately, unlike a generator expression)
 	if isinstance(func, list):
 		# pyrefly: ignore [redundant-cast]
 		func = cast(list[Callable[[T], R]], func)
-		assert len(func) == len(args), f"Length mismatch: {len(func)} functions but {len(args)} arguments"
-		args = [(f, arg if use_starmap else (arg,)) for f, arg in zip(func, args, strict=False)] # type: ignore
+		args_iter = ((f, arg if use_starmap else (arg,)) for f, arg in zip(func, args_iter, strict=True))
 		func = starmap # type: ignore
 
 	# If use_starmap is True, we use the _starmap function
 	elif use_starmap:
-		args = [(func, arg) for arg in args] # type: ignore
+		args_iter = zip(repeat(func), args_iter)
 		func = starmap # type: ignore
 
 	# Prepare delayed function calls if delay_first_calls is set
 	if delay_first_calls > 0:
-		args = [ # type: ignore
-			(func, i * delay_first_calls if i < max_workers else 0, arg)
-			for i, arg in enumerate(args)
-		]
+		delays: Iterator[float] = (i * delay_first_calls if i < max_workers else 0 for i in count())
+		args_iter = zip(repeat(func), delays, args_iter)
 		func = delayed_call  # type: ignore
 
-	return desc, func, args # type: ignore
+	return func, args_iter # type: ignore
+
+
+# Private helper shared by multiprocessing and multithreading to schedule the most expensive tasks first
+def sort_by_cost[T](
+	func: Callable[..., Any] | list[Callable[..., Any]],
+	args: Iterable[T],
+	cost: Callable[[T], float],
+) -> tuple[Callable[..., Any] | list[Callable[..., Any]], list[T], list[int]]:
+	""" Sort the arguments by decreasing cost (Longest Processing Time first scheduling).
+
+	Starting the most expensive tasks first, while idle workers keep pulling the next task,
+	prevents a single slow task at the end from leaving all the other workers idle.
+	Tasks with the same cost keep their input order. Use :py:func:`restore_input_order` on the results.
+
+	Args:
+		func	(Callable | list[Callable]):	Function to execute, or list of functions (one per argument, sorted too)
+		args	(Iterable):						Arguments to pass to the function(s)
+		cost	(Callable):						Function estimating the cost of an argument (e.g. a file size)
+
+	Returns:
+		tuple: (func, sorted_args, order) where order[i] is the input index of sorted_args[i]
+
+	Examples:
+		>>> sort_by_cost(abs, ["a", "ccc", "bb", "d"], cost=len)
+		(<built-in function abs>, ['ccc', 'bb', 'a', 'd'], [1, 2, 0, 3])
+		>>> sort_by_cost([abs, str], [1, 2], cost=lambda x: x)[:2]
+		([<class 'str'>, <built-in function abs>], [2, 1])
+	"""
+	args_list: list[T] = list(args)
+	costs: list[float] = [cost(arg) for arg in args_list]
+	order: list[int] = sorted(range(len(args_list)), key=costs.__getitem__, reverse=True)
+	if isinstance(func, list):
+		funcs: list[Callable[..., Any]] = cast(list[Callable[..., Any]], func)
+		assert len(funcs) == len(args_list), f"Length mismatch: {len(funcs)} functions but {len(args_list)} arguments"
+		func = [funcs[i] for i in order]
+	return func, [args_list[i] for i in order], order
+
+
+# Private helper to put back results computed in the order given by sort_by_cost
+def restore_input_order[R](results: list[R], order: list[int]) -> list[R]:
+	""" Put back results computed in a custom order in the input order.
+
+	Args:
+		results	(list):			Results, where results[i] corresponds to the input index order[i]
+		order	(list[int]):	Input index of each result (as returned by :py:func:`sort_by_cost`)
+
+	Returns:
+		list: Results in input order
+
+	Examples:
+		>>> restore_input_order(["ccc", "bb", "a", "d"], [1, 2, 0, 3])
+		['a', 'ccc', 'bb', 'd']
+	"""
+	restored: list[Any] = [None] * len(results)
+	for result, index in zip(results, order, strict=True):
+		restored[index] = result
+	return restored
 
 
 # Private helper shared by multiprocessing and multithreading to normalize parameters
@@ -195,6 +291,88 @@ def normalize_parallel_params(
 	args_list: list[Any] = list(args)
 
 	# Normalize max_workers
+	max_workers_int: int = resolve_max_workers(max_workers, len(args_list))
+
+	# Determine verbosity and handle parameters
+	verbose: bool = desc != ""
+	desc, func, args_list = handle_parameters(func, args_list, use_starmap, delay_first_calls, max_workers_int, desc, color)
+
+	# Substitute color in bar_format if it matches the default, and setup smooth tqdm if enabled
+	bar_format = resolve_bar_format(bar_format, color)
+	if smooth_tqdm:
+		setup_smooth_tqdm(tqdm_kwargs, len(args_list))
+
+	# Return normalized parameters
+	return args_list, max_workers_int, verbose, desc, func, bar_format
+
+
+# Private helper shared by imultiprocessing and imultithreading to normalize parameters without consuming args
+def normalize_lazy_parallel_params(
+	func: Callable[..., Any] | list[Callable[..., Any]],
+	args: Iterable[Any],
+	use_starmap: bool,
+	delay_first_calls: float,
+	max_workers: int | float,
+	desc: str,
+	color: str,
+	bar_format: str,
+	smooth_tqdm: bool,
+	tqdm_kwargs: dict[str, Any],
+) -> tuple[Iterator[Any], int | None, int, bool, str, Any, str]:
+	""" Lazy counterpart of :py:func:`normalize_parallel_params`, args are never turned into a list.
+
+	The total number of arguments is only known if ``args`` has a length (list, range, ...),
+	otherwise it is None (e.g. for generators) and the progress bar has no total.
+	Mutates tqdm_kwargs in place for smooth_tqdm settings.
+
+	Returns:
+		tuple: (args_iterator, total, max_workers_int, verbose, desc, func, bar_format)
+	"""
+	# Retrieve the total number of arguments if available
+	total: int | None = len(args) if hasattr(args, "__len__") else None # type: ignore
+	if isinstance(func, list):
+		nb_funcs: int = len(cast(list[Any], func))
+		assert total is None or nb_funcs == total, f"Length mismatch: {nb_funcs} functions but {total} arguments"
+
+	# Normalize max_workers
+	max_workers_int: int = resolve_max_workers(max_workers, total)
+
+	# Determine verbosity and handle parameters
+	verbose: bool = desc != ""
+	desc = color + desc
+	lazy_func, args_iter = handle_parameters_lazily(func, args, use_starmap, delay_first_calls, max_workers_int) # type: ignore
+
+	# Substitute color in bar_format if it matches the default, and setup smooth tqdm if enabled
+	bar_format = resolve_bar_format(bar_format, color)
+	if smooth_tqdm:
+		setup_smooth_tqdm(tqdm_kwargs, total)
+
+	# Return normalized parameters
+	return args_iter, total, max_workers_int, verbose, desc, lazy_func, bar_format
+
+
+# Private helper to normalize the max_workers parameter
+def resolve_max_workers(max_workers: int | float, total: int | None) -> int:
+	""" Convert the user-facing max_workers value to a number of workers.
+
+	Args:
+		max_workers	(int | float):	-1 means CPU_COUNT, a float between 0 and 1 is a percentage of CPU_COUNT,
+			and a negative float between -1 and 0 is a percentage of the number of arguments
+		total		(int | None):	Number of arguments, if known
+
+	Returns:
+		int: Number of workers to use
+
+	Examples:
+		>>> resolve_max_workers(4, None)
+		4
+		>>> resolve_max_workers(-0.5, 10)
+		5
+		>>> resolve_max_workers(-0.5, None)
+		Traceback (most recent call last):
+			...
+		AssertionError: max_workers as negative float requires args with a known length
+	"""
 	if max_workers == -1:
 		max_workers = Cfg.CPU_COUNT
 	if isinstance(max_workers, float):
@@ -203,30 +381,31 @@ def normalize_parallel_params(
 			max_workers = int(max_workers * Cfg.CPU_COUNT)
 		else:
 			assert -1 <= max_workers < 0, "max_workers as negative float must be between -1 and 0 (percentage of len(args))"
-			max_workers = int(-max_workers * len(args_list))
-	max_workers_int: int = max_workers
+			assert total is not None, "max_workers as negative float requires args with a known length"
+			max_workers = int(-max_workers * total)
+	return max_workers
 
-	# Determine verbosity and handle parameters
-	verbose: bool = desc != ""
-	desc, func, args_list = handle_parameters(func, args_list, use_starmap, delay_first_calls, max_workers_int, desc, color)
 
-	# Substitute color in bar_format if it matches the default
+# Private helper to substitute the progress bar color in the default bar format
+def resolve_bar_format(bar_format: str, color: str) -> str:
+	""" Substitute color in bar_format if it matches the default one. """
 	if bar_format == Cfg.BAR_FORMAT:
-		bar_format = bar_format.replace(Cfg.MAGENTA, color)
+		return bar_format.replace(Cfg.MAGENTA, color)
+	return bar_format
 
-	# Setup tqdm kwargs for smooth progress bar if enabled
-	if smooth_tqdm:
-		tqdm_kwargs.setdefault("mininterval", 0.0)
-		try:
-			import shutil
-			total: int = len(args_list) # type: ignore
-			width: int = shutil.get_terminal_size().columns
-			tqdm_kwargs.setdefault("miniters", max(1, total // width))
-		except (TypeError, OSError):
-			tqdm_kwargs.setdefault("miniters", 1)
 
-	# Return normalized parameters
-	return args_list, max_workers_int, verbose, desc, func, bar_format
+# Private helper to setup tqdm kwargs for a smooth progress bar
+def setup_smooth_tqdm(tqdm_kwargs: dict[str, Any], total: int | None) -> None:
+	""" Set miniters and mininterval defaults in tqdm_kwargs (in place) for a smooth progress bar. """
+	tqdm_kwargs.setdefault("mininterval", 0.0)
+	try:
+		import shutil
+		if total is None:
+			raise TypeError("Unknown total")
+		width: int = shutil.get_terminal_size().columns
+		tqdm_kwargs.setdefault("miniters", max(1, total // width))
+	except (TypeError, OSError):
+		tqdm_kwargs.setdefault("miniters", 1)
 
 
 # Private helper for sequential (single-worker) execution shared by multiprocessing and multithreading
@@ -245,3 +424,187 @@ def run_sequential(
 		return [func(arg) for arg in tqdm(args, total=len(args), desc=desc, bar_format=bar_format, ascii=ascii, **tqdm_kwargs)]
 	return [func(arg) for arg in args]
 
+
+
+# Private helper for lazy sequential (single-worker) execution shared by imultiprocessing and imultithreading
+def iter_sequential(
+	func: Callable[..., Any],
+	args: Iterable[Any],
+	total: int | None,
+	verbose: bool,
+	desc: str,
+	bar_format: str,
+	ascii: bool,
+	tqdm_kwargs: dict[str, Any],
+) -> Iterator[Any]:
+	""" Lazily execute func over args sequentially, with optional tqdm progress bar. """
+	if verbose:
+		from tqdm.auto import tqdm
+		args = tqdm(args, total=total, desc=desc, bar_format=bar_format, ascii=ascii, **tqdm_kwargs)
+	for arg in args:
+		yield func(arg)
+
+
+# Private engine for lazy parallel execution shared by imultiprocessing and imultithreading
+def imap_bounded[R](
+	executor: Executor,
+	func: Callable[[Any], R],
+	args: Iterable[Any],
+	max_in_flight: int,
+	ordered: bool = True,
+) -> Iterator[R]:
+	""" Lazily submit func(arg) calls to an executor and yield the results as they finish.
+
+	At most ``max_in_flight`` arguments are pulled from ``args`` and not yet yielded at any time,
+	so memory stays constant whatever the size of the iterable.
+	When ``ordered`` is True, results that finish early are kept until every previous result is yielded
+	(they count towards ``max_in_flight``).
+
+	Pending futures are cancelled when the generator is closed or when a call raises.
+
+	Args:
+		executor		(Executor):	Executor used to run the calls (ThreadPoolExecutor or ProcessPoolExecutor)
+		func			(Callable):	Function to execute
+		args			(Iterable):	Iterable of arguments, consumed lazily
+		max_in_flight	(int):		Maximum number of submitted but not yet yielded calls
+		ordered			(bool):		Whether to yield results in input order or as soon as they finish
+
+	Returns:
+		Iterator[R]: Results of the function execution
+
+	Examples:
+		>>> from concurrent.futures import ThreadPoolExecutor
+		>>> with ThreadPoolExecutor(2) as executor:
+		...     list(imap_bounded(executor, abs, iter([-1, -2, -3, -4]), max_in_flight=2))
+		[1, 2, 3, 4]
+		>>> with ThreadPoolExecutor(2) as executor:
+		...     sorted(imap_bounded(executor, abs, range(-5, 0), max_in_flight=3, ordered=False))
+		[1, 2, 3, 4, 5]
+	"""
+	from concurrent.futures import FIRST_COMPLETED, Future, wait
+	assert max_in_flight >= 1, "max_in_flight must be at least 1"
+
+	args_iter: Iterator[Any] = iter(args)
+	pending: dict[Future[R], int] = {}
+	finished: dict[int, R] = {}
+	next_submit: int = 0
+	next_yield: int = 0
+	exhausted: bool = False
+	try:
+		while True:
+
+			# Refill the pipeline
+			while not exhausted and len(pending) + len(finished) < max_in_flight:
+				try:
+					arg: Any = next(args_iter)
+				except StopIteration:
+					exhausted = True
+					break
+				pending[executor.submit(func, arg)] = next_submit
+				next_submit += 1
+			if not pending:
+				break
+
+			# Wait for at least one call to finish
+			done, _ = wait(pending, return_when=FIRST_COMPLETED)
+			for future in done:
+				index: int = pending.pop(future)
+				if ordered:
+					finished[index] = future.result()
+				else:
+					yield future.result()
+
+			# Yield the contiguous results in input order
+			while next_yield in finished:
+				yield finished.pop(next_yield)
+				next_yield += 1
+	finally:
+		for future in pending:
+			future.cancel()
+
+
+# Private helper to group arguments into chunks of adaptive size (used by chunksize="auto")
+class AdaptiveChunker:
+	""" Iterator grouping arguments into chunks whose size adapts to the measured duration of the tasks.
+
+	The first chunks contain a single argument to time the first tasks, then each recorded chunk duration
+	updates a moving average of the duration per task, and the next chunks are sized so that one chunk
+	takes about ``target_duration`` seconds (amortizing the pickling and IPC round trip of each chunk).
+
+	When the number of arguments is known, the chunk size never exceeds ``total / (max_workers * 4)``
+	(the same heuristic as ``multiprocessing.Pool.map``) so that every worker keeps getting work.
+
+	Args:
+		args			(Iterable):		Iterable of arguments, consumed lazily
+		max_workers		(int):			Number of workers
+		total			(int | None):	Number of arguments, if known
+		max_size		(int | None):	Upper bound of the chunk size (Defaults to None, meaning MAX_SIZE or the heuristic above)
+		target_duration	(float):		Target duration of a chunk in seconds (Defaults to Cfg.AUTO_CHUNK_TARGET_DURATION)
+
+	Examples:
+		>>> chunker = AdaptiveChunker(range(100), max_workers=2, total=100)
+		>>> next(chunker), chunker.max_size
+		((0,), 13)
+		>>> chunker.record(1, 0.001)	# 1 task took 1ms, so 50 tasks would take the target duration
+		>>> len(next(chunker))			# Capped by 100 / (2 * 4)
+		13
+		>>> chunker = AdaptiveChunker(range(1000), max_workers=2, total=None, target_duration=0.01)
+		>>> chunker.record(1, 0.001)
+		>>> len(next(chunker))
+		10
+		>>> chunker.record(10, 0.1)		# Tasks became slower, the moving average reduces the chunk size
+		>>> chunker.size
+		2
+	"""
+	MAX_SIZE: int = 4096
+	""" Upper bound of the chunk size when the number of arguments is unknown """
+	SMOOTHING: float = 0.3
+	""" Weight of the last recorded chunk in the moving average of the duration per task """
+
+	def __init__(
+		self,
+		args: Iterable[Any],
+		max_workers: int,
+		total: int | None,
+		max_size: int | None = None,
+		target_duration: float | None = None,
+	) -> None:
+		self.args_iter: Iterator[Any] = iter(args)
+		""" Iterator of the remaining arguments """
+		self.target_duration: float = target_duration if target_duration is not None else Cfg.AUTO_CHUNK_TARGET_DURATION
+		""" Target duration of a chunk in seconds """
+		self.max_size: int = max_size or self.MAX_SIZE
+		""" Upper bound of the chunk size """
+		if total is not None:
+			self.max_size = min(self.max_size, max(1, -(-total // (max(1, max_workers) * 4))))
+		self.size: int = 1
+		""" Size of the next chunk """
+		self.task_duration: float | None = None
+		""" Moving average of the duration of one task in seconds (None until the first record) """
+
+	def __iter__(self) -> "AdaptiveChunker":
+		return self
+
+	def __next__(self) -> tuple[Any, ...]:
+		from itertools import islice
+		chunk: tuple[Any, ...] = tuple(islice(self.args_iter, self.size))
+		if not chunk:
+			raise StopIteration
+		return chunk
+
+	def record(self, nb_tasks: int, duration: float) -> None:
+		""" Record the duration of a finished chunk and update the size of the next chunks.
+
+		Args:
+			nb_tasks	(int):		Number of tasks in the chunk
+			duration	(float):	Duration of the chunk execution in seconds (measured in the worker)
+		"""
+		if nb_tasks <= 0:
+			return
+		task_duration: float = duration / nb_tasks
+		if self.task_duration is None:
+			self.task_duration = task_duration
+		else:
+			self.task_duration += self.SMOOTHING * (task_duration - self.task_duration)
+		ideal_size: float = self.target_duration / max(self.task_duration, 1e-9)
+		self.size = max(1, min(self.max_size, int(ideal_size)))
@@ -1,14 +1,33 @@
 
 # Imports
 import time
-from collections.abc import Callable, Iterable
-from typing import Any
+from collections.abc import Callable, Generator, Iterable, Iterator
+from concurrent.futures import Executor
+from itertools import count, repeat
+from typing import TYPE_CHECKING, Any, Literal, cast
 
 from ..config import StouputilsConfig as Cfg
 from ..ctx.set_mp_start_method import SetMPStartMethod
 from ..typing import JsonList
 from .capturer import CaptureOutput
-from .common import nice_wrapper, normalize_parallel_params, resolve_process_title, run_sequential
+from .common import (
+	AdaptiveChunker,
+	imap_bounded,
+	iter_sequential,
+	nice_wrapper,
+	normalize_lazy_parallel_params,
+	normalize_parallel_params,
+	resolve_process_title,
+	restore_input_order,
+	run_sequential,
+	sort_by_cost,
+)
+from .shared_arrays import SharedArraysSession
+from .subprocess import RemoteSubprocessError
+from .supervised import supervised_map
+
+if TYPE_CHECKING:
+	from .pool import WorkerPool
 
 
 # Small test functions for doctests
@@ -23,7 +42,7 @@ def multiprocessing[T, R](
 	func: Callable[..., R] | list[Callable[..., R]],
 	args: Iterable[T],
 	use_starmap: bool = False,
-	chunksize: int = 1,
+	chunksize: int | Literal["auto"] = 1,
 	desc: str = "",
 	max_workers: int | float = Cfg.CPU_COUNT,
 	capture_output: bool = True,
@@ -34,6 +53,12 @@ def multiprocessing[T, R](
 	bar_format: str = Cfg.BAR_FORMAT,
 	ascii: bool = False,
 	smooth_tqdm: bool = True,
+	pool: "WorkerPool | None" = None,
+	shared_memory: bool = False,
+	cost: Callable[[T], float] | None = None,
+	timeout: float | None = None,
+	retries: int = 0,
+	on_error: Literal["raise", "return", "skip"] = "raise",
 	**tqdm_kwargs: Any
 ) -> list[R]:
 	r""" Method to execute a function in parallel using multiprocessing
@@ -47,8 +72,10 @@ def multiprocessing[T, R](
 		args				(Iterable):			Iterable of arguments to pass to the function(s)
 		use_starmap			(bool):				Whether to use starmap or not (Defaults to False):
 			True means the function will be called like func(*args[i]) instead of func(args[i])
-		chunksize			(int):				Number of arguments to process at a time
-			(Defaults to 1 for proper progress bar display)
+		chunksize			(int | "auto"):		Number of arguments to process at a time
+			(Defaults to 1 for proper progress bar display).
+			"auto" times the first tasks and adapts the chunk size to amortize the IPC overhead
+			while still updating the progress bar per task (recommended for many cheap tasks).
 		desc				(str):				Description displayed in the progress bar
 			(if not provided no progress bar will be displayed)
 		max_workers			(int | float):		Number of workers to use (Defaults to CPU_COUNT), -1 means CPU_COUNT.
@@ -69,6 +96,22 @@ def multiprocessing[T, R](
 		bar_format			(str):				Format of the progress bar (Defaults to BAR_FORMAT)
 		ascii				(bool):				Whether to use ASCII or Unicode characters for the progress bar
 		smooth_tqdm			(bool):				Whether to enable smooth progress bar updates by setting miniters and mininterval (Defaults to True)
+		pool				(WorkerPool | None):	Persistent pool whose warm workers execute the function (Defaults to None).
+			If provided, the max_workers, capture_output, nice and process_title options of the pool are used instead.
+		shared_memory		(bool):				Whether to move large NumPy arrays (in arguments and results) through shared memory
+			blocks instead of pickling them, workers get views instead of copies (Defaults to False).
+			See :py:class:`~stouputils.parallel.shared_arrays.SharedArraysSession`.
+		cost				(Callable | None):	Function estimating the cost of an argument, e.g. a file size (Defaults to None).
+			If provided, the most expensive tasks are started first so that a slow task at the end
+			doesn't leave the other workers idle (results are still returned in input order).
+		timeout				(float | None):		Maximum duration of each task in seconds (Defaults to None, no limit).
+			A worker exceeding it is killed (with its children) and replaced, the task fails with a TimeoutError.
+		retries				(int):				Number of times a failed task (exception, timeout or crashed worker) is executed again (Defaults to 0)
+		on_error			(str):				What to do with a task that still fails after its retries (Defaults to "raise"):
+			"raise" stops everything and raises its :py:exc:`~stouputils.parallel.subprocess.RemoteSubprocessError`,
+			"return" puts its RemoteSubprocessError in the results instead of the result, "skip" leaves it out of the results.
+			Using timeout, retries or on_error runs each task in supervised workers (chunksize, pool and shared_memory are not used),
+			see :py:func:`~stouputils.parallel.supervised.iter_supervised_results`.
 		**tqdm_kwargs		(Any):				Additional keyword arguments to pass to tqdm
 
 	Returns:
@@ -91,6 +134,9 @@ def multiprocessing[T, R](
 			> multiprocessing(doctest_slow, range(10), desc="Processing")
 			[0, 1, 2, 3, 4, 5, 6, 7, 8, 9]
 
+			> # Millions of cheap tasks, with a chunk size adapted to their duration
+			> results = multiprocessing(doctest_square, range(10_000_000), chunksize="auto", desc="Squares")
+
 			> # Will process in parallel with progress bar and delay the first threads
 			> multiprocessing(
 			.     doctest_slow,
@@ -101,41 +147,81 @@ def multiprocessing[T, R](
 			.     process_title="+++ (Worker)"
 			. )
 			[0, 1, 2, 3, 4, 5, 6, 7, 8, 9]
+
+			> # Uneven tasks: start with the biggest files to cut the tail latency
+			> sizes = multiprocessing(compress_file, paths, cost=os.path.getsize)
+
+			> # Long batch job: a hung or crashing input doesn't lose the work done on the other ones
+			> results = multiprocessing(convert_video, paths, timeout=600, retries=1, on_error="return", desc="Converting")
+			> failed = [path for path, result in zip(paths, results) if isinstance(result, RemoteSubprocessError)]
+
+			> # Large NumPy volumes are passed to the workers without being pickled
+			> meshes = multiprocessing(process_volume, volumes, shared_memory=True)
+
+			> # Reuse warm workers across many calls
+			> with WorkerPool(max_workers=4) as pool:
+			.     for batch in batches:
+			.         multiprocessing(doctest_square, batch, pool=pool)
 	"""
 	# Imports
-	import multiprocessing as mp
 	from concurrent.futures import ProcessPoolExecutor
 
 	from tqdm.contrib.concurrent import process_map  # pyright: ignore[reportUnknownVariableType]
 
+	# Schedule the most expensive tasks first (LPT), then put the results back in input order
+	if cost is not None:
+		func, args, order = sort_by_cost(func, args, cost)
+		results: list[Any] = restore_input_order(multiprocessing(
+			func, args, use_starmap=use_starmap, chunksize=chunksize, desc=desc, max_workers=max_workers,
+			capture_output=capture_output, delay_first_calls=delay_first_calls, nice=nice, process_title=process_title,
+			color=color, bar_format=bar_format, ascii=ascii, smooth_tqdm=smooth_tqdm, pool=pool, shared_memory=shared_memory,
+			timeout=timeout, retries=retries, on_error="return" if on_error == "skip" else on_error, **tqdm_kwargs
+		), order)
+		if on_error == "skip":
+			return [result for result in results if not isinstance(result, RemoteSubprocessError)]
+		return results
+
+	# Isolate the tasks in supervised workers to handle timeouts, retries and failures one by one
+	supervised: bool = timeout is not None or retries > 0 or on_error != "raise"
+	if supervised:
+		assert pool is None and not shared_memory, "timeout, retries and on_error can't be used with pool or shared_memory"
+
+	# Use the warm workers of the persistent pool if provided
+	if pool is not None:
+		return pool.map(
+			func, args, use_starmap=use_starmap, chunksize=chunksize, desc=desc, delay_first_calls=delay_first_calls,
+			color=color, bar_format=bar_format, ascii=ascii, smooth_tqdm=smooth_tqdm, shared_memory=shared_memory, **tqdm_kwargs
+		)
+
+	# Adaptive chunk size and shared memory are handled by the lazy engine
+	if not supervised and (chunksize == "auto" or shared_memory):
+		args = list(args)
+		return run_with_start_method_retry(lambda: list(imultiprocessing(
+			func, args, use_starmap=use_starmap, chunksize=chunksize, desc=desc, max_workers=max_workers,
+			capture_output=capture_output, delay_first_calls=delay_first_calls, nice=nice, process_title=process_title,
+			color=color, bar_format=bar_format, ascii=ascii, smooth_tqdm=smooth_tqdm, shared_memory=shared_memory, **tqdm_kwargs
+		)))
+
 	# Handle parameters
 	args, max_workers, verbose, desc, func, bar_format = normalize_parallel_params(
 		func, args, use_starmap, delay_first_calls, max_workers, desc, color, bar_format, smooth_tqdm, tqdm_kwargs
 	)
 
+	# Supervised workers (even for a single task, to enforce the timeout)
+	if supervised:
+		return supervised_map(
+			func, args, max(1, min(max_workers, len(args))), timeout, retries, on_error,  # pyright: ignore[reportArgumentType]
+			nice, process_title, capture_output, verbose, desc, bar_format, ascii, tqdm_kwargs
+		)
+
 	# Do multiprocessing only if there is more than 1 argument and more than 1 CPU
-	if max_workers > 1 and len(args) > 1:
-		# Wrap function with nice if specified
-		if nice is not None:
-			wrapped_args = [(nice, func, arg) for arg in args]
-			wrapped_func = nice_wrapper
-		else:
-			wrapped_args = args
-			wrapped_func = func
-
-		# Wrap function with process_title if specified
-		process_title = resolve_process_title(process_title)
-		if process_title is not None:
-			wrapped_args = [(process_title, i, wrapped_func, arg) for i, arg in enumerate(wrapped_args)]
-			wrapped_func = process_title_wrapper
-
-		# Capture output if specified
-		capturer: CaptureOutput | None = None
-		if capture_output:
-			capturer = CaptureOutput()
+	elif max_workers > 1 and len(args) > 1:
+		# Wrap function with nice, process_title and capture_output if specified
+		capturer: CaptureOutput | None = CaptureOutput() if capture_output else None
+		if capturer is not None:
 			capturer.start_listener()
-			wrapped_args = [(capturer, wrapped_func, arg) for arg in wrapped_args]
-			wrapped_func = capture_subprocess_output
+		wrapped_func, wrapped_iter = wrap_worker_chain(func, args, nice, process_title, capturer)  # pyright: ignore[reportArgumentType]
+		wrapped_args: list[Any] = list(wrapped_iter)
 
 		def process() -> JsonList:
 			if verbose:
@@ -146,15 +232,7 @@ def multiprocessing[T, R](
 				with ProcessPoolExecutor(max_workers=max_workers) as executor:
 					return list(executor.map(wrapped_func, wrapped_args, chunksize=chunksize))  # pyright: ignore[reportArgumentType, reportUnknownArgumentType]
 		try:
-			return process()
-		except RuntimeError as e:
-			if "SemLock created in a fork context is being shared with a process in a spawn context" in str(e):
-
-				# Try with alternate start method
-				with SetMPStartMethod("spawn" if mp.get_start_method() != "spawn" else "fork"):
-					return process()
-			else: # Re-raise if it's not the SemLock error
-				raise
+			return run_with_start_method_retry(process)
 		finally:
 			if capturer is not None:
 				capturer.parent_close_write()
@@ -165,6 +243,131 @@ def multiprocessing[T, R](
 		return run_sequential(func, args, verbose, desc, bar_format, ascii, tqdm_kwargs)  # pyright: ignore[reportArgumentType]
 
 
+def imultiprocessing[T, R](
+	func: Callable[..., R] | list[Callable[..., R]],
+	args: Iterable[T],
+	use_starmap: bool = False,
+	chunksize: int | Literal["auto"] = 1,
+	ordered: bool = True,
+	max_in_flight: int | None = None,
+	desc: str = "",
+	max_workers: int | float = Cfg.CPU_COUNT,
+	capture_output: bool = True,
+	delay_first_calls: float = 0,
+	nice: int | None = None,
+	process_title: str | None = None,
+	color: str = Cfg.MAGENTA,
+	bar_format: str = Cfg.BAR_FORMAT,
+	ascii: bool = False,
+	smooth_tqdm: bool = True,
+	shared_memory: bool = False,
+	**tqdm_kwargs: Any
+) -> Iterator[R]:
+	r""" Lazy (generator) version of :py:func:`multiprocessing`, similar to ``multiprocessing.Pool.imap``
+
+	- When the input is too big to fit in memory (huge generators, streamed files, database cursors, ...)
+	- When you want to use the first results as soon as possible (pipelines, early stopping, ...)
+
+	The input iterable is consumed lazily: at most ``max_in_flight`` arguments are pulled
+	and not yet yielded at any time, so memory usage stays constant whatever the input size.
+	Closing the generator (e.g. breaking out of the loop) cancels the pending tasks.
+
+	Args:
+		func				(Callable | list[Callable]):	Function to execute, or list of functions (one per argument)
+		args				(Iterable):			Iterable of arguments to pass to the function(s), consumed lazily
+		use_starmap			(bool):				Whether to use starmap or not (Defaults to False):
+			True means the function will be called like func(*args[i]) instead of func(args[i])
+		chunksize			(int | "auto"):		Number of arguments sent to a worker at a time (Defaults to 1).
+			"auto" times the first tasks and adapts the chunk size to amortize the IPC overhead,
+			see :py:class:`~stouputils.parallel.common.AdaptiveChunker`. The progress bar is still updated per task.
+		ordered				(bool):				Whether to yield results in input order (Defaults to True),
+			if False, results are yielded as soon as they finish (like ``imap_unordered``)
+		max_in_flight		(int | None):		Maximum number of arguments pulled but not yet yielded
+			(Defaults to None, meaning 2 * max_workers * chunksize, or 2 * max_workers chunks of adaptive size for "auto")
+		desc				(str):				Description displayed in the progress bar
+			(if not provided no progress bar will be displayed)
+		max_workers			(int | float):		Number of workers to use (Defaults to CPU_COUNT), -1 means CPU_COUNT.
+			If float between 0 and 1, it's treated as a percentage of CPU_COUNT.
+			If negative float between -1 and 0, it's treated as a percentage of len(args) (args must have a length).
+		capture_output		(bool):				Whether to capture stdout/stderr from the worker processes (Defaults to True)
+		delay_first_calls	(float):			Apply i*delay_first_calls seconds delay to the first "max_workers" calls.
+		nice				(int | None):		Adjust the priority of worker processes (Defaults to None).
+			Use Unix-style values: -20 (highest priority) to 19 (lowest priority).
+		process_title		(str | None):		If provided, sets the process title for worker processes.
+			If it starts with '+++', this prefix is replaced by the current process title.
+		color				(str):				Color of the progress bar (Defaults to MAGENTA)
+		bar_format			(str):				Format of the progress bar (Defaults to BAR_FORMAT)
+		ascii				(bool):				Whether to use ASCII or Unicode characters for the progress bar
+		smooth_tqdm			(bool):				Whether to enable smooth progress bar updates by setting miniters and mininterval (Defaults to True)
+		shared_memory		(bool):				Whether to move large NumPy arrays (in arguments and results) through shared memory
+			blocks instead of pickling them, workers get views instead of copies (Defaults to False).
+			See :py:class:`~stouputils.parallel.shared_arrays.SharedArraysSession`.
+		**tqdm_kwargs		(Any):				Additional keyword arguments to pass to tqdm
+
+	Returns:
+		Iterator[object]:	Results of the function execution, yielded as they are available
+
+	Examples:
+		.. code-block:: python
+
+			> list(imultiprocessing(doctest_square, args=iter([1, 2, 3])))
+			[1, 4, 9]
+
+			> # Results in completion order, with a progress bar (total is unknown for generators)
+			> for result in imultiprocessing(doctest_slow, (i for i in range(10)), ordered=False, desc="Streaming"):
+			.     print(result)
+
+			> # Constant memory over a huge input, sending 100 arguments per worker round trip
+			> total = sum(imultiprocessing(doctest_square, range(50_000_000), chunksize=100))
+
+			> # Millions of cheap tasks: let the chunk size adapt to the duration of the tasks
+			> total = sum(imultiprocessing(doctest_square, range(50_000_000), chunksize="auto", desc="Squares"))
+	"""
+	# Imports
+	import multiprocessing as mp
+	from concurrent.futures import ProcessPoolExecutor
+
+	# Handle parameters
+	args_iter, total, max_workers, verbose, desc, func, bar_format = normalize_lazy_parallel_params(
+		func, args, use_starmap, delay_first_calls, max_workers, desc, color, bar_format, smooth_tqdm, tqdm_kwargs
+	)
+
+	# Single process execution
+	if max_workers <= 1 or (total is not None and total <= 1):
+		yield from iter_sequential(func, args_iter, total, verbose, desc, bar_format, ascii, tqdm_kwargs)  # pyright: ignore[reportArgumentType]
+		return
+
+	# Move large NumPy arrays through shared memory blocks instead of pickling them
+	session: SharedArraysSession | None = SharedArraysSession() if shared_memory else None
+	if session is not None:
+		func, args_iter = session.wrap(func, args_iter)  # pyright: ignore[reportArgumentType]
+
+	# Wrap the chunk function with nice, process_title and capture_output if specified (once per chunk)
+	capturer: CaptureOutput | None = CaptureOutput() if capture_output else None
+	if capturer is not None:
+		capturer.start_listener()
+	def wrap_chunks(chunk_func: Callable[[Any], Any], chunks: Iterator[Any]) -> tuple[Callable[[Any], Any], Iterator[Any]]:
+		return wrap_worker_chain(chunk_func, chunks, nice, process_title, capturer)
+
+	# Workers count finished tasks in a shared counter so the progress bar moves inside each chunk
+	counter: Any = mp.Value("q", 0) if verbose else None
+	executor: ProcessPoolExecutor = ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker_progress, initargs=(counter,))
+	stop_progress: Callable[[], None] | None = None
+	if verbose:
+		stop_progress = start_worker_progress(counter, total, desc, bar_format, ascii, tqdm_kwargs)
+	try:
+		results: Iterator[Any] = iter_chunk_results(executor, func, args_iter, total, max_workers, chunksize, ordered, max_in_flight, wrap_chunks)  # pyright: ignore[reportArgumentType]
+		yield from (session.unwrap(results) if session is not None else results)
+	finally:
+		executor.shutdown(wait=True, cancel_futures=True)
+		if session is not None:
+			session.cleanup()
+		if stop_progress is not None:
+			stop_progress()
+		if capturer is not None:
+			capturer.parent_close_write()
+			capturer.join_listener(timeout=5.0)
+
 def multithreading[T, R](
 	func: Callable[..., R] | list[Callable[..., R]],
 	args: Iterable[T],
@@ -176,6 +379,7 @@ def multithreading[T, R](
 	bar_format: str = Cfg.BAR_FORMAT,
 	ascii: bool = False,
 	smooth_tqdm: bool = True,
+	cost: Callable[[T], float] | None = None,
 	**tqdm_kwargs: Any
 	) -> list[R]:
 	r""" Method to execute a function in parallel using multithreading, you should use it:
@@ -201,6 +405,9 @@ def multithreading[T, R](
 		bar_format			(str):				Format of the progress bar (Defaults to BAR_FORMAT)
 		ascii				(bool):				Whether to use ASCII or Unicode characters for the progress bar
 		smooth_tqdm			(bool):				Whether to enable smooth progress bar updates by setting miniters and mininterval (Defaults to True)
+		cost				(Callable | None):	Function estimating the cost of an argument, e.g. a file size (Defaults to None).
+			If provided, the most expensive tasks are started first so that a slow task at the end
+			doesn't leave the other workers idle (results are still returned in input order).
 		**tqdm_kwargs		(Any):				Additional keyword arguments to pass to tqdm
 
 	Returns:
@@ -232,12 +439,24 @@ def multithreading[T, R](
 			.     delay_first_calls=0.6
 			. )
 			[0, 1, 2, 3, 4, 5, 6, 7, 8, 9]
+
+		>>> # Longest tasks first, results still in input order
+		>>> multithreading(doctest_square, [1, 3, 2], cost=lambda x: x, max_workers=2)
+		[1, 9, 4]
 	"""
 	# Imports
 	from concurrent.futures import ThreadPoolExecutor
 
 	from tqdm.auto import tqdm
 
+	# Schedule the most expensive tasks first (LPT), then put the results back in input order
+	if cost is not None:
+		func, args, order = sort_by_cost(func, args, cost)
+		return restore_input_order(multithreading(
+			func, args, use_starmap=use_starmap, desc=desc, max_workers=max_workers, delay_first_calls=delay_first_calls,
+			color=color, bar_format=bar_format, ascii=ascii, smooth_tqdm=smooth_tqdm, **tqdm_kwargs
+		), order)
+
 	# Handle parameters
 	args, max_workers, verbose, desc, func, bar_format = normalize_parallel_params(
 		func, args, use_starmap, delay_first_calls, max_workers, desc, color, bar_format, smooth_tqdm, tqdm_kwargs
@@ -257,6 +476,92 @@ def multithreading[T, R](
 		return run_sequential(func, args, verbose, desc, bar_format, ascii, tqdm_kwargs)  # pyright: ignore[reportArgumentType]
 
 
+def imultithreading[T, R](
+	func: Callable[..., R] | list[Callable[..., R]],
+	args: Iterable[T],
+	use_starmap: bool = False,
+	ordered: bool = True,
+	max_in_flight: int | None = None,
+	desc: str = "",
+	max_workers: int | float = Cfg.CPU_COUNT,
+	delay_first_calls: float = 0,
+	color: str = Cfg.MAGENTA,
+	bar_format: str = Cfg.BAR_FORMAT,
+	ascii: bool = False,
+	smooth_tqdm: bool = True,
+	**tqdm_kwargs: Any
+) -> Iterator[R]:
+	r""" Lazy (generator) version of :py:func:`multithreading`, similar to ``multiprocessing.pool.ThreadPool.imap``
+
+	The input iterable is consumed lazily: at most ``max_in_flight`` arguments are pulled
+	and not yet yielded at any time, so memory usage stays constant whatever the input size.
+	Closing the generator (e.g. breaking out of the loop) cancels the pending tasks.
+
+	Args:
+		func				(Callable | list[Callable]):	Function to execute, or list of functions (one per argument)
+		args				(Iterable):			Iterable of arguments to pass to the function(s), consumed lazily
+		use_starmap			(bool):				Whether to use starmap or not (Defaults to False):
+			True means the function will be called like func(*args[i]) instead of func(args[i])
+		ordered				(bool):				Whether to yield results in input order (Defaults to True),
+			if False, results are yielded as soon as they finish (like ``imap_unordered``)
+		max_in_flight		(int | None):		Maximum number of arguments pulled but not yet yielded
+			(Defaults to None, meaning 2 * max_workers)
+		desc				(str):				Description displayed in the progress bar
+			(if not provided no progress bar will be displayed)
+		max_workers			(int | float):		Number of workers to use (Defaults to CPU_COUNT), -1 means CPU_COUNT.
+			If float between 0 and 1, it's treated as a percentage of CPU_COUNT.
+			If negative float between -1 and 0, it's treated as a percentage of len(args) (args must have a length).
+		delay_first_calls	(float):			Apply i*delay_first_calls seconds delay to the first "max_workers" calls.
+		color				(str):				Color of the progress bar (Defaults to MAGENTA)
+		bar_format			(str):				Format of the progress bar (Defaults to BAR_FORMAT)
+		ascii				(bool):				Whether to use ASCII or Unicode characters for the progress bar
+		smooth_tqdm			(bool):				Whether to enable smooth progress bar updates by setting miniters and mininterval (Defaults to True)
+		**tqdm_kwargs		(Any):				Additional keyword arguments to pass to tqdm
+
+	Returns:
+		Iterator[object]:	Results of the function execution, yielded as they are available
+
+	Examples:
+		>>> list(imultithreading(doctest_square, iter([1, 2, 3]), max_workers=2))
+		[1, 4, 9]
+
+		>>> list(imultithreading(int.__mul__, ((i, i) for i in range(4)), use_starmap=True, max_workers=2))
+		[0, 1, 4, 9]
+
+		>>> sorted(imultithreading(doctest_square, range(5), ordered=False, max_workers=3))
+		[0, 1, 4, 9, 16]
+
+		.. code-block:: python
+
+			> # Will process in parallel with progress bar, yielding results as soon as they finish
+			> for result in imultithreading(doctest_slow, range(10), ordered=False, desc="Streaming"):
+			.     print(result)
+	"""
+	# Imports
+	from concurrent.futures import ThreadPoolExecutor
+
+	# Handle parameters
+	args_iter, total, max_workers, verbose, desc, func, bar_format = normalize_lazy_parallel_params(
+		func, args, use_starmap, delay_first_calls, max_workers, desc, color, bar_format, smooth_tqdm, tqdm_kwargs
+	)
+
+	# Single thread execution
+	if max_workers <= 1 or (total is not None and total <= 1):
+		yield from iter_sequential(func, args_iter, total, verbose, desc, bar_format, ascii, tqdm_kwargs)  # pyright: ignore[reportArgumentType]
+		return
+
+	executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers)
+	try:
+		thread_func: Callable[[Any], Any] = cast(Callable[[Any], Any], func)
+		results: Iterable[Any] = imap_bounded(executor, thread_func, args_iter, max_in_flight or 2 * max_workers, ordered)
+		if verbose:
+			from tqdm.auto import tqdm
+			results = tqdm(results, total=total, desc=desc, bar_format=bar_format, ascii=ascii, **tqdm_kwargs)
+		yield from results
+	finally:
+		executor.shutdown(wait=True, cancel_futures=True)
+
+
 # "Private" function for capturing multiprocessing subprocess
 def capture_subprocess_output[T, R](args: tuple[CaptureOutput, Callable[[T], R], T]) -> R:
 	""" Wrapper function to execute the target function in a subprocess with optional output capture.
@@ -301,3 +606,208 @@ def process_title_wrapper[T, R](args: tuple[str, int, Callable[[T], R], T]) -> R
 
 	return func(arg)
 
+
+
+# "Private" shared counter of finished tasks in a worker process (set by init_worker_progress)
+worker_progress: Any = None
+
+# "Private" initializer of the worker processes used to share the progress counter (must be at module level for pickling)
+def init_worker_progress(counter: Any) -> None:
+	""" Store the shared progress counter in the worker process.
+
+	Args:
+		counter (multiprocessing.Value | None): Shared counter of finished tasks (inherited when the worker is started)
+	"""
+	global worker_progress
+	worker_progress = counter
+
+# "Private" function for executing a chunk of arguments in a multiprocessing subprocess
+def chunk_wrapper[T, R](args: tuple[Callable[[T], R], tuple[T, ...]]) -> tuple[list[R], float]:
+	""" Wrapper function to execute the target function over a chunk of arguments (one round trip per chunk).
+
+	Each finished task increments the shared progress counter (if any), and the chunk execution
+	is timed in the worker so that the parent can adapt the chunk size (see ``chunksize="auto"``).
+
+	Args:
+		tuple[Callable,tuple[T,...]]: Tuple containing:
+			Callable: Target function to execute
+			tuple[T,...]: Arguments to pass to the target function, one call each
+
+	Returns:
+		tuple[list[R],float]: Results of the chunk, and duration of its execution in seconds
+	"""
+	func, chunk = args
+	start: float = time.perf_counter()
+	results: list[R] = []
+	for arg in chunk:
+		results.append(func(arg))
+		if worker_progress is not None:
+			with worker_progress.get_lock():
+				worker_progress.value += 1
+	return results, time.perf_counter() - start
+
+
+# "Private" function to update a progress bar from the shared counter of the workers (runs in a thread of the parent)
+def poll_worker_progress(pbar: Any, counter: Any, stop_event: Any, offset: int = 0, interval: float = 0.1) -> None:
+	""" Update the progress bar with the number of finished tasks until the stop event is set, then close it.
+
+	Args:
+		pbar		(tqdm):						Progress bar to update
+		counter		(multiprocessing.Value):	Shared counter of finished tasks
+		stop_event	(threading.Event):			Event set when the execution is over
+		offset		(int):						Value of the counter when the execution started (Defaults to 0)
+		interval	(float):					Seconds between two updates (Defaults to 0.1)
+	"""
+	while not stop_event.wait(interval):
+		pbar.update(counter.value - offset - pbar.n)
+	pbar.update(counter.value - offset - pbar.n)
+	pbar.close()
+
+
+# "Private" function to display a progress bar fed by the shared counter of the workers
+def start_worker_progress(
+	counter: Any,
+	total: int | None,
+	desc: str,
+	bar_format: str,
+	ascii: bool,
+	tqdm_kwargs: dict[str, Any],
+) -> Callable[[], None]:
+	""" Start a thread updating a progress bar from the shared counter of finished tasks.
+
+	Only the tasks finished after this call are counted, so a counter can be shared between calls (see WorkerPool).
+
+	Returns:
+		Callable[[], None]: Function stopping the thread and closing the progress bar
+	"""
+	import threading
+
+	from tqdm.auto import tqdm
+	pbar = tqdm(total=total, desc=desc, bar_format=bar_format, ascii=ascii, **tqdm_kwargs)
+	stop_event: threading.Event = threading.Event()
+	thread: threading.Thread = threading.Thread(target=poll_worker_progress, args=(pbar, counter, stop_event, counter.value), daemon=True)
+	thread.start()
+
+	def stop() -> None:
+		stop_event.set()
+		thread.join()
+	return stop
+
+
+# "Private" engine sending chunks of arguments to an executor, shared by imultiprocessing and WorkerPool.imap
+def iter_chunk_results(
+	executor: Executor,
+	func: Callable[[Any], Any],
+	args: Iterator[Any],
+	total: int | None,
+	max_workers: int,
+	chunksize: int | Literal["auto"],
+	ordered: bool,
+	max_in_flight: int | None,
+	wrap_chunks: Callable[[Callable[[Any], Any], Iterator[Any]], tuple[Callable[[Any], Any], Iterator[Any]]] | None = None,
+) -> Generator[Any, None, None]:
+	""" Group the arguments into chunks (of fixed or adaptive size), run them with :py:func:`chunk_wrapper` and yield the results.
+
+	Args:
+		executor		(Executor):				Executor running the chunks (usually a ProcessPoolExecutor)
+		func			(Callable):				Function to execute on each argument
+		args			(Iterator):				Iterator of arguments, consumed lazily
+		total			(int | None):			Number of arguments, if known
+		max_workers		(int):					Number of workers of the executor
+		chunksize		(int | "auto"):			Number of arguments per chunk, "auto" for an adaptive size
+		ordered			(bool):					Whether to yield results in input order
+		max_in_flight	(int | None):			Maximum number of arguments pulled but not yet yielded
+		wrap_chunks		(Callable | None):		Optional function wrapping (chunk_wrapper, chunks) with the worker wrappers
+
+	Returns:
+		Iterator[Any]: Results of the function execution
+	"""
+	from itertools import batched
+
+	# Group arguments into chunks (of fixed or adaptive size)
+	chunker: AdaptiveChunker | None = None
+	chunks: Iterator[tuple[Any, ...]]
+	max_chunks_in_flight: int
+	if chunksize == "auto":
+		max_chunks_in_flight = 2 * max_workers
+		max_size: int | None = max(1, max_in_flight // max_chunks_in_flight) if max_in_flight else None
+		chunker = AdaptiveChunker(args, max_workers, total, max_size=max_size)
+		chunks = chunker
+	else:
+		max_chunks_in_flight = max(1, (max_in_flight or 2 * max_workers * chunksize) // chunksize)
+		chunks = batched(args, chunksize)
+
+	# Wrap the chunk function if needed, then run the chunks
+	chunk_func: Callable[[Any], Any] = chunk_wrapper
+	chunk_iter: Iterator[Any] = zip(repeat(func), chunks)
+	if wrap_chunks is not None:
+		chunk_func, chunk_iter = wrap_chunks(chunk_func, chunk_iter)
+	for chunk_results, duration in imap_bounded(executor, chunk_func, chunk_iter, max_chunks_in_flight, ordered):
+		if chunker is not None:
+			chunker.record(len(chunk_results), duration)
+		yield from chunk_results
+
+
+# "Private" function to run a multiprocessing call again with the other start method on the SemLock context error
+def run_with_start_method_retry[R](process: Callable[[], R]) -> R:
+	""" Run ``process``, and run it again with the alternate start method if a SemLock
+	created in a fork context was shared with a process in a spawn context. """
+	import multiprocessing as mp
+	try:
+		return process()
+	except RuntimeError as e:
+		if "SemLock created in a fork context is being shared with a process in a spawn context" not in str(e):
+			raise
+		with SetMPStartMethod("spawn" if mp.get_start_method() != "spawn" else "fork"):
+			return process()
+
+
+# "Private" function to wrap the function with the nice, process_title and capture_output wrappers
+def wrap_worker_chain(
+	func: Callable[[Any], Any],
+	args: Iterable[Any],
+	nice: int | None,
+	process_title: str | None,
+	capturer: CaptureOutput | None,
+	first_index: int = 0,
+) -> tuple[Callable[[Any], Any], Iterator[Any]]:
+	""" Lazily wrap the function and its arguments with the worker wrappers, in this order:
+	:py:func:`~stouputils.parallel.common.nice_wrapper`, :py:func:`process_title_wrapper`
+	and :py:func:`capture_subprocess_output`.
+
+	Args:
+		func			(Callable):					Function to execute
+		args			(Iterable):					Iterable of arguments, consumed lazily
+		nice			(int | None):				Priority of the worker processes (None to skip)
+		process_title	(str | None):				Title of the worker processes, '+++' is resolved here (None to skip)
+		capturer		(CaptureOutput | None):		Capturer to redirect the worker output to (None to skip)
+		first_index		(int):						Process title index of the first argument, incremented for each next one (Defaults to 0)
+
+	Returns:
+		tuple[Callable, Iterator]:	Tuple containing the wrapped function and the iterator of its arguments
+
+	Examples:
+		>>> func, args = wrap_worker_chain(abs, [-1, -2], None, "worker", None)
+		>>> func.__name__, next(args)
+		('process_title_wrapper', ('worker', 0, <built-in function abs>, -1))
+	"""
+	wrapped_func: Callable[[Any], Any] = func
+	wrapped_iter: Iterator[Any] = iter(args)
+
+	# Wrap function with nice if specified
+	if nice is not None:
+		wrapped_iter = zip(repeat(nice), repeat(wrapped_func), wrapped_iter)
+		wrapped_func = nice_wrapper
+
+	# Wrap function with process_title if specified
+	process_title = resolve_process_title(process_title)
+	if process_title is not None:
+		wrapped_iter = zip(repeat(process_title), count(first_index), repeat(wrapped_func), wrapped_iter)
+		wrapped_func = process_title_wrapper
+
+	# Capture output if specified
+	if capturer is not None:
+		wrapped_iter = zip(repeat(capturer), repeat(wrapped_func), wrapped_iter)
+		wrapped_func = capture_subprocess_output
+
+	return wrapped_func, wrapped_iter
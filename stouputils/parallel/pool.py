@@ -0,0 +1,267 @@
+
+# Imports
+from __future__ import annotations
+
+from collections.abc import Callable, Generator, Iterable, Iterator
+from typing import TYPE_CHECKING, Any, Literal
+
+from ..config import StouputilsConfig as Cfg
+from ..ctx.common import AbstractBothContextManager
+from .capturer import CaptureOutput
+from .common import normalize_lazy_parallel_params, resolve_max_workers, resolve_process_title, set_process_priority
+from .multi import init_worker_progress, iter_chunk_results, start_worker_progress
+from .shared_arrays import SharedArraysSession
+
+if TYPE_CHECKING:
+	from concurrent.futures import Future, ProcessPoolExecutor
+
+
+# Persistent pool of worker processes
+class WorkerPool(AbstractBothContextManager["WorkerPool"]):
+	r""" Persistent pool of worker processes, kept warm across calls.
+
+	Calling :py:func:`~stouputils.parallel.multi.multiprocessing` creates and tears down a process pool
+	(and an output listener) on each call, which dominates when it is called many times on small batches.
+	A WorkerPool starts its workers once (lazily, on first use or when entering the context)
+	and reuses them until :py:meth:`shutdown` is called or the context is exited.
+
+	The ``nice``, ``process_title`` and ``capture_output`` options are applied once per worker
+	when it starts (instead of once per task), and a single output listener runs for the whole pool lifetime.
+
+	Args:
+		max_workers		(int | float):	Number of workers to use (Defaults to CPU_COUNT), -1 means CPU_COUNT.
+			If float between 0 and 1, it's treated as a percentage of CPU_COUNT.
+		nice			(int | None):	Adjust the priority of worker processes (Defaults to None).
+			Use Unix-style values: -20 (highest priority) to 19 (lowest priority).
+		process_title	(str | None):	If provided, sets the process title for worker processes (suffixed by the worker index).
+			If it starts with '+++', this prefix is replaced by the current process title.
+		capture_output	(bool):			Whether to capture stdout/stderr from the worker processes (Defaults to True)
+
+	Examples:
+		.. code-block:: python
+
+			> with WorkerPool(max_workers=4, process_title="+++ (Worker)") as pool:
+			.     for batch in batches:
+			.         results = pool.map(doctest_square, batch)
+			.     pool.starmap(int.__mul__, [(1, 2), (3, 4)])
+			.     pool.submit(doctest_square, 5).result()
+			[2, 12]
+			25
+
+			> # Reuse the warm workers from the existing multiprocessing() function
+			> pool = WorkerPool(max_workers=4)
+			> multiprocessing(doctest_slow, range(10), desc="Processing", pool=pool)
+			[0, 1, 2, 3, 4, 5, 6, 7, 8, 9]
+			> pool.shutdown()
+	"""
+	def __init__(
+		self,
+		max_workers: int | float = Cfg.CPU_COUNT,
+		nice: int | None = None,
+		process_title: str | None = None,
+		capture_output: bool = True,
+	) -> None:
+		self.max_workers: int = max(1, resolve_max_workers(max_workers, None))
+		""" Number of worker processes """
+		self.nice: int | None = nice
+		""" Priority of the worker processes (None for no adjustment) """
+		self.process_title: str | None = resolve_process_title(process_title)
+		""" Title of the worker processes (None to keep the default) """
+		self.capture_output: bool = capture_output
+		""" Whether to capture stdout/stderr from the worker processes """
+		self.executor: ProcessPoolExecutor | None = None
+		""" Underlying executor (None until the pool is started) """
+		self.capturer: CaptureOutput | None = None
+		""" Capturer relaying the output of the workers (None if not capturing or not started) """
+		self.counter: Any = None
+		""" Shared counter of finished tasks, used by progress bars (None until the pool is started) """
+
+	def __repr__(self) -> str:
+		state: str = "running" if self.executor is not None else "stopped"
+		return f"<WorkerPool max_workers={self.max_workers} {state}>"
+
+	def start(self) -> WorkerPool:
+		""" Start the worker processes (called automatically on first use or when entering the context).
+
+		Returns:
+			WorkerPool: The pool itself, for chaining
+		"""
+		if self.executor is not None:
+			return self
+		import multiprocessing as mp
+		from concurrent.futures import ProcessPoolExecutor
+
+		# Start the output listener once for the whole pool lifetime
+		if self.capture_output:
+			self.capturer = CaptureOutput()
+			self.capturer.start_listener()
+
+		# Workers are initialized once with the pool options
+		self.counter = mp.Value("q", 0)
+		worker_index: Any = mp.Value("i", 0)
+		self.executor = ProcessPoolExecutor(
+			max_workers=self.max_workers,
+			initializer=init_pool_worker,
+			initargs=(self.nice, self.process_title, worker_index, self.capturer, self.counter),
+		)
+		return self
+
+	def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+		""" Stop the worker processes and the output listener. The pool can be started again afterwards.
+
+		Args:
+			wait			(bool):	Whether to wait for the pending tasks to finish (Defaults to True)
+			cancel_futures	(bool):	Whether to cancel the tasks that did not start yet (Defaults to False)
+		"""
+		if self.executor is not None:
+			self.executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+			self.executor = None
+		if self.capturer is not None:
+			self.capturer.parent_close_write()
+			self.capturer.join_listener(timeout=5.0)
+			self.capturer = None
+
+	def submit[R](self, func: Callable[..., R], /, *args: Any, **kwargs: Any) -> Future[R]:
+		""" Schedule ``func(*args, **kwargs)`` on a warm worker.
+
+		Args:
+			func		(Callable):	Function to execute (SHOULD BE A TOP-LEVEL FUNCTION TO BE PICKLABLE)
+			*args		(Any):		Positional arguments to pass to the function
+			**kwargs	(Any):		Keyword arguments to pass to the function
+
+		Returns:
+			Future[R]: Future of the result
+		"""
+		executor: ProcessPoolExecutor | None = self.start().executor
+		assert executor is not None
+		return executor.submit(func, *args, **kwargs)
+
+	def imap[T, R](
+		self,
+		func: Callable[..., R] | list[Callable[..., R]],
+		args: Iterable[T],
+		use_starmap: bool = False,
+		chunksize: int | Literal["auto"] = 1,
+		ordered: bool = True,
+		max_in_flight: int | None = None,
+		desc: str = "",
+		delay_first_calls: float = 0,
+		color: str = Cfg.MAGENTA,
+		bar_format: str = Cfg.BAR_FORMAT,
+		ascii: bool = False,
+		smooth_tqdm: bool = True,
+		shared_memory: bool = False,
+		**tqdm_kwargs: Any
+	) -> Iterator[R]:
+		r""" Lazily execute a function over the arguments using the warm workers, yielding the results.
+
+		Same behavior and arguments as :py:func:`~stouputils.parallel.multi.imultiprocessing`,
+		except that the workers (and their nice, process_title and capture_output options) belong to the pool.
+		If several threads use the same pool at once, their progress bars count each other's tasks.
+
+		Returns:
+			Iterator[object]:	Results of the function execution, yielded as they are available
+		"""
+		# Handle parameters
+		args_iter, total, _, verbose, desc, func, bar_format = normalize_lazy_parallel_params(
+			func, args, use_starmap, delay_first_calls, self.max_workers, desc, color, bar_format, smooth_tqdm, tqdm_kwargs
+		)
+		self.start()
+		assert self.executor is not None
+
+		# Move large NumPy arrays through shared memory blocks instead of pickling them
+		session: SharedArraysSession | None = SharedArraysSession() if shared_memory else None
+		if session is not None:
+			func, args_iter = session.wrap(func, args_iter)  # pyright: ignore[reportArgumentType]
+
+		stop_progress: Callable[[], None] | None = None
+		if verbose:
+			stop_progress = start_worker_progress(self.counter, total, desc, bar_format, ascii, tqdm_kwargs)
+		results: Generator[Any, None, None] = iter_chunk_results(self.executor, func, args_iter, total, self.max_workers, chunksize, ordered, max_in_flight)  # pyright: ignore[reportArgumentType]
+		try:
+			yield from (session.unwrap(results) if session is not None else results)
+		finally:
+			results.close()	# Cancel the pending chunks before releasing their shared memory blocks
+			if session is not None:
+				session.cleanup()
+			if stop_progress is not None:
+				stop_progress()
+
+	def map[T, R](
+		self,
+		func: Callable[..., R] | list[Callable[..., R]],
+		args: Iterable[T],
+		use_starmap: bool = False,
+		chunksize: int | Literal["auto"] = 1,
+		desc: str = "",
+		delay_first_calls: float = 0,
+		color: str = Cfg.MAGENTA,
+		bar_format: str = Cfg.BAR_FORMAT,
+		ascii: bool = False,
+		smooth_tqdm: bool = True,
+		shared_memory: bool = False,
+		**tqdm_kwargs: Any
+	) -> list[R]:
+		r""" Execute a function over the arguments using the warm workers.
+
+		Same behavior and arguments as :py:func:`~stouputils.parallel.multi.multiprocessing`,
+		except that the workers (and their nice, process_title and capture_output options) belong to the pool.
+
+		Returns:
+			list[object]:	Results of the function execution
+		"""
+		return list(self.imap(
+			func, args, use_starmap=use_starmap, chunksize=chunksize, desc=desc, delay_first_calls=delay_first_calls,
+			color=color, bar_format=bar_format, ascii=ascii, smooth_tqdm=smooth_tqdm, shared_memory=shared_memory, **tqdm_kwargs
+		))
+
+	def starmap[R](self, func: Callable[..., R] | list[Callable[..., R]], args: Iterable[Any], **kwargs: Any) -> list[R]:
+		r""" Shortcut for :py:meth:`map` with ``use_starmap=True``, calling func(\*args[i]) """
+		return self.map(func, args, use_starmap=True, **kwargs)
+
+	def __enter__(self) -> WorkerPool:
+		""" Enter context manager which starts the workers """
+		return self.start()
+
+	def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+		""" Exit context manager which stops the workers (cancelling pending tasks on error) """
+		self.shutdown(wait=True, cancel_futures=exc_type is not None)
+
+	async def __aenter__(self) -> WorkerPool:
+		""" Enter async context manager which starts the workers """
+		return self.__enter__()
+
+	async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+		""" Exit async context manager which stops the workers """
+		self.__exit__(exc_type, exc_val, exc_tb)
+
+
+# "Private" initializer of the WorkerPool processes (must be at module level for pickling)
+def init_pool_worker(
+	nice: int | None,
+	process_title: str | None,
+	worker_index: Any,
+	capturer: CaptureOutput | None,
+	counter: Any,
+) -> None:
+	""" Apply the pool options once in a newly started worker process.
+
+	Args:
+		nice			(int | None):				Priority to set (None to skip)
+		process_title	(str | None):				Process title to set, suffixed by the worker index (None to skip)
+		worker_index	(multiprocessing.Value):	Shared counter used to number the workers
+		capturer		(CaptureOutput | None):		Capturer to redirect stdout/stderr to (None to skip)
+		counter			(multiprocessing.Value):	Shared counter of finished tasks
+	"""
+	init_worker_progress(counter)
+	if nice is not None:
+		set_process_priority(nice)
+	if process_title is not None:
+		import setproctitle
+		with worker_index.get_lock():
+			index: int = worker_index.value
+			worker_index.value += 1
+		setproctitle.setproctitle(f"{process_title} #{index}")
+	if capturer is not None:
+		capturer.redirect()
+
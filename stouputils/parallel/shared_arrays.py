@@ -0,0 +1,381 @@
+
+# Imports
+import os
+import secrets
+from collections.abc import Callable, Iterable, Iterator
+from typing import TYPE_CHECKING, Any, cast
+
+if TYPE_CHECKING:
+	from multiprocessing.shared_memory import SharedMemory
+
+	from numpy.typing import NDArray
+
+
+class SharedArray:
+	""" Picklable handle of a NumPy array stored in a ``multiprocessing.shared_memory`` block.
+
+	Only the name, shape and dtype of the block are pickled, so sending a handle to another process
+	costs a few bytes whatever the size of the array. The receiving process attaches to the block
+	and gets a view of the array instead of a copy (see :py:meth:`attach`).
+
+	Args:
+		name	(str):				Name of the shared memory block
+		shape	(tuple[int, ...]):	Shape of the array
+		dtype	(str):				Dtype of the array (``numpy.dtype.str``, e.g. '<f8')
+
+	Examples:
+		>>> import numpy as np
+		>>> segments = {}
+		>>> handle = SharedArray.create(np.arange(6).reshape(2, 3), segments)
+		>>> handle.shape, handle.dtype == np.dtype(int).str
+		((2, 3), True)
+		>>> shm, view = handle.attach()
+		>>> view.tolist()
+		[[0, 1, 2], [3, 4, 5]]
+		>>> del view; shm.close()
+		>>> release_segments(segments)
+	"""
+	def __init__(self, name: str, shape: tuple[int, ...], dtype: str) -> None:
+		self.name: str = name
+		""" Name of the shared memory block """
+		self.shape: tuple[int, ...] = shape
+		""" Shape of the array """
+		self.dtype: str = dtype
+		""" Dtype of the array """
+
+	def __repr__(self) -> str:
+		return f"<SharedArray name={self.name!r} shape={self.shape} dtype={self.dtype!r}>"
+
+	def __reduce__(self) -> tuple[type["SharedArray"], tuple[str, tuple[int, ...], str]]:
+		return (SharedArray, (self.name, self.shape, self.dtype))
+
+	@staticmethod
+	def create(array: "NDArray[Any]", segments: dict[str, "SharedMemory"], prefix: str | None = None) -> "SharedArray":
+		""" Copy an array into a new shared memory block (the only copy of the transfer).
+
+		Args:
+			array		(NDArray):					Array to share
+			segments	(dict[str, SharedMemory]):	Created blocks are stored here (by name) until released
+			prefix		(str | None):				Prefix of the name of the block (Defaults to None, meaning a random name)
+		Returns:
+			SharedArray: Handle of the shared array
+		"""
+		import numpy as np
+		shm: SharedMemory = create_segment(max(1, array.nbytes), prefix)
+		segments[shm.name] = shm
+		np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+		return SharedArray(shm.name, tuple(array.shape), array.dtype.str)
+
+	def attach(self) -> tuple["SharedMemory", "NDArray[Any]"]:
+		""" Attach to the shared memory block and return a view of the array (no copy).
+
+		The block must stay open as long as the view is used, close it afterwards.
+
+		Returns:
+			tuple[SharedMemory, NDArray]: The attached block and the view of the array
+		"""
+		import numpy as np
+		shm: SharedMemory = open_segment(self.name)
+		return shm, np.ndarray(self.shape, dtype=np.dtype(self.dtype), buffer=shm.buf)
+
+
+# "Private" function to open a shared memory block without registering it in the resource tracker
+def open_segment(name: str | None, size: int = 0, create: bool | None = None) -> "SharedMemory":
+	""" Create (if name is None or create is True) or attach to a shared memory block, without resource tracking.
+
+	The resource tracker of the process creating or attaching a block would otherwise unlink it
+	(with a "leaked shared_memory" warning) when that process exits, even if another process still uses it.
+	The lifetime of the blocks is handled explicitly instead (see :py:func:`release_segments`).
+
+	Args:
+		name	(str | None):	Name of the block to attach to or to create, or None to create a new one with a random name
+		size	(int):			Size of the block to create in bytes
+		create	(bool | None):	Whether to create the block (Defaults to None, meaning only if name is None)
+	Returns:
+		SharedMemory: The opened block
+	"""
+	import sys
+	from multiprocessing.shared_memory import SharedMemory
+	if create is None:
+		create = name is None
+	if sys.version_info >= (3, 13):
+		return SharedMemory(name=name, create=create, size=size, track=False)
+
+	# Python 3.12: unregister the block from the resource tracker manually
+	shm: SharedMemory = SharedMemory(name=name, create=create, size=size)
+	if os.name != "nt":
+		try:
+			from multiprocessing import resource_tracker
+			resource_tracker.unregister(shm._name, "shared_memory")  # pyright: ignore[reportAttributeAccessIssue, reportUnknownMemberType]
+		except Exception:
+			pass
+	return shm
+
+
+# "Private" function to create a shared memory block whose name starts with the given prefix
+def create_segment(size: int, prefix: str | None = None) -> "SharedMemory":
+	""" Create a shared memory block without resource tracking (see :py:func:`open_segment`),
+	named with the prefix followed by random characters, so that :py:func:`unlink_prefixed_segments` can find it.
+
+	Args:
+		size	(int):			Size of the block in bytes
+		prefix	(str | None):	Prefix of the name of the block (Defaults to None, meaning a random name)
+	Returns:
+		SharedMemory: The created block
+	"""
+	if prefix is None:
+		return open_segment(None, size)
+	while True:
+		try:
+			return open_segment(f"{prefix}{secrets.token_hex(6)}", size, create=True)
+		except FileExistsError:
+			continue
+
+
+# "Private" function to unlink the blocks left with a name prefix (e.g. results never received by the parent process)
+def unlink_prefixed_segments(prefix: str, folder: str = "/dev/shm") -> None:
+	""" Unlink every shared memory block whose name starts with the prefix, ignoring already released ones.
+
+	Blocks can only be listed where they are files of a folder (``/dev/shm`` on Linux),
+	elsewhere this does nothing.
+
+	Args:
+		prefix	(str):	Prefix of the names of the blocks
+		folder	(str):	Folder listing the blocks (Defaults to "/dev/shm")
+	"""
+	try:
+		names: list[str] = [name for name in os.listdir(folder) if name.startswith(prefix)]
+	except OSError:
+		return
+	for name in names:
+		try:
+			release_segments({name: open_segment(name)})
+		except OSError:
+			pass
+
+
+# "Private" function to close and unlink shared memory blocks
+def release_segments(segments: dict[str, "SharedMemory"], names: Iterable[str] | None = None) -> None:
+	""" Close and unlink the given blocks (all of them if names is None), ignoring already released ones.
+
+	Args:
+		segments	(dict[str, SharedMemory]):	Opened blocks by name, released ones are removed
+		names		(Iterable[str] | None):		Names of the blocks to release (Defaults to None, meaning all)
+	"""
+	for name in list(segments) if names is None else names:
+		shm: SharedMemory | None = segments.pop(name, None)
+		if shm is None:
+			continue
+		try:
+			shm.close()
+			shm.unlink()
+		except (FileNotFoundError, BufferError):
+			pass
+
+
+# "Private" function to replace large arrays in a (nested) argument or result by shared memory handles
+def share_arrays(obj: Any, segments: dict[str, "SharedMemory"], min_nbytes: int, prefix: str | None = None) -> Any:
+	""" Recursively replace NumPy arrays of at least min_nbytes bytes in tuples, lists and dicts by :py:class:`SharedArray` handles.
+
+	Smaller arrays and arrays of Python objects are left untouched (pickling them is cheaper or required).
+
+	Args:
+		obj			(Any):						Object to transform
+		segments	(dict[str, SharedMemory]):	Created blocks are stored here (by name)
+		min_nbytes	(int):						Minimum size of an array to be shared
+		prefix		(str | None):				Prefix of the names of the created blocks (Defaults to None, meaning random names)
+	Returns:
+		Any: The transformed object
+
+	Examples:
+		>>> import numpy as np
+		>>> segments = {}
+		>>> shared = share_arrays((np.zeros(1000), {"small": np.zeros(2)}, "text"), segments, min_nbytes=1024)
+		>>> type(shared[0]).__name__, type(shared[1]["small"]).__name__, shared[2], len(segments)
+		('SharedArray', 'ndarray', 'text', 1)
+		>>> release_segments(segments)
+	"""
+	import numpy as np
+	if isinstance(obj, np.ndarray):
+		array: NDArray[Any] = cast("NDArray[Any]", obj)
+		if array.nbytes >= min_nbytes and not array.dtype.hasobject:
+			return SharedArray.create(array, segments, prefix)
+		return array
+	if isinstance(obj, list):
+		return [share_arrays(x, segments, min_nbytes, prefix) for x in cast(list[Any], obj)]
+	if isinstance(obj, tuple):
+		values: tuple[Any, ...] = cast(tuple[Any, ...], obj)
+		items: list[Any] = [share_arrays(x, segments, min_nbytes, prefix) for x in values]
+		return tuple(items) if type(values) is tuple else type(values)(*items)	# Named tuples are rebuilt with their fields
+	if isinstance(obj, dict):
+		return {k: share_arrays(v, segments, min_nbytes, prefix) for k, v in cast(dict[Any, Any], obj).items()}
+	return obj
+
+
+# "Private" function to replace shared memory handles in a (nested) argument or result by views of the arrays
+def attach_arrays(obj: Any, attached: list[tuple["SharedMemory", "NDArray[Any]"]]) -> Any:
+	""" Recursively replace :py:class:`SharedArray` handles in tuples, lists and dicts by views of the arrays.
+
+	Args:
+		obj			(Any):								Object to transform
+		attached	(list[tuple[SharedMemory, NDArray]]):	Attached blocks and their views are appended here,
+			the blocks must stay open while the views are used
+	Returns:
+		Any: The transformed object
+	"""
+	if isinstance(obj, SharedArray):
+		shm, view = obj.attach()
+		attached.append((shm, view))
+		return view
+	if isinstance(obj, list):
+		return [attach_arrays(x, attached) for x in cast(list[Any], obj)]
+	if isinstance(obj, tuple):
+		values: tuple[Any, ...] = cast(tuple[Any, ...], obj)
+		items: list[Any] = [attach_arrays(x, attached) for x in values]
+		return tuple(items) if type(values) is tuple else type(values)(*items)	# Named tuples are rebuilt with their fields
+	if isinstance(obj, dict):
+		return {k: attach_arrays(v, attached) for k, v in cast(dict[Any, Any], obj).items()}
+	return obj
+
+
+# "Private" function to receive a result containing shared memory handles in the parent process
+def receive_arrays(obj: Any) -> Any:
+	""" Replace the :py:class:`SharedArray` handles of a result by arrays backed by the shared memory blocks.
+
+	The blocks are unlinked right away (the memory stays mapped) and closed when the arrays are garbage collected.
+	On Windows, where a block disappears when its last handle is closed, results are never shared (see :py:func:`shared_memory_wrapper`).
+
+	Args:
+		obj	(Any):	Result received from a worker
+	Returns:
+		Any: The result with views instead of handles
+	"""
+	import weakref
+	attached: list[tuple[SharedMemory, NDArray[Any]]] = []
+	result: Any = attach_arrays(obj, attached)
+	for shm, view in attached:
+		try:
+			shm.unlink()
+		except FileNotFoundError:
+			pass
+		weakref.finalize(view, close_segment, shm)
+	return result
+
+
+# "Private" function to close a shared memory block once its views are garbage collected
+def close_segment(shm: "SharedMemory") -> None:
+	""" Close a block, ignoring errors (e.g. views that are still exported). """
+	try:
+		shm.close()
+	except BufferError:
+		pass
+
+
+# "Private" function executing a task with shared memory arguments in a worker (must be at module level for pickling)
+def shared_memory_wrapper[T, R](args: tuple[Callable[[T], R], T, int, str]) -> tuple[Any, list[str]]:
+	""" Wrapper function attaching the shared arrays of the argument, calling the function, and sharing the arrays of the result.
+
+	The input blocks are closed and unlinked here as soon as the task is done, so the memory is released
+	without waiting for the end of the whole execution. The result blocks are named with the prefix of the session,
+	so that the ones never received by the parent process are unlinked by :py:meth:`SharedArraysSession.cleanup`.
+
+	Args:
+		tuple[Callable,T,int,str]: Tuple containing:
+			Callable: Target function to execute
+			T: Argument with SharedArray handles instead of large arrays
+			int: Minimum size in bytes of a result array to be shared
+			str: Prefix of the names of the result blocks
+
+	Returns:
+		tuple[Any,list[str]]: Result with SharedArray handles instead of large arrays, and names of the consumed input blocks
+	"""
+	func, arg, min_nbytes, prefix = args
+	attached: list[tuple[SharedMemory, NDArray[Any]]] = []
+	try:
+		result: Any = func(attach_arrays(arg, attached))
+		if os.name != "nt":
+			# Result blocks are closed here but not unlinked, the parent process takes ownership of them
+			outputs: dict[str, SharedMemory] = {}
+			try:
+				result = share_arrays(result, outputs, min_nbytes, prefix)
+			except BaseException:
+				release_segments(outputs)	# e.g. no space left for the second array, unlink the first one
+				raise
+			for shm in outputs.values():
+				close_segment(shm)
+		return result, [shm.name for shm, _ in attached]
+	finally:
+		blocks: list[SharedMemory] = [shm for shm, _ in attached]
+		attached.clear()	# Drop the views so that the blocks can be closed
+		for shm in blocks:
+			close_segment(shm)
+			try:
+				shm.unlink()
+			except FileNotFoundError:
+				pass
+
+
+class SharedArraysSession:
+	""" Parent side of the shared memory transport of NumPy arrays, used by ``shared_memory=True``.
+
+	- :py:meth:`wrap` lazily copies the large arrays of each argument into shared memory blocks (and wraps the function).
+	- :py:meth:`unwrap` releases the input blocks of each finished task and turns its result handles into arrays.
+	- :py:meth:`cleanup` releases every remaining block (cancelled or failed tasks, results never received), call it in a ``finally`` once the workers stopped.
+
+	Works with both the fork and spawn start methods, as blocks are found by name.
+
+	Args:
+		min_nbytes (int): Minimum size in bytes of an array to be shared (Defaults to MIN_NBYTES)
+
+	Examples:
+		>>> import numpy as np
+		>>> session = SharedArraysSession(min_nbytes=8)
+		>>> func, args = session.wrap(np.sum, [np.ones(100), np.ones(10)])
+		>>> [float(x) for x in session.unwrap(func(arg) for arg in args)]
+		[100.0, 10.0]
+		>>> session.cleanup(); session.segments
+		{}
+	"""
+	MIN_NBYTES: int = 64 * 1024
+	""" Default minimum size of an array to be shared, smaller arrays are cheaper to pickle """
+
+	def __init__(self, min_nbytes: int | None = None) -> None:
+		self.min_nbytes: int = min_nbytes if min_nbytes is not None else self.MIN_NBYTES
+		""" Minimum size in bytes of an array to be shared """
+		self.segments: dict[str, SharedMemory] = {}
+		""" Input blocks created by this session and not released yet """
+		self.prefix: str = f"sas_{secrets.token_hex(4)}_"
+		""" Prefix of the names of the blocks created by this session and its workers """
+
+	def wrap(self, func: Callable[[Any], Any], args: Iterable[Any]) -> tuple[Callable[[Any], Any], Iterator[Any]]:
+		""" Lazily share the arrays of the arguments, and wrap the function accordingly.
+
+		Args:
+			func	(Callable):	Function to execute
+			args	(Iterable):	Iterable of arguments, consumed lazily
+		Returns:
+			tuple[Callable, Iterator]: The wrapped function and the iterator of its arguments
+		"""
+		return shared_memory_wrapper, (
+			(func, share_arrays(arg, self.segments, self.min_nbytes, self.prefix), self.min_nbytes, self.prefix) for arg in args
+		)
+
+	def unwrap(self, results: Iterable[tuple[Any, list[str]]]) -> Iterator[Any]:
+		""" Release the input blocks of each finished task and yield its result with arrays instead of handles.
+
+		Args:
+			results (Iterable[tuple[Any, list[str]]]): Results returned by :py:func:`shared_memory_wrapper`
+		Returns:
+			Iterator[Any]: The results of the function
+		"""
+		for result, consumed in results:
+			release_segments(self.segments, consumed)
+			yield receive_arrays(result)
+
+	def cleanup(self) -> None:
+		""" Release every remaining input block (tasks that were cancelled, failed or never started),
+		and unlink the result blocks that were never received (e.g. when the iteration stopped early).
+		"""
+		release_segments(self.segments)
+		unlink_prefixed_segments(self.prefix)
+
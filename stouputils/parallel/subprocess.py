@@ -2,12 +2,17 @@
 # Imports
 import time
 from collections.abc import Callable
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from ..typing import JsonDict
 from .capturer import CaptureOutput
 from .common import resolve_process_title
 
+if TYPE_CHECKING:
+	from multiprocessing.process import BaseProcess
+
+	from .supervised import SubprocessPool
+
 
 class RemoteSubprocessError(RuntimeError):
 	""" Raised in the parent when the child raised an exception - contains the child's formatted traceback. """
@@ -26,6 +31,7 @@ def run_in_subprocess[R](
 	no_join: bool = False,
 	capture_output: bool = True,
 	process_title: str | None = None,
+	pool: "SubprocessPool | None" = None,
 	**kwargs: Any
 ) -> R:
 	""" Execute a function in a subprocess with positional and keyword arguments.
@@ -46,6 +52,9 @@ def run_in_subprocess[R](
 			from the subprocess in the main process.
 		process_title  (str | None):   If provided, sets the process title visible in process lists.
 			If it starts with '+++', this prefix is replaced by the current process title.
+		pool           (SubprocessPool | None): Pool of warm isolated workers executing the call instead of a new process
+			(Defaults to None). If provided, the capture_output and process_title options of the pool are used instead.
+			See :py:class:`~stouputils.parallel.supervised.SubprocessPool`.
 		**kwargs       (Any):          Keyword arguments to pass to the function.
 
 	Returns:
@@ -77,8 +86,17 @@ def run_in_subprocess[R](
 
 			> # With timeout to prevent hanging
 			> run_in_subprocess(some_gpu_func, data, timeout=300.0, process_title="+++_gpu_worker")
+
+			> # Thousands of isolated calls without paying the process start each time
+			> with SubprocessPool(max_workers=2, max_tasks_per_child=50) as pool:
+			.     results = [run_in_subprocess(leaky_native_call, x, pool=pool) for x in inputs]
 	"""
 	import multiprocessing as mp
+
+	# Use the warm workers of the pool if provided
+	if pool is not None:
+		assert not no_join, "no_join can't be used with a pool"
+		return pool.run(func, *args, timeout=timeout, **kwargs)
 	from multiprocessing import Queue
 
 	# Create a queue to get the result from the subprocess (only if we need to wait)
@@ -97,29 +115,6 @@ def run_in_subprocess[R](
 	)
 	process.start()
 
-	# Function to kill the process safely
-	def kill_process_tree() -> None:
-		if not process.is_alive():
-			return
-		process.terminate()
-		time.sleep(0.5)
-		if process.is_alive():
-			import psutil
-			proc = psutil.Process(process.pid)
-			procs = [proc, *proc.children(recursive=True)]
-			for p in procs:
-				try:
-					p.terminate()
-				except Exception:
-					pass
-			_, alive = psutil.wait_procs(procs, timeout=3)
-			for p in alive:
-				try:
-					p.kill()
-				except Exception:
-					pass
-		process.join()
-
 	# For capture_output we must close the parent's copy of the write fd and start listener
 	if capturer is not None:
 		capturer.parent_close_write()
@@ -153,7 +148,7 @@ def run_in_subprocess[R](
 			# terminates the child during cleanup, leaking semaphores.
 			if process.is_alive():
 				process.join(timeout=2.0)
-			kill_process_tree()
+			kill_process_tree(process)
 
 		# If the child sent a structured exception, raise it with the formatted traceback
 		if result_payload.pop("ok", False) is False:
@@ -220,15 +215,8 @@ def _subprocess_wrapper[R](
 	except Exception as e:
 		if result_queue is not None:
 			try:
-				import traceback
-				tb = traceback.format_exc()
 				# Use timeout to prevent blocking if parent is no longer listening
-				result_queue.put({
-					"ok": False,
-					"exc_type": e.__class__.__name__,
-					"exc_repr": repr(e),
-					"traceback_str": tb,
-				}, timeout=5.0)
+				result_queue.put(exception_payload(e), timeout=5.0)
 			except Exception:
 				# Nothing we can do if even this fails
 				pass
@@ -246,3 +234,74 @@ def _subprocess_wrapper[R](
 		if capturer is not None:
 			capturer.child_close()  # Close child's copy of the write end
 
+
+# "Private" function to describe an exception raised in a child process (sent back to the parent)
+def exception_payload(e: BaseException) -> JsonDict:
+	""" Build the payload sent to the parent when the child raised an exception,
+	the parent raises it back as a :py:exc:`RemoteSubprocessError` (``RemoteSubprocessError(**payload)`` without "ok").
+
+	Must be called inside the ``except`` block to capture the traceback.
+
+	Args:
+		e (BaseException): The exception raised by the child
+
+	Returns:
+		JsonDict: Dictionary with the keys "ok" (False), "exc_type", "exc_repr" and "traceback_str"
+
+	Examples:
+		>>> try:
+		...     int("x")
+		... except ValueError as e:
+		...     payload = exception_payload(e)
+		>>> payload["ok"], payload["exc_type"], payload["traceback_str"].splitlines()[-1]
+		(False, 'ValueError', "ValueError: invalid literal for int() with base 10: 'x'")
+	"""
+	import traceback
+	return {
+		"ok": False,
+		"exc_type": e.__class__.__name__,
+		"exc_repr": repr(e),
+		"traceback_str": traceback.format_exc(),
+	}
+
+# "Private" function to kill a child process and all its descendants
+def kill_process_tree(process: "BaseProcess", grace_period: float = 0.5) -> None:
+	""" Terminate a child process and all its descendants, killing the ones still alive after the grace period.
+
+	The descendants are listed before terminating the process, as they are re-parented (and cannot be found anymore)
+	once it exited, so they are not left orphaned when the process exits on SIGTERM.
+
+	Args:
+		process			(multiprocessing.Process):	Process to kill (does nothing if it already exited)
+		grace_period	(float):					Seconds given to the process to exit after SIGTERM (Defaults to 0.5)
+	"""
+	if not process.is_alive():
+		process.join()
+		return
+	import psutil
+	children: list[psutil.Process] = []
+	if process.pid is not None:
+		try:
+			children = psutil.Process(process.pid).children(recursive=True)
+		except psutil.NoSuchProcess:
+			pass
+	process.terminate()
+	process.join(timeout=grace_period)
+	procs: list[psutil.Process] = [p for p in children if p.is_running()]
+	if process.is_alive() and process.pid is not None:
+		try:
+			procs.insert(0, psutil.Process(process.pid))
+		except psutil.NoSuchProcess:
+			pass
+	for p in procs:
+		try:
+			p.terminate()
+		except Exception:
+			pass
+	_, alive = psutil.wait_procs(procs, timeout=3)
+	for p in alive:
+		try:
+			p.kill()
+		except Exception:
+			pass
+	process.join()
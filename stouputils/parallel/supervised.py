@@ -0,0 +1,555 @@
+
+# Imports
+import time
+from collections import deque
+from collections.abc import Callable, Generator, Iterable
+from typing import TYPE_CHECKING, Any, Literal
+
+from ..ctx.common import AbstractBothContextManager
+from ..typing import JsonDict
+from .capturer import CaptureOutput, PipeWriter
+from .common import resolve_process_title, set_process_priority
+from .subprocess import RemoteSubprocessError, exception_payload, kill_process_tree
+
+if TYPE_CHECKING:
+	from multiprocessing.connection import Connection
+	from multiprocessing.process import BaseProcess
+
+
+# Worker process that can be killed and replaced on its own
+class SupervisedWorker:
+	""" Long-lived worker process executing the tasks it receives through its own pipe.
+
+	Unlike the workers of a ``ProcessPoolExecutor``, each SupervisedWorker is known by the parent,
+	so a hung (or crashed) worker can be killed and replaced without breaking the other ones.
+
+	Args:
+		index			(int):						Index of the worker slot, appended to the process title
+		nice			(int | None):				Priority of the worker process (None for no adjustment)
+		process_title	(str | None):				Title of the worker process, already resolved (None to keep the default)
+		capturer		(CaptureOutput | None):		Capturer to redirect the worker output to (None to skip)
+	"""
+	def __init__(self, index: int, nice: int | None, process_title: str | None, capturer: CaptureOutput | None) -> None:
+		import multiprocessing as mp
+		self.index: int = index
+		""" Index of the worker slot """
+		self.conn: Connection
+		""" Parent end of the pipe, used to send tasks and receive their payloads """
+		self.conn, child_conn = mp.Pipe()
+		self.process: BaseProcess = mp.Process(
+			target=supervised_worker_loop, args=(child_conn, nice, process_title, index, capturer), daemon=True
+		)
+		""" Underlying worker process """
+		self.tasks_done: int = 0
+		""" Number of tasks executed by this worker process """
+		self.process.start()
+		child_conn.close()
+
+	def send(self, func: Callable[..., Any], args: tuple[Any, ...], kwargs: dict[str, Any]) -> None:
+		""" Send a task to the worker, its payload is then received with ``conn.recv()``. """
+		self.conn.send((func, args, kwargs))
+
+	def stop(self, timeout: float | None = 2.0) -> None:
+		""" Ask the worker to exit once idle, and kill it if it doesn't within the timeout.
+
+		Args:
+			timeout (float | None): Seconds to wait for the worker to exit, 0 to let it exit on its own without waiting
+		"""
+		try:
+			self.conn.send(None)
+		except (OSError, ValueError):
+			pass
+		if timeout == 0:
+			self.conn.close()
+			return
+		self.process.join(timeout=timeout)
+		self.kill()
+
+	def kill(self) -> None:
+		""" Kill the worker process (and its children) immediately, and close the pipe. """
+		kill_process_tree(self.process)
+		self.conn.close()
+
+
+# "Private" main loop of a SupervisedWorker process (must be at module level for pickling)
+def supervised_worker_loop(
+	conn: "Connection",
+	nice: int | None,
+	process_title: str | None,
+	index: int,
+	capturer: CaptureOutput | None,
+) -> None:
+	""" Execute the (func, args, kwargs) tasks received through the pipe until None (or EOF) is received.
+
+	Each task is answered with a payload: ``{"ok": True, "result": ...}``,
+	or the :py:func:`~stouputils.parallel.subprocess.exception_payload` of the exception.
+
+	Args:
+		conn			(Connection):				Child end of the pipe
+		nice			(int | None):				Priority to set (None to skip)
+		process_title	(str | None):				Process title to set, suffixed by the worker index (None to skip)
+		index			(int):						Index of the worker slot
+		capturer		(CaptureOutput | None):		Capturer to redirect stdout/stderr to (None to skip)
+	"""
+	import sys
+	if nice is not None:
+		set_process_priority(nice)
+	if process_title is not None:
+		import setproctitle
+		setproctitle.setproctitle(f"{process_title} #{index}")
+	if capturer is not None:
+		capturer.redirect()
+	try:
+		while True:
+			try:
+				task: tuple[Callable[..., Any], tuple[Any, ...], dict[str, Any]] | None = conn.recv()
+			except EOFError:
+				break
+			if task is None:
+				break
+			func, args, kwargs = task
+			payload: JsonDict
+			try:
+				payload = {"ok": True, "result": func(*args, **kwargs)}
+			except Exception as e:
+				payload = exception_payload(e)
+			if isinstance(sys.stdout, PipeWriter):
+				sys.stdout.drain()	# The output of the task arrives before its result
+			try:
+				conn.send(payload)
+			except Exception as e:	# The result could not be pickled
+				conn.send(exception_payload(e))
+	except KeyboardInterrupt:
+		pass
+	finally:
+		conn.close()
+		if capturer is not None:
+			capturer.child_close()
+
+
+# "Private" engine running tasks on supervised workers, with per-task timeout and retries
+def iter_supervised_results(
+	func: Callable[[Any], Any],
+	args: Iterable[Any],
+	max_workers: int,
+	timeout: float | None = None,
+	retries: int = 0,
+	nice: int | None = None,
+	process_title: str | None = None,
+	capturer: CaptureOutput | None = None,
+) -> Generator[tuple[int, Any], None, None]:
+	""" Execute func(arg) for each argument on supervised workers, yielding (index, result) in completion order.
+
+	- A task running longer than ``timeout`` seconds gets its worker killed (with its children) and replaced
+	- A task whose worker dies (segfault, os._exit, out of memory killer, ...) only fails this task
+	- A failed task is executed again up to ``retries`` times, failed tasks are retried before new ones
+
+	A task that still fails after its retries is yielded as a :py:exc:`~stouputils.parallel.subprocess.RemoteSubprocessError`
+	(with ``remote_type`` "TimeoutError" for timeouts and "WorkerDiedError" for crashed workers).
+
+	Args:
+		func			(Callable):					Function to execute (SHOULD BE A TOP-LEVEL FUNCTION TO BE PICKLABLE)
+		args			(Iterable):					Arguments to pass to the function, consumed lazily
+		max_workers		(int):						Maximum number of worker processes
+		timeout			(float | None):				Maximum duration of a task in seconds (Defaults to None, no limit)
+		retries			(int):						Number of times a failed task is executed again (Defaults to 0)
+		nice			(int | None):				Priority of the worker processes (Defaults to None)
+		process_title	(str | None):				Title of the worker processes, already resolved (Defaults to None)
+		capturer		(CaptureOutput | None):		Capturer to redirect the worker output to (Defaults to None)
+
+	Returns:
+		Iterator[tuple[int, Any]]: Index of the argument and its result (or RemoteSubprocessError), in completion order
+
+	Examples:
+		.. code-block:: python
+
+			> sorted(iter_supervised_results(int, ["1", "x"], max_workers=2))
+			[(0, 1), (1, RemoteSubprocessError("Exception in subprocess (ValueError): ...")]
+
+			> # A hung task is killed after 1 second, the other tasks are not affected
+			> dict(iter_supervised_results(time.sleep, [0, 60, 0], max_workers=2, timeout=1.0))[1].remote_type
+			'TimeoutError'
+	"""
+	from multiprocessing.connection import wait
+
+	args_iter: enumerate[Any] = enumerate(args)
+	retry_queue: deque[tuple[int, Any, int]] = deque()		# (index, arg, attempt) of the failed tasks to retry
+	idle: list[int] = []									# Slots of the idle workers
+	workers: list[SupervisedWorker] = []
+	running: dict[int, tuple[int, Any, int, float]] = {}	# slot -> (index, arg, attempt, deadline)
+	exhausted: bool = False
+
+	def next_task() -> tuple[int, Any, int] | None:
+		nonlocal exhausted
+		if retry_queue:
+			return retry_queue.popleft()
+		if not exhausted:
+			try:
+				index, arg = next(args_iter)
+				return index, arg, 0
+			except StopIteration:
+				exhausted = True
+		return None
+
+	try:
+		while True:
+			# Dispatch tasks to idle workers (starting new workers if needed)
+			while idle or len(workers) < max_workers:
+				task: tuple[int, Any, int] | None = next_task()
+				if task is None:
+					break
+				if idle:
+					slot: int = idle.pop()
+				else:
+					slot = len(workers)
+					workers.append(SupervisedWorker(slot, nice, process_title, capturer))
+				workers[slot].send(func, (task[1],), {})
+				deadline: float = time.monotonic() + timeout if timeout is not None else float("inf")
+				running[slot] = (*task, deadline)
+			if not running:
+				return
+
+			# Wait for a payload, a dead worker or the nearest deadline
+			wait_timeout: float | None = None
+			if timeout is not None:
+				wait_timeout = max(0.0, min(d for *_, d in running.values()) - time.monotonic())
+			handles: list[Any] = [workers[slot].conn for slot in running] + [workers[slot].process.sentinel for slot in running]
+			ready: list[Any] = wait(handles, timeout=wait_timeout)
+
+			# Handle finished, crashed and timed out tasks
+			now: float = time.monotonic()
+			for slot, (index, arg, attempt, deadline) in list(running.items()):
+				worker: SupervisedWorker = workers[slot]
+				payload: JsonDict
+				if worker.conn in ready or worker.process.sentinel in ready:
+					try:
+						payload = worker.conn.recv()
+						broken: bool = False
+					except (EOFError, OSError):
+						payload = error_payload("WorkerDiedError", f"Worker process died with exit code {worker.process.exitcode}")
+						broken = True
+				elif now >= deadline:
+					payload = error_payload("TimeoutError", f"Task exceeded timeout of {timeout} seconds and its worker was killed")
+					broken = True
+				else:
+					continue
+
+				# Replace the worker if it is dead or hung, otherwise it becomes idle
+				del running[slot]
+				worker.tasks_done += 1
+				if broken:
+					worker.kill()
+					workers[slot] = SupervisedWorker(slot, nice, process_title, capturer)
+				idle.append(slot)
+
+				# Yield the result, or retry the failed task
+				if payload.pop("ok"):
+					yield index, payload["result"]
+				elif attempt < retries:
+					retry_queue.append((index, arg, attempt + 1))
+				else:
+					yield index, RemoteSubprocessError(**payload)
+	finally:
+		# Kill the workers still running a task (interrupted or failed iteration), stop the idle ones
+		for slot, worker in enumerate(workers):
+			if slot in running:
+				worker.kill()
+			else:
+				worker.stop()
+
+
+# "Private" function to describe a task that failed because of its worker (timeout, crash, ...)
+def error_payload(exc_type: str, message: str) -> JsonDict:
+	""" Build a payload like :py:func:`~stouputils.parallel.subprocess.exception_payload` for an error detected by the parent.
+
+	Examples:
+		>>> RemoteSubprocessError(**{k: v for k, v in error_payload("TimeoutError", "Too slow").items() if k != "ok"}).remote_repr
+		"TimeoutError('Too slow')"
+	"""
+	return {"ok": False, "exc_type": exc_type, "exc_repr": f"{exc_type}({message!r})", "traceback_str": ""}
+
+
+# "Private" function executing a whole batch on supervised workers, used by multiprocessing()
+def supervised_map(
+	func: Callable[[Any], Any],
+	args: list[Any],
+	max_workers: int,
+	timeout: float | None,
+	retries: int,
+	on_error: Literal["raise", "return", "skip"],
+	nice: int | None,
+	process_title: str | None,
+	capture_output: bool,
+	verbose: bool,
+	desc: str,
+	bar_format: str,
+	ascii: bool,
+	tqdm_kwargs: dict[str, Any],
+) -> list[Any]:
+	""" Execute func over args with :py:func:`iter_supervised_results` and return the results in input order.
+
+	Args:
+		on_error	(str):	What to do with a task that still fails after its retries:
+			"raise" raises its RemoteSubprocessError (after stopping the workers),
+			"return" puts its RemoteSubprocessError in the results, "skip" leaves it out of the results
+
+	Returns:
+		list[Any]: Results in input order
+	"""
+	assert on_error in ("raise", "return", "skip"), f"Invalid on_error value: {on_error!r}"
+	capturer: CaptureOutput | None = CaptureOutput() if capture_output else None
+	if capturer is not None:
+		capturer.start_listener()
+	pbar: Any = None
+	if verbose:
+		from tqdm.auto import tqdm
+		pbar = tqdm(total=len(args), desc=desc, bar_format=bar_format, ascii=ascii, **tqdm_kwargs)
+
+	results: list[Any] = [None] * len(args)
+	skipped: set[int] = set()
+	iterator: Generator[tuple[int, Any], None, None] = iter_supervised_results(
+		func, args, max_workers, timeout, retries, nice, resolve_process_title(process_title), capturer
+	)
+	try:
+		for index, result in iterator:
+			if isinstance(result, RemoteSubprocessError):
+				if on_error == "raise":
+					raise result
+				if on_error == "skip":
+					skipped.add(index)
+			results[index] = result
+			if pbar is not None:
+				pbar.update(1)
+	finally:
+		iterator.close()
+		if pbar is not None:
+			pbar.close()
+		if capturer is not None:
+			capturer.parent_close_write()
+			capturer.join_listener(timeout=5.0)
+	if skipped:
+		return [result for index, result in enumerate(results) if index not in skipped]
+	return results
+
+
+# Pool of warm isolated worker processes for run_in_subprocess()
+class SubprocessPool(AbstractBothContextManager["SubprocessPool"]):
+	r""" Pool of pre-started isolated worker processes, to run functions in a subprocess without paying the start cost each time.
+
+	:py:func:`~stouputils.parallel.subprocess.run_in_subprocess` starts a new process for every call (tens to hundreds
+	of milliseconds with spawn). A SubprocessPool keeps ``max_workers`` processes started in advance, and replaces
+	a worker after ``max_tasks_per_child`` calls (recycling), so leaks of native code stay contained in short-lived processes.
+	The replacement is started right away, so its start cost is hidden if the next call doesn't come immediately
+	(with ``max_tasks_per_child=1``, back-to-back calls still wait for a fresh process each time).
+
+	The semantics are the same as run_in_subprocess: a call exceeding its timeout gets its worker killed (and replaced)
+	and raises a TimeoutError, an exception in the child raises a
+	:py:exc:`~stouputils.parallel.subprocess.RemoteSubprocessError` with the child's traceback,
+	and a crashed worker raises a RuntimeError. Calls can be made from several threads at once.
+
+	Args:
+		max_workers			(int):			Number of worker processes, i.e. of calls running at the same time (Defaults to 1)
+		max_tasks_per_child	(int | None):	Number of calls after which a worker is replaced by a new one
+			(Defaults to None to never replace a healthy worker, 1 for a fresh process per call)
+		capture_output		(bool):			Whether to relay the workers' stdout/stderr to the parent's stdout (Defaults to True)
+		process_title		(str | None):	If provided, sets the process title of the workers (suffixed by the worker index).
+			If it starts with '+++', this prefix is replaced by the current process title.
+		nice				(int | None):	Adjust the priority of the worker processes (Defaults to None).
+			Use Unix-style values: -20 (highest priority) to 19 (lowest priority).
+
+	Examples:
+		.. code-block:: python
+
+			> with SubprocessPool(max_workers=2, max_tasks_per_child=100) as pool:
+			.     pool.run(doctest_square, 5)
+			.     pool.run(leaky_native_call, data, timeout=300.0)
+			25
+
+			> # Same call as run_in_subprocess(), using the warm workers of the pool
+			> pool = SubprocessPool(process_title="+++_gpu_worker")
+			> run_in_subprocess(some_gpu_func, data, timeout=300.0, pool=pool)
+			> pool.shutdown()
+	"""
+	def __init__(
+		self,
+		max_workers: int = 1,
+		max_tasks_per_child: int | None = None,
+		capture_output: bool = True,
+		process_title: str | None = None,
+		nice: int | None = None,
+	) -> None:
+		import threading
+		assert max_workers >= 1, "max_workers must be at least 1"
+		assert max_tasks_per_child is None or max_tasks_per_child >= 1, "max_tasks_per_child must be at least 1 (or None)"
+		self.max_workers: int = max_workers
+		""" Number of worker processes """
+		self.max_tasks_per_child: int | None = max_tasks_per_child
+		""" Number of calls after which a worker is replaced (None to never replace a healthy worker) """
+		self.capture_output: bool = capture_output
+		""" Whether to relay the workers' stdout/stderr to the parent's stdout """
+		self.process_title: str | None = resolve_process_title(process_title)
+		""" Title of the worker processes (None to keep the default) """
+		self.nice: int | None = nice
+		""" Priority of the worker processes (None for no adjustment) """
+		self.capturer: CaptureOutput | None = None
+		""" Capturer relaying the output of the workers (None if not capturing or not started) """
+		self.idle: list[SupervisedWorker] = []
+		""" Started workers waiting for a call """
+		self.nb_busy: int = 0
+		""" Number of workers running a call """
+		self.started: bool = False
+		""" Whether the workers are started """
+		self.shutting_down: bool = False
+		""" Whether :py:meth:`shutdown` is waiting for the running calls (new calls are refused meanwhile) """
+		self.condition: threading.Condition = threading.Condition()
+		""" Condition protecting the state of the pool, notified when a worker becomes idle """
+
+	def __repr__(self) -> str:
+		state: str = "running" if self.started else "stopped"
+		return f"<SubprocessPool max_workers={self.max_workers} max_tasks_per_child={self.max_tasks_per_child} {state}>"
+
+	def start(self) -> "SubprocessPool":
+		""" Start the worker processes (called automatically on first use or when entering the context).
+
+		Returns:
+			SubprocessPool: The pool itself, for chaining
+		"""
+		with self.condition:
+			if self.started:
+				return self
+			if self.capture_output:
+				self.capturer = CaptureOutput()
+				self.capturer.start_listener()
+			self.idle = [self.new_worker(index) for index in range(self.max_workers)]
+			self.started = True
+			return self
+
+	def shutdown(self) -> None:
+		""" Wait for the running calls, then stop the worker processes and the output listener.
+		The calls waiting for a worker raise a RuntimeError. The pool can be started again afterwards.
+		"""
+		with self.condition:
+			self.shutting_down = True
+			self.condition.notify_all()
+			while self.nb_busy > 0:
+				self.condition.wait()
+			workers: list[SupervisedWorker] = self.idle
+			self.idle = []
+			self.started = False
+			self.shutting_down = False
+			capturer: CaptureOutput | None = self.capturer
+			self.capturer = None
+		for worker in workers:
+			worker.stop()
+		if capturer is not None:
+			capturer.parent_close_write()
+			capturer.join_listener(timeout=5.0)
+
+	def run[R](self, func: Callable[..., R], *args: Any, timeout: float | None = None, **kwargs: Any) -> R:
+		""" Execute ``func(*args, **kwargs)`` in a warm worker process, waiting for a worker if they are all busy.
+
+		Args:
+			func		(Callable):		The function to execute (SHOULD BE A TOP-LEVEL FUNCTION TO BE PICKLABLE)
+			*args		(Any):			Positional arguments to pass to the function
+			timeout		(float | None):	Maximum time in seconds to wait for the result (not counting the wait for a free worker).
+				If None, wait indefinitely. If the call exceeds this time, its worker is killed and replaced.
+			**kwargs	(Any):			Keyword arguments to pass to the function
+
+		Returns:
+			R: The return value of the function
+
+		Raises:
+			:py:exc:`~stouputils.parallel.subprocess.RemoteSubprocessError`: If the child raised an exception - contains the child's formatted traceback.
+			:py:exc:`RuntimeError`: If the worker process died during the call, or if the pool was shut down while waiting for a worker.
+			:py:exc:`TimeoutError`: If the call exceeds the specified timeout.
+		"""
+		from multiprocessing.connection import wait
+
+		worker: SupervisedWorker = self.acquire()
+		broken: bool = True
+		try:
+			worker.send(func, args, kwargs)
+			if not wait([worker.conn, worker.process.sentinel], timeout=timeout):
+				raise TimeoutError(f"Subprocess exceeded timeout of {timeout} seconds and was terminated")
+			try:
+				payload: JsonDict = worker.conn.recv()
+			except (EOFError, OSError) as e:
+				worker.process.join(timeout=1.0)
+				raise RuntimeError(f"Subprocess terminated unexpectedly with exit code {worker.process.exitcode}") from e
+			broken = False
+		finally:
+			self.release(worker, broken)
+
+		# If the child sent a structured exception, raise it with the formatted traceback
+		if payload.pop("ok", False) is False:
+			raise RemoteSubprocessError(**payload)
+		return payload["result"]
+
+	def acquire(self) -> SupervisedWorker:
+		""" Take an idle worker (starting the pool if needed), waiting for one if they are all busy.
+
+		Raises:
+			:py:exc:`RuntimeError`: If the pool is shut down before a worker is available.
+		"""
+		self.start()
+		with self.condition:
+			while True:
+				if self.shutting_down or not self.started:
+					raise RuntimeError("SubprocessPool was shut down while waiting for a worker")
+				if self.idle:
+					break
+				self.condition.wait()
+			worker: SupervisedWorker = self.idle.pop()
+			self.nb_busy += 1
+		if not worker.process.is_alive():	# Died while idle (e.g. out of memory killer), or its replacement failed to start
+			worker.kill()
+			try:
+				worker = self.new_worker(worker.index)
+			except BaseException:
+				self.give_back(worker)	# Keep the slot (with the dead worker) so the next call tries again
+				raise
+		return worker
+
+	def release(self, worker: SupervisedWorker, broken: bool) -> None:
+		""" Give back a worker after a call, replacing it if it is broken (killed) or did enough calls (recycled). """
+		worker.tasks_done += 1
+		if broken:
+			worker.kill()
+		elif self.max_tasks_per_child is not None and worker.tasks_done >= self.max_tasks_per_child:
+			worker.stop(timeout=0)		# The worker exits on its own, it is reaped when another process starts
+		else:
+			self.give_back(worker)
+			return
+		try:
+			worker = self.new_worker(worker.index)
+		except Exception:
+			worker.kill()	# e.g. process limit reached, the next call taking this dead worker tries again (and raises)
+		finally:
+			self.give_back(worker)
+
+	def give_back(self, worker: SupervisedWorker) -> None:
+		""" Put a worker back in the idle list and wake up the waiting calls (and shutdown). """
+		with self.condition:
+			self.nb_busy -= 1
+			self.idle.append(worker)
+			self.condition.notify_all()
+
+	def new_worker(self, index: int) -> SupervisedWorker:
+		""" Start a new worker process for the given slot index. """
+		return SupervisedWorker(index, self.nice, self.process_title, self.capturer)
+
+	def __enter__(self) -> "SubprocessPool":
+		""" Enter context manager which starts the workers """
+		return self.start()
+
+	def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+		""" Exit context manager which stops the workers """
+		self.shutdown()
+
+	async def __aenter__(self) -> "SubprocessPool":
+		""" Enter async context manager which starts the workers """
+		return self.__enter__()
+
+	async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+		""" Exit async context manager which stops the workers """
+		self.__exit__(exc_type, exc_val, exc_tb)